@@ -4,9 +4,31 @@ from flask import Blueprint
 
 APIv1_0_0 = Blueprint('APIv1_0_0', __name__)
 
+
+@APIv1_0_0.record_once
+def configure_caches(state):
+    """Set caches sizes from application config on registration."""
+    from sqlalchemy.orm import configure_mappers
+    from .utils import spec_plans, schema_variants, \
+        build_attribute_paths_index
+    from .serializers import compiled_dumpers
+
+    spec_plans.maxsize = state.app.config.get('SPEC_CACHE_SIZE', 256)
+    schema_variants.maxsize = state.app.config.get('SCHEMA_CACHE_SIZE', 128)
+    compiled_dumpers.maxsize = state.app.config.get('SCHEMA_CACHE_SIZE', 128)
+
+    # All relationships (and backrefs) must be configured before indexing
+    configure_mappers()
+    build_attribute_paths_index(
+        state.app.config.get('ATTRIBUTE_PATHS_DEPTH', 3)
+    )
+
+
 from . import relations  # noqa: F401, E402
 from . import users  # noqa: F401, E402
 from . import organizational_structure  # noqa: F401, E402
 from . import modules  # noqa: F401, E402
 from . import emails  # noqa: F401, E402
 from . import passwords  # noqa: F401, E402
+from . import introspection  # noqa: F401, E402
+from . import invalidation  # noqa: F401, E402
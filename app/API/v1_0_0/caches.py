@@ -0,0 +1,120 @@
+"""Process local caches, used by views and utilities."""
+
+from collections import OrderedDict
+from threading import Lock
+
+import time
+
+
+class TTLCache(object):
+    """
+    Thread-safe bounded dictionary cache with time to live of entries.
+
+    Expired entries are removed on lookup, when cache is full least recently
+    used entries are evicted.
+
+    Supported parameters:
+    ttl (Integer) - time (in seconds) after which entry expires
+    maxsize (Integer) - maximum entries count
+    """
+
+    def __init__(self, ttl=60, maxsize=1024):
+        """Class constructor."""
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key, default=None):
+        """Get unexpired value by key and mark it as recently used."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            if entry[1] < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return entry[0]
+
+    def set(self, key, value, ttl=None):
+        """Set value by key (with own time to live, if passed)."""
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > max(self.maxsize, 0):
+                self._data.popitem(last=False)
+
+    def clear(self):
+        """Remove all entries."""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        """Entries count (including expired, but not yet removed)."""
+        return len(self._data)
+
+
+class LRUCache(object):
+    """
+    Thread-safe bounded cache with least recently used entries eviction.
+
+    Counts hits and misses of lookups.
+
+    Supported parameters:
+    maxsize (Integer) - maximum entries count
+    """
+
+    def __init__(self, maxsize=256):
+        """Class constructor."""
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key, default=None):
+        """Get value by key and mark it as recently used."""
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        """Set value by key, evicting least recently used entries."""
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > max(self.maxsize, 0):
+                self._data.popitem(last=False)
+
+    def clear(self):
+        """Remove all entries and reset counters."""
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """Cache usage statistics."""
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+    def keys(self):
+        """List of keys (from least to most recently used)."""
+        with self._lock:
+            return list(self._data.keys())
+
+    def __len__(self):
+        """Entries count."""
+        return len(self._data)
@@ -0,0 +1,316 @@
+"""
+Closure table of organizational structure.
+
+Optional hierarchy index (STRUCTURE_CLOSURE_INDEX config): every element is
+paired with all his ancestors and with itself. Enabled index is the
+authoritative hierarchy: write handlers of structure change parents, levels
+and the index without shifting of nested sets keys, readers of ancestors,
+subtrees and counts use the index. Left key of element is kept only as
+order key among siblings, so nested sets keys are regenerated on demand
+(«flask structure rebuild» command), which must be done before disabling
+of the index. Index must be filled by «flask structure closure» command
+before enabling.
+"""
+
+from flask import current_app as app
+from sqlalchemy import bindparam, select
+
+from app import db
+from app.models import OrganizationalStructure, \
+    OrganizationalStructureClosure
+
+# Least order key of not root element (left key 1 belongs to roots)
+FIRST_ORDER_KEY = 2
+
+
+def closure_enabled():
+    """Check closure table index is enabled."""
+    return app.config.get('STRUCTURE_CLOSURE_INDEX', False)
+
+
+def renumbered_key(number):
+    """Order key of child by position (with gaps for placing between)."""
+    return FIRST_ORDER_KEY + 1 + 2 * number
+
+
+def order_key(parent_id, exclude=None, first=False, before=None,
+              after=None):
+    """
+    Get order key of element placed among children of parent.
+
+    Key is chosen between keys of neighbours, if they have a gap, else
+    other children are renumbered (only their left keys are written).
+
+    Required parameters:
+    parent_id (Integer) - identifier of parent
+
+    Supported parameters:
+    exclude (Integer) - identifier of placed element (if it is a child)
+    first (Boolean) - place as the first child (the last by default)
+    before (Integer) - identifier of next sibling
+    after (Integer) - identifier of previous sibling
+    """
+    table = OrganizationalStructure.__table__
+    siblings = db.session.execute(
+        select(table.c.id, table.c.lft).where(
+            table.c.parent_id == parent_id,
+            table.c.id != exclude
+        ).order_by(table.c.lft, table.c.id)
+    ).fetchall()
+    ids = [row.id for row in siblings]
+    if first:
+        index = 0
+    elif before is not None:
+        index = ids.index(before)
+    elif after is not None:
+        index = ids.index(after) + 1
+    else:
+        index = len(siblings)
+
+    low = siblings[index - 1].lft if index else FIRST_ORDER_KEY - 1
+    if index == len(siblings):
+        return low + 1
+    high = siblings[index].lft
+    if high - low > 1:
+        return (low + high) // 2
+
+    # No gap between neighbours: children are renumbered
+    changed = [
+        {'_id': row.id, '_lft': renumbered_key(number + (number >= index))}
+        for number, row in enumerate(siblings)
+        if row.lft != renumbered_key(number + (number >= index))
+    ]
+    if changed:
+        db.session.execute(
+            table.update().where(
+                table.c.id == bindparam('_id')
+            ).values(lft=bindparam('_lft')),
+            changed
+        )
+
+    return renumbered_key(index)
+
+
+def insert_element(parent, **columns):
+    """
+    Insert element as the last child of parent (without shifting of nested
+    sets keys) and index it.
+
+    Returns identifier of new element.
+
+    Required parameters:
+    parent (OrganizationalStructure) - parent of new element
+
+    Supported parameters:
+    **columns - values of state columns of new element
+    """
+    table = OrganizationalStructure.__table__
+    key = order_key(parent.id)
+    id = db.session.execute(
+        table.insert().values(
+            parent_id=parent.id,
+            tree_id=parent.tree_id,
+            level=parent.level + 1,
+            lft=key,
+            rgt=key + 1,
+            **columns
+        )
+    ).inserted_primary_key[0]
+
+    index = OrganizationalStructureClosure.__table__
+    ancestors = db.session.execute(
+        select(index.c.ancestor_id, index.c.depth).where(
+            index.c.descendant_id == parent.id
+        )
+    ).fetchall()
+    rows = [
+        {'ancestor_id': ancestor_id, 'descendant_id': id, 'depth': depth + 1}
+        for ancestor_id, depth in ancestors
+    ]
+    rows.append({'ancestor_id': id, 'descendant_id': id, 'depth': 0})
+    db.session.execute(index.insert(), rows)
+
+    return id
+
+
+def move_subtree(id, parent_id):
+    """
+    Reindex subtree of element moved under other parent.
+
+    Rows between subtree and former ancestors are deleted and rows between
+    subtree and new ancestors are inserted (rows inside subtree are kept).
+    Returns count of touched rows.
+
+    Required parameters:
+    id (Integer) - identifier of moved element
+    parent_id (Integer) - identifier of new parent
+    """
+    table = OrganizationalStructureClosure.__table__
+    subtree = db.session.execute(
+        select(table.c.descendant_id, table.c.depth).where(
+            table.c.ancestor_id == id
+        )
+    ).fetchall()
+    ancestors = db.session.execute(
+        select(table.c.ancestor_id, table.c.depth).where(
+            table.c.descendant_id == parent_id
+        )
+    ).fetchall()
+
+    ids = [descendant_id for descendant_id, depth in subtree]
+    deleted = db.session.execute(
+        table.delete().where(
+            table.c.descendant_id.in_(ids),
+            table.c.ancestor_id.notin_(ids)
+        )
+    ).rowcount
+    rows = [
+        {
+            'ancestor_id': ancestor_id,
+            'descendant_id': descendant_id,
+            'depth': ancestor_depth + descendant_depth + 1
+        }
+        for ancestor_id, ancestor_depth in ancestors
+        for descendant_id, descendant_depth in subtree
+    ]
+    if rows:
+        db.session.execute(table.insert(), rows)
+
+    return deleted + len(rows)
+
+
+def move_element(element, target, position):
+    """
+    Move element (without shifting of nested sets keys) and reindex it.
+
+    Pending changes of session are flushed first, element is expired after
+    moving. Returns count of touched rows. Raises ValueError, if target is
+    inside subtree of element.
+
+    Required parameters:
+    element (OrganizationalStructure) - moved element
+    target (OrganizationalStructure) - new parent or sibling of element
+    position (String) - inside (as the first child, as moving of mptt
+    library), before or after target
+    """
+    table = OrganizationalStructure.__table__
+    index = OrganizationalStructureClosure.__table__
+    db.session.flush()
+    parent = target if position == 'inside' else target.parent
+    # Element cannot be moved into own subtree
+    if db.session.execute(
+        select(index.c.depth).where(
+            index.c.ancestor_id == element.id,
+            index.c.descendant_id == parent.id
+        )
+    ).first():
+        raise ValueError(
+            'Unable to move element with id=%s into own subtree' % element.id
+        )
+    values = {'lft': order_key(
+        parent.id,
+        exclude=element.id,
+        first=position == 'inside',
+        before=target.id if position == 'before' else None,
+        after=target.id if position == 'after' else None
+    )}
+    touched = 1
+
+    if parent.id != element.parent_id:
+        touched += db.session.execute(
+            table.update().where(
+                table.c.id.in_(
+                    select(index.c.descendant_id).where(
+                        index.c.ancestor_id == element.id
+                    )
+                )
+            ).values(
+                level=table.c.level + parent.level + 1 - element.level,
+                tree_id=parent.tree_id
+            )
+        ).rowcount
+        touched += move_subtree(element.id, parent.id)
+        values['parent_id'] = parent.id
+
+    db.session.execute(
+        table.update().where(table.c.id == element.id).values(**values)
+    )
+    db.session.expire(element)
+
+    return touched
+
+
+def element_rows(tree, key, ids):
+    """Closure rows of element of tree in memory (with path to root)."""
+    rows = []
+    depth = 0
+    ancestor = key
+    while ancestor is not None:
+        rows.append({
+            'ancestor_id': ids.get(ancestor, ancestor),
+            'descendant_id': ids.get(key, key),
+            'depth': depth
+        })
+        ancestor = tree.elements[ancestor]['parent_id']
+        depth += 1
+
+    return rows
+
+
+def sync_tree(tree, ids):
+    """
+    Reindex created and moved elements of saved tree in memory (call
+    before deleting of elements).
+
+    Returns count of touched rows.
+
+    Required parameters:
+    tree (StructureTree) - saved structure tree
+    ids (Dictionary) - identifiers of created elements by references
+    """
+    table = OrganizationalStructureClosure.__table__
+    moved = list(tree.created) + [
+        key for key, element in tree.elements.items()
+        if key in tree.original and
+        element['parent_id'] != tree.original[key]['parent_id']
+    ]
+    affected = {}
+    for key in moved:
+        if key not in affected:
+            affected.update(dict.fromkeys(tree.subtree(key)))
+
+    touched = 0
+    stale = [
+        ids.get(key, key) for key in affected if key in tree.original
+    ] + list(tree.deleted)
+    if stale:
+        touched += db.session.execute(
+            table.delete().where(table.c.descendant_id.in_(stale))
+        ).rowcount
+    rows = [
+        row for key in affected for row in element_rows(tree, key, ids)
+    ]
+    if rows:
+        db.session.execute(table.insert(), rows)
+
+    return touched + len(rows)
+
+
+def rebuild_closure(tree):
+    """
+    Fill index by all elements of tree in memory (without commit).
+
+    Returns count of inserted rows.
+
+    Required parameters:
+    tree (StructureTree) - structure tree with existing elements only
+    """
+    table = OrganizationalStructureClosure.__table__
+    db.session.execute(table.delete())
+    rows = [
+        row for key in tree.elements for row in element_rows(tree, key, {})
+    ]
+    if rows:
+        db.session.execute(table.insert(), rows)
+
+    return len(rows)
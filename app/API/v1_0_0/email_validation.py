@@ -0,0 +1,170 @@
+"""
+Validation of email addresses.
+
+Levels of checks (EMAIL_VALIDATION_LEVEL config):
+syntax - format of address and blacklist of domains (without network)
+mx - syntax and MX records of domain (by default)
+probe - mx and SMTP dialog with mail servers of domain (without sending)
+
+MX records are cached by domain in process and in database table
+(email_domains), shared by all workers: found records for
+EMAIL_VALIDATION_MX_TTL seconds, missing domains and records for
+EMAIL_VALIDATION_MX_NEGATIVE_TTL seconds. Temporary failures of DNS
+(timeouts, unavailable nameservers) aren't cached.
+"""
+
+from flask import current_app as app
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from validate_email.dns_check import dns_check
+from validate_email.domainlist_check import domainlist_check
+from validate_email.email_address import EmailAddress
+from validate_email.exceptions import EmailValidationError, DNSError, \
+    DomainNotFoundError, NoMXError, NoValidMXError, SMTPTemporaryError
+from validate_email.regex_check import regex_check
+from validate_email.smtp_check import smtp_check
+
+from app import db
+from app.models import EmailDomains
+from .caches import TTLCache
+from datetime import datetime, timedelta
+
+# Levels of checks
+VALIDATION_LEVELS = ('syntax', 'mx', 'probe')
+
+# MX records of domains (process local level of cache)
+domain_records = TTLCache(maxsize=4096)
+
+
+def dns_resolver(domain, timeout):
+    """
+    Get MX hosts of domain by DNS.
+
+    Raises DNSError of validate_email library, if hosts aren't found.
+    """
+    return dns_check(
+        email_address=EmailAddress('postmaster@%s' % domain),
+        timeout=timeout
+    )
+
+
+def store_records(domain, records, expires_at):
+    """Save MX hosts of domain to shared table (in own transaction)."""
+    table = EmailDomains.__table__
+    values = {'mx_records': ','.join(records)[:1024], 'expires_at': expires_at}
+    try:
+        with db.engine.begin() as connection:
+            updated = connection.execute(
+                table.update().where(table.c.domain == domain).values(
+                    **values
+                )
+            ).rowcount
+            if not updated:
+                connection.execute(table.insert().values(
+                    domain=domain, **values
+                ))
+    except IntegrityError:
+        # Domain has been inserted by other worker
+        pass
+
+
+def domain_mx_records(domain, resolver=None):
+    """
+    Get MX hosts of domain through process and shared caches.
+
+    Returns list of hosts (empty, if domain or its records don't exist) or
+    None on temporary failure of DNS.
+
+    Required parameters:
+    domain (String) - domain of email (in ACE encoding)
+
+    Supported parameters:
+    resolver (Function) - function of domain and timeout, returning MX
+    hosts (DNS lookup by default)
+    """
+    domain = domain.lower()
+    records = domain_records.get(domain)
+    if records is not None:
+        return records
+
+    now = datetime.now()
+    table = EmailDomains.__table__
+    row = db.session.execute(
+        select(table.c.mx_records, table.c.expires_at).where(
+            table.c.domain == domain
+        )
+    ).first()
+    if row and row.expires_at > now:
+        records = row.mx_records.split(',') if row.mx_records else []
+        domain_records.set(
+            domain, records, (row.expires_at - now).total_seconds()
+        )
+        return records
+
+    try:
+        records = (resolver or dns_resolver)(
+            domain,
+            app.config.get('EMAIL_VALIDATION_DNS_TIMEOUT', 5)
+        )
+        ttl = app.config.get('EMAIL_VALIDATION_MX_TTL', 86400)
+    except (DomainNotFoundError, NoMXError, NoValidMXError):
+        records = []
+        ttl = app.config.get('EMAIL_VALIDATION_MX_NEGATIVE_TTL', 600)
+    except DNSError:
+        return None
+
+    store_records(domain, records, now + timedelta(seconds=ttl))
+    domain_records.set(domain, records, ttl)
+
+    return records
+
+
+def validate_address(address, level=None, resolver=None):
+    """
+    Validate email address by level of checks.
+
+    Returns True (valid), False (invalid) or None (ambiguous result on
+    temporary failure of DNS or mail server). Raises ValueError on unknown
+    level.
+
+    Required parameters:
+    address (String) - email address
+
+    Supported parameters:
+    level (String) - level of checks (EMAIL_VALIDATION_LEVEL config by
+    default)
+    resolver (Function) - resolver of MX hosts of domain
+    """
+    level = level or app.config.get('EMAIL_VALIDATION_LEVEL', 'mx')
+    if level not in VALIDATION_LEVELS:
+        raise ValueError('Unknown email validation level «%s»' % level)
+    try:
+        email_address = EmailAddress(address)
+        regex_check(email_address=email_address)
+        domainlist_check(email_address=email_address)
+    except EmailValidationError:
+        return False
+    if level == 'syntax':
+        return True
+
+    if email_address.domain_literal_ip:
+        records = [email_address.domain_literal_ip]
+    else:
+        records = domain_mx_records(email_address.ace_domain, resolver)
+    if records is None:
+        return None
+    if not records:
+        return False
+    if level != 'probe':
+        return True
+
+    try:
+        return smtp_check(
+            email_address=email_address,
+            mx_records=records,
+            timeout=app.config.get('EMAIL_VALIDATION_SMTP_TIMEOUT', 10)
+        )
+    except SMTPTemporaryError:
+        return None
+    except EmailValidationError:
+        return False
@@ -1,20 +1,23 @@
 """Views of API version 1.0.0: System modules and modules types."""
 
-from flask import request, Response, json, url_for, render_template, \
-    current_app as app
+from flask import request, url_for, current_app as app
 from flask_babel import _
-from flask_mail import Message
-from validate_email import validate_email
-from app import db, mail
+from app import db
 from datetime import datetime, timedelta
 
 from .blueprint import APIv1_0_0
 from app.models import Emails, Users
 from app.schemas import EmailsSchema
-from .utils import json_http_response, marshmallow_excluding_converter, \
+from .outbox import enqueue
+from .mail_templates import render_mail
+from .email_validation import validate_address
+from .utils import json_http_response, json_response, \
+     marshmallow_excluding_converter, \
      marshmallow_only_fields_converter, sqlalchemy_filters_converter, \
      sqlalchemy_orders_converter, pagination_of_list, display_time, \
-     generate_confirmation_token, confirm_email_token, variable_type_check
+     generate_confirmation_token, confirm_email_token, variable_type_check, \
+     pagination_cursor_converter, ndjson_requested, ndjson_response, \
+     schema_instance
 
 
 @APIv1_0_0.route('/emails/', methods=['GET'])
@@ -50,7 +53,7 @@ def get_emails():
         except Exception as error:
             return error.args[0]
         #
-        schema = EmailsSchema(**dump_params)
+        schema = schema_instance(EmailsSchema, **dump_params)
         # ----------------------------------------------------------------------
 
         # Make empty base query and if
@@ -74,27 +77,33 @@ def get_emails():
             except Exception as error:
                 return error.args[0]
             elements = elements.order_by(*orders_list)
+        # Check cursor of keyset pagination (if requested)
+        try:
+            cursor = pagination_cursor_converter(
+                Emails, orders_list, request.args.get('cursor')
+            )
+        except Exception as error:
+            return error.args[0]
         # ----------------------------------------------------------------------
 
-        data = schema.dump(elements.all())
+        # Streaming all rows in NDJSON format, if requested
+        if ndjson_requested():
+            return ndjson_response(elements, schema, orders_list, cursor)
 
-        # Paginating results of dumping
-        # Probably would best is pagination in sqlalchemy query?
+        # Paginating query and dumping only requested page
         data = pagination_of_list(
-            data,
+            elements,
             url_for(
-                '.get_modules',
+                '.get_emails',
                 _external=True
             ),
-            query_params=request.args
+            query_params=request.args,
+            schema=schema,
+            cursor=cursor
         )
         # ----------------------------------------------------------------------
 
-        response = Response(
-            response=json.dumps(data),
-            status=200,
-            mimetype='application/json'
-        )
+        response = json_response(data)
     except Exception:
 
         response = json_http_response(dbg=request.args.get('dbg', False))
@@ -132,7 +141,7 @@ def get_emails_item(id):
         except Exception as error:
             return error.args[0]
 
-        schema = EmailsSchema(**dump_params)
+        schema = schema_instance(EmailsSchema, **dump_params)
         # ----------------------------------------------------------------------
 
         # Query item from database, and if is not none dump it
@@ -150,11 +159,7 @@ def get_emails_item(id):
         data = schema.dump(item)
         # ----------------------------------------------------------------------
 
-        response = Response(
-            response=json.dumps(data),
-            status=200,
-            mimetype='application/json'
-        )
+        response = json_response(data)
     except Exception:
 
         response = json_http_response(dbg=request.args.get('dbg', False))
@@ -240,7 +245,7 @@ def post_emails_item():
                     ),
                     dbg=request.args.get('dbg', False)
                 )
-            if not validate_email(value.value):
+            if not validate_address(value.value):
                 return json_http_response(
                     status=400,
                     given_message=_(
@@ -347,7 +352,8 @@ def post_emails_item():
 
         # Before send response, dump newly added email to json and add
         # his data to response
-        email_schema = EmailsSchema(
+        email_schema = schema_instance(
+            EmailsSchema,
             only=["id", "value", "links", "type"]
         )
         email_dump = email_schema.dump(email)
@@ -367,11 +373,7 @@ def post_emails_item():
         }
         # ----------------------------------------------------------------------
 
-        response = Response(
-            response=json.dumps(output_json),
-            status=200,
-            mimetype='application/json'
-        )
+        response = json_response(output_json)
 
         post_emails_verify_item(email.id)
 
@@ -487,7 +489,7 @@ def put_emails_item(id):
             elif (len(value.value) > 0) and (
                     value.value != target.value
             ):
-                if not validate_email(value.value):
+                if not validate_address(value.value):
                     return json_http_response(
                         status=400,
                         given_message=_(
@@ -636,7 +638,7 @@ def post_emails_verify_item(id):
         confirm_url = app.config['CLIENT_LINK'] + '/email/verify/' + \
             token.decode("utf-8")
 
-        html = render_template(
+        html = render_mail(
             'confirmation_mail.html',
             confirm_url=confirm_url,
             active_time="".join(display_time(expiration))
@@ -644,18 +646,12 @@ def post_emails_verify_item(id):
         subject = 'Подтверждение адреса электронной почты в ИС'
         ' подразделения ГАСПИ'
 
-        message = Message(
-            subject,
-            html=html,
-            recipients=[recipient.value],
-            sender=app.config['MAIL_DEFAULT_SENDER']
-        )
-
         try:
-            mail.send(message)
+            enqueue('verification', subject, html, [recipient.value])
+            db.session.commit()
             response = json_http_response(
                 given_message=_(
-                    "Mail successfully send to recipient for verification"
+                    "Mail successfully queued to recipient for verification"
                 ),
                 status=200,
                 dbg=request.args.get('dbg', False)
@@ -663,7 +659,7 @@ def post_emails_verify_item(id):
         except Exception:
             response = json_http_response(
                 given_message=_(
-                    "Something went wrong! Mail prepared, but not sent!"
+                    "Something went wrong! Mail prepared, but not queued!"
                 ),
                 status=400,
                 dbg=request.args.get('dbg', False)
@@ -0,0 +1,124 @@
+"""Views of API version 1.0.0: Introspection of models."""
+
+from flask import current_app as app, request
+from flask_babel import _
+from app import db
+
+from .blueprint import APIv1_0_0
+from .utils import json_http_response, json_response, attribute_paths_index, \
+    class_attribute_existence, spec_plans, schema_variants
+from .serializers import compiled_dumpers
+from .structure_tree import tree_renders, headcounts, structure_version
+from .invalidation import seen_generations
+from .mail_templates import mail_templates
+from .email_validation import domain_records
+
+# List of routes:
+# get_introspection_models() - get list of models
+# get_introspection_model_paths() - get valid dotted attribute paths of model
+# get_introspection_caches() - get statistics of process local caches
+
+
+def introspection_models():
+    """Get dictionary of mapped models by class name."""
+    return {
+        mapper.class_.__name__: mapper.class_
+        for mapper in db.Model.registry.mappers
+    }
+
+
+@APIv1_0_0.route('/introspection/models', methods=['GET'])
+# @token_required
+def get_introspection_models():
+    """Get list of models names."""
+    try:
+        data = sorted(introspection_models().keys())
+
+        response = json_response(data)
+
+        return response
+
+    except Exception:
+
+        return json_http_response(dbg=request.args.get('dbg', False))
+
+
+@APIv1_0_0.route('/introspection/models/<name>/paths', methods=['GET'])
+# @token_required
+def get_introspection_model_paths(name):
+    """
+    Get valid dotted attribute paths of model.
+
+    Paths can be used in columns and exclude parameters of list endpoints.
+    """
+    try:
+        model = introspection_models().get(name)
+        if not model:
+            return json_http_response(
+                status=404,
+                given_message=_(
+                    "Model «%(model)s» doesn't exist",
+                    model=name
+                ),
+                dbg=request.args.get('dbg', False)
+            )
+
+        # Index of model is formed on first check, if not built yet
+        class_attribute_existence(model, 'id')
+        data = sorted(attribute_paths_index[model])
+
+        response = json_response(data)
+
+        return response
+
+    except Exception:
+
+        return json_http_response(dbg=request.args.get('dbg', False))
+
+
+@APIv1_0_0.route('/introspection/caches', methods=['GET'])
+# @token_required
+def get_introspection_caches():
+    """
+    Get statistics of process local caches.
+
+    Schemas statistics includes list of live schema variants.
+    """
+    try:
+        schemas = schema_variants.stats()
+        schemas['variants'] = [
+            {
+                'schema': schema_class.__name__,
+                'many': many,
+                'only': sorted(only) if only is not None else None,
+                'exclude': sorted(exclude)
+            }
+            for schema_class, many, only, exclude in schema_variants.keys()
+        ]
+
+        data = {
+            'specifications': spec_plans.stats(),
+            'schemas': schemas,
+            'compiledDumpers': compiled_dumpers.stats(),
+            'structureTree': dict(
+                tree_renders.stats(), version=structure_version()
+            ),
+            'headcounts': headcounts.stats(),
+            'mailTemplates': mail_templates.stats(),
+            'emailDomains': {
+                'level': app.config.get('EMAIL_VALIDATION_LEVEL', 'mx'),
+                'size': len(domain_records)
+            },
+            'invalidation': {
+                'backend': app.config.get('CACHE_BUS_BACKEND', 'local'),
+                'generations': seen_generations()
+            }
+        }
+
+        response = json_response(data)
+
+        return response
+
+    except Exception:
+
+        return json_http_response(dbg=request.args.get('dbg', False))
@@ -0,0 +1,236 @@
+"""
+Invalidation bus of process local caches.
+
+Writers publish change of data channel, caches subscribe to channels.
+Published changes are delivered to subscribers of the same process at once
+and to other processes (workers) through shared generation counters of
+channels, polled before every request. Positive CACHE_BUS_POLL_INTERVAL
+limits polling to once in interval seconds: then caches of other workers
+may stay stale up to interval seconds after change.
+
+Channels:
+structure - organizational structure and users assignments to it
+modules - modules (counts of filtered records)
+
+Backends of counters (CACHE_BUS_BACKEND config):
+db - generations table in database (cache_generations)
+mmap - shared memory file (CACHE_BUS_FILE), for workers of one host
+local - without counters (only one process, by default)
+"""
+
+from threading import Lock
+
+from flask import current_app as app
+from sqlalchemy import select
+
+from app import db
+from app.models import CacheGenerations
+from .blueprint import APIv1_0_0
+
+import mmap
+import os
+import struct
+import time
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Channels of cached data
+CHANNELS = ('structure', 'modules')
+
+# Counter format of channel in shared memory file
+COUNTER = struct.Struct('<Q')
+
+subscribers = {channel: [] for channel in CHANNELS}
+
+_lock = Lock()
+_seen = {}
+_polled_at = None
+_shared_memory = None
+
+
+def subscribe(channel, callback):
+    """
+    Subscribe callback (without arguments) to changes of channel.
+
+    Required parameters:
+    channel (String) - channel name (one of CHANNELS)
+    callback (Function) - invalidation function of cache
+    """
+    subscribers[channel].append(callback)
+
+    return callback
+
+
+def notify(channel):
+    """Call subscribers of channel in current process."""
+    for callback in subscribers[channel]:
+        callback()
+
+
+def publish(channel):
+    """
+    Publish change of channel data (call after commit of changes).
+
+    Required parameters:
+    channel (String) - channel name (one of CHANNELS)
+    """
+    if channel not in subscribers:
+        raise KeyError(channel)
+
+    backend = app.config.get('CACHE_BUS_BACKEND', 'local')
+    try:
+        if backend == 'db':
+            generation = db_increment(channel)
+        elif backend == 'mmap':
+            generation = shared_memory_increment(channel)
+        else:
+            generation = None
+    except Exception:
+        app.logger.exception(
+            'Cache bus: change of «%s» is not published', channel
+        )
+        generation = None
+
+    with _lock:
+        if generation is not None:
+            _seen[channel] = generation
+    notify(channel)
+
+
+def seen_generations():
+    """Last seen generations of channels in current process."""
+    with _lock:
+        return dict(_seen)
+
+
+def poll(force=False):
+    """
+    Check generations of channels and invalidate changed caches.
+
+    Supported parameters:
+    force (Boolean) - ignore poll interval (False by default)
+    """
+    global _polled_at
+
+    backend = app.config.get('CACHE_BUS_BACKEND', 'local')
+    if backend not in ('db', 'mmap'):
+        return
+
+    now = time.monotonic()
+    interval = app.config.get('CACHE_BUS_POLL_INTERVAL', 0)
+    with _lock:
+        if not force and _polled_at is not None and \
+                now - _polled_at < interval:
+            return
+        _polled_at = now
+
+    try:
+        if backend == 'db':
+            generations = db_generations()
+        else:
+            generations = shared_memory_generations()
+    except Exception:
+        app.logger.exception('Cache bus: generations are not polled')
+        return
+
+    changed = []
+    with _lock:
+        for channel in CHANNELS:
+            generation = generations.get(channel, 0)
+            if _seen.get(channel, generation) != generation:
+                changed.append(channel)
+            _seen[channel] = generation
+
+    for channel in changed:
+        notify(channel)
+
+
+@APIv1_0_0.before_request
+def poll_invalidations():
+    """Poll generations of channels before request."""
+    poll()
+
+
+# ------------------------------------------------------------------------------
+# Database backend
+
+
+def db_increment(channel):
+    """Increment generation of channel in database table."""
+    table = CacheGenerations.__table__
+    # Separate transaction, not affecting session of request
+    with db.engine.begin() as connection:
+        updated = connection.execute(
+            table.update().where(
+                table.c.channel == channel
+            ).values(
+                generation=table.c.generation + 1
+            )
+        ).rowcount
+        if not updated:
+            connection.execute(
+                table.insert().values(channel=channel, generation=1)
+            )
+        return connection.execute(
+            select(table.c.generation).where(table.c.channel == channel)
+        ).scalar()
+
+
+def db_generations():
+    """Get generations of all channels from database table."""
+    table = CacheGenerations.__table__
+    with db.engine.connect() as connection:
+        return dict(connection.execute(
+            select(table.c.channel, table.c.generation)
+        ).fetchall())
+
+
+# ------------------------------------------------------------------------------
+# Shared memory file backend
+
+
+def shared_memory():
+    """Open (and create, if not exists) shared memory file of counters."""
+    global _shared_memory
+
+    with _lock:
+        if _shared_memory is None:
+            path = app.config.get(
+                'CACHE_BUS_FILE', '/dev/shm/api_cache_generations'
+            )
+            size = COUNTER.size * len(CHANNELS)
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+            if os.fstat(fd).st_size < size:
+                os.ftruncate(fd, size)
+            _shared_memory = (fd, mmap.mmap(fd, size))
+
+    return _shared_memory
+
+
+def shared_memory_increment(channel):
+    """Increment generation of channel in shared memory file."""
+    fd, memory = shared_memory()
+    offset = COUNTER.size * CHANNELS.index(channel)
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+    try:
+        generation = COUNTER.unpack_from(memory, offset)[0] + 1
+        COUNTER.pack_into(memory, offset, generation)
+    finally:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+
+    return generation
+
+
+def shared_memory_generations():
+    """Get generations of all channels from shared memory file."""
+    fd, memory = shared_memory()
+
+    return {
+        channel: COUNTER.unpack_from(memory, COUNTER.size * index)[0]
+        for index, channel in enumerate(CHANNELS)
+    }
@@ -0,0 +1,166 @@
+"""
+Pool of SMTP connections.
+
+Connections to mail server (opened by Flask-Mail with TLS handshake and
+login) are kept open between batches of outbox worker, so one connection
+sends many mails. Connection is closed after MAIL_POOL_MAX_MESSAGES mails
+(servers limit count of messages per session) or when it was idle longer
+than MAIL_POOL_IDLE_TIMEOUT seconds (servers drop idle sessions), at most
+MAIL_POOL_SIZE idle connections are kept. Session dropped by server is
+reopened once for the same mail.
+"""
+
+from threading import Lock
+
+from flask import current_app as app
+
+from app import mail
+
+import smtplib
+import time
+
+
+class SMTPPool(object):
+    """Pool of open connections to mail server with usage metrics."""
+
+    def __init__(self):
+        """Class constructor."""
+        self.lock = Lock()
+        self.idle = []
+        self.metrics = dict.fromkeys(
+            ('opened', 'reused', 'sent', 'dropped', 'closedByLimit',
+             'closedIdle'),
+            0
+        )
+
+    def count(self, metric, value=1):
+        """Increment metric of pool."""
+        with self.lock:
+            self.metrics[metric] += value
+
+    def max_messages(self):
+        """Get maximal count of mails per connection."""
+        return app.config.get('MAIL_POOL_MAX_MESSAGES', 100)
+
+    def open(self):
+        """Open new connection to mail server."""
+        connection = mail.connect()
+        connection.__enter__()
+        connection.closed = False
+        self.count('opened')
+
+        return connection
+
+    def discard(self, connection):
+        """Close connection (errors of closed sessions are ignored)."""
+        connection.closed = True
+        host = connection.host
+        connection.host = None
+        if host is None:
+            return
+        try:
+            host.quit()
+        except (smtplib.SMTPException, OSError):
+            host.close()
+
+    def usable(self, connection):
+        """Check connection is not closed by pool or server."""
+        return not connection.closed and (
+            connection.host is None or connection.host.sock is not None
+        )
+
+    def acquire(self):
+        """Get idle connection (most recently used first) or open new."""
+        timeout = app.config.get('MAIL_POOL_IDLE_TIMEOUT', 30)
+        while True:
+            with self.lock:
+                if not self.idle:
+                    break
+                connection, released = self.idle.pop()
+            if time.monotonic() - released > timeout:
+                self.discard(connection)
+                self.count('closedIdle')
+                continue
+            self.count('reused')
+            return connection
+
+        return self.open()
+
+    def release(self, connection):
+        """Return connection to pool (or close it, if pool is full)."""
+        if not self.usable(connection):
+            return
+        with self.lock:
+            if len(self.idle) < app.config.get('MAIL_POOL_SIZE', 2):
+                self.idle.append((connection, time.monotonic()))
+                return
+        self.discard(connection)
+
+    def send(self, connection, message):
+        """
+        Send message through connection.
+
+        Returns connection for next messages or None, if connection was
+        closed after maximal count of mails.
+
+        Required parameters:
+        connection (Connection) - connection, acquired from pool
+        message (Message) - Flask-Mail message
+        """
+        try:
+            connection.send(message)
+        except smtplib.SMTPServerDisconnected:
+            # Server has closed session (for example, idle pooled session):
+            # message is sent through new connection
+            self.discard(connection)
+            self.count('dropped')
+            connection = self.open()
+            try:
+                connection.send(message)
+            except Exception:
+                self.discard(connection)
+                raise
+        self.count('sent')
+
+        if connection.num_emails >= self.max_messages():
+            self.discard(connection)
+            self.count('closedByLimit')
+            return None
+
+        return connection
+
+    def prune(self):
+        """Close idle connections with expired idle timeout."""
+        timeout = app.config.get('MAIL_POOL_IDLE_TIMEOUT', 30)
+        now = time.monotonic()
+        with self.lock:
+            expired = [
+                connection for connection, released in self.idle
+                if now - released > timeout
+            ]
+            self.idle = [
+                (connection, released) for connection, released in self.idle
+                if now - released <= timeout
+            ]
+        for connection in expired:
+            self.discard(connection)
+        self.count('closedIdle', len(expired))
+
+    def close(self):
+        """Close all idle connections."""
+        with self.lock:
+            idle, self.idle = self.idle, []
+        for connection, released in idle:
+            self.discard(connection)
+
+    def stats(self):
+        """Get metrics of pool with count of saved handshakes."""
+        with self.lock:
+            stats = dict(self.metrics)
+            stats['idle'] = len(self.idle)
+        stats['handshakesSaved'] = max(stats['sent'] - stats['opened'], 0)
+
+        return stats
+
+
+smtp_pool = SMTPPool()
@@ -0,0 +1,102 @@
+"""
+Cache of rendered mail templates.
+
+Templates without variables are rendered once per locale. Templates with
+variables are rendered once per locale and set of variables names with
+sentinels instead of values and split by sentinels to fragments, so mail
+is rendered by joining of fragments with escaped values (as autoescape of
+Jinja does). Fragments are checked by rendering with other sentinels: if
+structure of template depends on values (conditions, filters of variables),
+template is rendered by Jinja every time. Cache is disabled by
+MAIL_TEMPLATE_CACHE config (for editing of templates).
+"""
+
+from flask import current_app as app, render_template, has_request_context
+from flask_babel import get_locale
+from markupsafe import escape
+
+from .caches import LRUCache
+
+import re
+import uuid
+
+# Rendered templates and fragments of templates by template name, locale
+# and names of variables
+mail_templates = LRUCache(maxsize=64)
+
+
+def current_locale():
+    """Get locale of request (None without request)."""
+    if not has_request_context():
+        return None
+    locale = get_locale()
+
+    return str(locale) if locale else None
+
+
+def sentinel_values(names):
+    """
+    Get unique sentinels of variables.
+
+    Returns sentinels by names and pattern of sentinels (with group of name).
+    """
+    token = uuid.uuid4().hex
+    values = {name: '%s[%s]%s' % (token, name, token) for name in names}
+
+    return values, re.compile(r'%s\[(\w+)\]%s' % (token, token))
+
+
+def join_fragments(fragments, context):
+    """Join fragments of template with escaped values of variables."""
+    return ''.join(
+        fragment if number % 2 == 0 else str(escape(context[fragment]))
+        for number, fragment in enumerate(fragments)
+    )
+
+
+def compile_template(template, names):
+    """
+    Split rendered template to constant fragments and names of variables.
+
+    Returns list with fragments at even and names at odd positions or None,
+    if rendering of template depends on values of variables.
+
+    Required parameters:
+    template (String) - name of template
+    names (Tuple) - names of template variables
+    """
+    values, pattern = sentinel_values(names)
+    fragments = pattern.split(render_template(template, **values))
+
+    # Fragments must give the same result as rendering with other values
+    values, pattern = sentinel_values(names)
+    if join_fragments(fragments, values) != render_template(
+        template, **values
+    ):
+        return None
+
+    return fragments
+
+
+def render_mail(template, **context):
+    """
+    Render mail template through cache.
+
+    Required parameters:
+    template (String) - name of template
+
+    Supported parameters:
+    **context - values of template variables
+    """
+    if not app.config.get('MAIL_TEMPLATE_CACHE', True):
+        return render_template(template, **context)
+
+    key = (template, current_locale(), tuple(sorted(context)))
+    compiled = mail_templates.get(key)
+    if compiled is None:
+        compiled = compile_template(template, key[2]) or False
+        mail_templates.set(key, compiled)
+    if compiled is False:
+        return render_template(template, **context)
+
+    return join_fragments(compiled, context)
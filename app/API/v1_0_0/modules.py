@@ -2,16 +2,19 @@
 
 import re
 
-from flask import request, Response, json, url_for
+from flask import request, url_for
 from flask_babel import _
 from app import db
 
 from .blueprint import APIv1_0_0
 from app.models import ModulesTypes, Modules
 from app.schemas import ModulesTypesSchema, ModulesSchema
-from .utils import json_http_response, marshmallow_excluding_converter, \
+from .utils import json_http_response, json_response, \
+    marshmallow_excluding_converter, \
     marshmallow_only_fields_converter, sqlalchemy_filters_converter, \
-    sqlalchemy_orders_converter, pagination_of_list, variable_type_check
+    sqlalchemy_orders_converter, pagination_of_list, variable_type_check, \
+    pagination_cursor_converter, schema_instance, relationship_loaders
+from .invalidation import publish
 
 
 @APIv1_0_0.route('/modules/', methods=['GET'])
@@ -47,12 +50,14 @@ def get_modules():
         except Exception as error:
             return error.args[0]
 
-        schema = ModulesSchema(**dump_params)
+        schema = schema_instance(ModulesSchema, **dump_params)
         # ----------------------------------------------------------------------
 
-        # Make empty base query and if
+        # Make base query (with loading of dumped relationships only) and if
         # filters and orders exist - add it to query
-        elements = Modules.query
+        elements = Modules.query.options(
+            *relationship_loaders(Modules, schema)
+        )
 
         if filters_list:
             try:
@@ -71,27 +76,29 @@ def get_modules():
             except Exception as error:
                 return error.args[0]
             elements = elements.order_by(*orders_list)
+        # Check cursor of keyset pagination (if requested)
+        try:
+            cursor = pagination_cursor_converter(
+                Modules, orders_list, request.args.get('cursor')
+            )
+        except Exception as error:
+            return error.args[0]
         # ----------------------------------------------------------------------
 
-        data = schema.dump(elements.all())
-
-        # Paginating results of dumping
-        # Probably would best is pagination in sqlalchemy query?
+        # Paginating query and dumping only requested page
         data = pagination_of_list(
-            data,
+            elements,
             url_for(
                 '.get_modules',
                 _external=True
             ),
-            query_params=request.args
+            query_params=request.args,
+            schema=schema,
+            cursor=cursor
         )
         # ----------------------------------------------------------------------
 
-        response = Response(
-            response=json.dumps(data),
-            status=200,
-            mimetype='application/json'
-        )
+        response = json_response(data)
     except Exception:
 
         response = json_http_response(dbg=request.args.get('dbg', False))
@@ -129,11 +136,14 @@ def get_modules_item(id):
         except Exception as error:
             return error.args[0]
 
-        schema = ModulesSchema(**dump_params)
+        schema = schema_instance(ModulesSchema, **dump_params)
         # ----------------------------------------------------------------------
 
-        # Query item from database, and if is not none dump it
-        item = Modules.query.get(id)
+        # Query item from database (with loading of dumped relationships
+        # only), and if is not none dump it
+        item = Modules.query.options(
+            *relationship_loaders(Modules, schema)
+        ).get(id)
         if not item:
             return json_http_response(
                 status=404,
@@ -147,11 +157,7 @@ def get_modules_item(id):
         data = schema.dump(item)
         # ----------------------------------------------------------------------
 
-        response = Response(
-            response=json.dumps(data),
-            status=200,
-            mimetype='application/json'
-        )
+        response = json_response(data)
     except Exception:
 
         response = json_http_response(dbg=request.args.get('dbg', False))
@@ -192,7 +198,7 @@ def get_modules_types():
         except Exception as error:
             return error.args[0]
 
-        schema = ModulesTypesSchema(**dump_params)
+        schema = schema_instance(ModulesTypesSchema, **dump_params)
         # ----------------------------------------------------------------------
 
         # Make empty base query and if
@@ -216,27 +222,29 @@ def get_modules_types():
             except Exception as error:
                 return error.args[0]
             elements = elements.order_by(*orders_list)
+        # Check cursor of keyset pagination (if requested)
+        try:
+            cursor = pagination_cursor_converter(
+                ModulesTypes, orders_list, request.args.get('cursor')
+            )
+        except Exception as error:
+            return error.args[0]
         # ----------------------------------------------------------------------
 
-        data = schema.dump(elements.all())
-
-        # Paginating results of dumping
-        # Probably would best is pagination in sqlalchemy query?
+        # Paginating query and dumping only requested page
         data = pagination_of_list(
-            data,
+            elements,
             url_for(
                 '.get_modules_types',
                 _external=True
             ),
-            query_params=request.args
+            query_params=request.args,
+            schema=schema,
+            cursor=cursor
         )
         # ----------------------------------------------------------------------
 
-        response = Response(
-            response=json.dumps(data),
-            status=200,
-            mimetype='application/json'
-        )
+        response = json_response(data)
     except Exception:
 
         response = json_http_response(dbg=request.args.get('dbg', False))
@@ -274,7 +282,7 @@ def get_modules_types_item(id):
         except Exception as error:
             return error.args[0]
 
-        schema = ModulesTypesSchema(**dump_params)
+        schema = schema_instance(ModulesTypesSchema, **dump_params)
         # ----------------------------------------------------------------------
 
         # Query item from database, and if is not none dump it
@@ -292,11 +300,7 @@ def get_modules_types_item(id):
         data = schema.dump(item)
         # ----------------------------------------------------------------------
 
-        response = Response(
-            response=json.dumps(data),
-            status=200,
-            mimetype='application/json'
-        )
+        response = json_response(data)
     except Exception:
 
         response = json_http_response(dbg=request.args.get('dbg', False))
@@ -462,8 +466,9 @@ def put_modules_item(id):
         # If session has changes then commit it form output message
         if db.session.dirty:
             db.session.commit()
+            publish('modules')
 
-            schema = ModulesSchema()
+            schema = schema_instance(ModulesSchema)
             data = schema.dump(item_to_update)
 
             output_json = {
@@ -478,7 +483,7 @@ def put_modules_item(id):
         # Else just form output message
         else:
 
-            schema = ModulesSchema()
+            schema = schema_instance(ModulesSchema)
             data = schema.dump(item_to_update)
 
             output_json = {
@@ -495,11 +500,7 @@ def put_modules_item(id):
             }
         # ----------------------------------------------------------------------
 
-        response = Response(
-            response=json.dumps(output_json),
-            status=200,
-            mimetype='application/json'
-        )
+        response = json_response(output_json)
     except Exception:
 
         response = json_http_response(dbg=request.args.get('dbg', False))
@@ -0,0 +1,740 @@
+"""
+Nested sets of organizational structure in memory.
+
+Copy of structure tree (elements with ordered children lists) for batch
+changes: operations are checked and applied to the copy, then nested sets
+keys are renumbered by one pass (or only order keys of changed children
+lists are set, if closure table index is enabled) and only changed rows are
+written to database in one transaction.
+"""
+
+from flask_babel import _
+from sqlalchemy import bindparam, select
+
+from app import db
+from app.models import OrganizationalStructure, user_structure
+from .closure import closure_enabled, rebuild_closure, sync_tree, \
+    renumbered_key, FIRST_ORDER_KEY
+
+import random
+
+# Columns of element, which can be changed by operations
+STATE_COLUMNS = (
+    'name', 'type', 'deletable', 'movable', 'updatable', 'insertable'
+)
+
+# Nested sets columns of element
+KEY_COLUMNS = ('parent_id', 'tree_id', 'lft', 'rgt', 'level')
+
+# Required and supported parameters of operations
+OPERATIONS = {
+    'create': (
+        ('ref', 'parent'),
+        ('name', 'type', 'insertable', 'updatable', 'movable', 'deletable')
+    ),
+    'move': (('id',), ('parent', 'before', 'after')),
+    'rename': (('id', 'name'), ()),
+    'delete': (('id',), ('recursive',))
+}
+
+# Parameters of operations with boolean values
+BOOLEAN_PARAMETERS = (
+    'insertable', 'updatable', 'movable', 'deletable', 'recursive'
+)
+
+# Parameters of operations with identifiers or references of elements
+KEY_PARAMETERS = ('id', 'parent', 'before', 'after')
+
+
+class TreeError(Exception):
+    """Error of tree operation with HTTP status and message."""
+
+    def __init__(self, status, message):
+        """Class constructor."""
+        super().__init__(status, message)
+        self.status = status
+        self.message = message
+
+
+def default_name(element_type, parent_key):
+    """Default name of new element relative to type (as in posting)."""
+    if element_type == 2:
+        return 'Должность'
+
+    return 'Отдел' if parent_key == 1 else 'Подотдел'
+
+
+class StructureTree(object):
+    """
+    Organizational structure tree in memory.
+
+    Elements are keyed by identifiers, new elements by string references
+    given in creating operations.
+
+    Required parameters:
+    rows (List) - rows of organizational structure table, ordered by tree and
+    left key
+    """
+
+    def __init__(self, rows):
+        """Class constructor."""
+        self.elements = {}
+        self.original = {}
+        self.children = {}
+        self.roots = []
+        self.created = []
+        self.deleted = []
+
+        for row in rows:
+            element = dict(row)
+            self.elements[element['id']] = element
+            self.original[element['id']] = dict(element)
+            self.children.setdefault(element['id'], [])
+            if element['parent_id'] is None:
+                self.roots.append(element['id'])
+            else:
+                # Parent can follow child, if keys are damaged
+                self.children.setdefault(
+                    element['parent_id'], []
+                ).append(element['id'])
+        self.original_children = {
+            key: list(children) for key, children in self.children.items()
+        }
+
+    # --------------------------------------------------------------------------
+    # Checks
+
+    def get(self, key):
+        """Get element by identifier or reference."""
+        element = self.elements.get(key)
+        if element is None:
+            raise TreeError(404, _(
+                "Element with id=%(id)s doesn't exist in structure",
+                id=key
+            ))
+
+        return element
+
+    def get_not_root(self, key):
+        """Get element by identifier or reference (root is prohibited)."""
+        element = self.get(key)
+        if element['parent_id'] is None:
+            raise TreeError(400, _(
+                "Root element «%(name)s» cannot be changed",
+                name=element['name']
+            ))
+
+        return element
+
+    def is_inside(self, key, ancestor_key):
+        """Check element is inside of subtree of ancestor (inclusive)."""
+        while key is not None:
+            if key == ancestor_key:
+                return True
+            key = self.elements[key]['parent_id']
+
+        return False
+
+    def check_insertable(self, parent):
+        """Check elements can be inserted into parent."""
+        if parent['type'] == 2 or not parent['insertable']:
+            raise TreeError(403, _(
+                "Element cannot be inserted into parent «%(name)s»"
+                " with id=%(id)s: parent is the position of the"
+                " department or insertion into the parent is prohibited",
+                name=parent['name'],
+                id=parent['id']
+            ))
+
+    @staticmethod
+    def check_name(name):
+        """Check name of element (should be a string in range 1-100)."""
+        if not isinstance(name, str) or not 0 < len(name.strip()) <= 100:
+            raise TreeError(400, _(
+                "Name «%(name)s» of element is not a string in range 1-100",
+                name=name
+            ))
+
+        return name.strip()
+
+    # --------------------------------------------------------------------------
+    # Operations
+
+    def detach(self, key):
+        """Remove element from children of parent, return former position."""
+        siblings = self.children[self.elements[key]['parent_id']]
+        position = siblings.index(key)
+        del siblings[position]
+
+        return position
+
+    def attach(self, key, parent_key, position=None):
+        """Insert element to children of parent (to the end by default)."""
+        siblings = self.children[parent_key]
+        if position is None:
+            siblings.append(key)
+        else:
+            siblings.insert(position, key)
+        self.elements[key]['parent_id'] = parent_key
+
+    def create(self, ref, parent, name=None, type=1, insertable=True,
+               updatable=True, movable=True, deletable=True):
+        """
+        Create element as the last child of parent.
+
+        Required parameters:
+        ref (String) - reference of new element in next operations
+        parent (Integer, String) - identifier or reference of parent
+        """
+        if not isinstance(ref, str) or ref in self.elements:
+            raise TreeError(400, _(
+                "Reference «%(ref)s» of new element is not a string or is"
+                " used already",
+                ref=ref
+            ))
+        if type not in (1, 2):
+            raise TreeError(400, _(
+                "The type «%(value)s» of element is does not exist",
+                value=type
+            ))
+        parent = self.get(parent)
+        self.check_insertable(parent)
+        name = default_name(type, parent['id']) if name is None else \
+            self.check_name(name)
+
+        self.elements[ref] = {
+            'id': ref, 'name': name, 'type': type,
+            'insertable': int(insertable), 'updatable': int(updatable),
+            'movable': int(movable), 'deletable': int(deletable),
+            'parent_id': None, 'tree_id': None, 'lft': None, 'rgt': None,
+            'level': None
+        }
+        self.children[ref] = []
+        self.attach(ref, parent['id'])
+        self.created.append(ref)
+
+    def move(self, key, parent=None, before=None, after=None):
+        """
+        Move element inside parent (as the first child, as moving of mptt
+        library), before or after other element.
+
+        Required parameters:
+        key (Integer, String) - identifier or reference of element
+
+        Supported parameters (exactly one):
+        parent (Integer, String) - identifier or reference of new parent
+        before (Integer, String) - identifier or reference of next sibling
+        after (Integer, String) - identifier or reference of previous sibling
+        """
+        element = self.get_not_root(key)
+        if not element['movable']:
+            raise TreeError(403, _(
+                "Element «%(name)s» with id=%(id)s is prohibited"
+                " from moving to another elements",
+                name=element['name'],
+                id=element['id']
+            ))
+        targets = [x for x in (parent, before, after) if x is not None]
+        if len(targets) != 1:
+            raise TreeError(400, _(
+                "Moving needs exactly one from parameters: parent, after,"
+                " before"
+            ))
+
+        target = self.get(targets[0])
+        if self.is_inside(target['id'], element['id']):
+            raise TreeError(400, _(
+                "Element with id=%(id)s cannot be moved inside or beside"
+                " itself or own child element with id=%(target_id)s",
+                id=element['id'],
+                target_id=target['id']
+            ))
+
+        if parent is not None:
+            self.check_insertable(target)
+            if element['parent_id'] != target['id']:
+                self.detach(element['id'])
+                self.attach(element['id'], target['id'], 0)
+        else:
+            if target['parent_id'] is None:
+                raise TreeError(400, _(
+                    "Element cannot be moved beside root element"
+                ))
+            self.check_insertable(self.elements[target['parent_id']])
+            self.detach(element['id'])
+            siblings = self.children[target['parent_id']]
+            position = siblings.index(target['id'])
+            self.attach(
+                element['id'],
+                target['parent_id'],
+                position if before is not None else position + 1
+            )
+
+    def rename(self, key, name):
+        """
+        Rename element.
+
+        Required parameters:
+        key (Integer, String) - identifier or reference of element
+        name (String) - new name of element (in range 1-100)
+        """
+        element = self.get_not_root(key)
+        if not element['updatable']:
+            raise TreeError(403, _(
+                "Element «%(name)s» with id=%(id)s is prohibited from"
+                " updating",
+                name=element['name'],
+                id=element['id']
+            ))
+        element['name'] = self.check_name(name)
+
+    def delete(self, key, recursive=False):
+        """
+        Delete element.
+
+        Children of element take its place in parent, if deleting is not
+        recursive. Recursive deleting removes subtree of element, except not
+        deletable children, which are moved to parent.
+
+        Returns keys of children moved to parent.
+
+        Required parameters:
+        key (Integer, String) - identifier or reference of element
+
+        Supported parameters:
+        recursive (Boolean) - delete with child elements (False by default)
+        """
+        element = self.get_not_root(key)
+        if not element['deletable']:
+            raise TreeError(403, _(
+                "Element «%(name)s» with id=%(id)s is prohibited from"
+                " deleting",
+                name=element['name'],
+                id=element['id']
+            ))
+
+        parent_key = element['parent_id']
+        position = self.detach(element['id'])
+        children = self.children[element['id']]
+        if recursive:
+            kept = [
+                child for child in children
+                if not self.elements[child]['deletable']
+            ]
+            children[:] = [child for child in children if child not in kept]
+            removed = self.subtree(element['id'])
+        else:
+            kept = list(children)
+            children[:] = []
+            removed = [element['id']]
+
+        for offset, child in enumerate(kept):
+            self.attach(child, parent_key, position + offset)
+
+        for removed_key in removed:
+            del self.elements[removed_key]
+            del self.children[removed_key]
+            if removed_key in self.original:
+                self.deleted.append(removed_key)
+            else:
+                self.created.remove(removed_key)
+
+        return kept
+
+    def subtree(self, key):
+        """Keys of subtree of element (element first)."""
+        keys = []
+        stack = [key]
+        while stack:
+            key = stack.pop()
+            keys.append(key)
+            stack.extend(reversed(self.children[key]))
+
+        return keys
+
+    # --------------------------------------------------------------------------
+    # Renumbering
+
+    def renumber(self):
+        """Set nested sets keys of all elements by one depth-first pass."""
+        for root_key in self.roots:
+            root = self.elements[root_key]
+            tree_id = root['tree_id']
+            counter = 1
+            # Stack of elements and indexes of next child to visit
+            stack = [(root_key, 0)]
+            root['lft'] = counter
+            root['level'] = self.original[root_key]['level']
+            while stack:
+                key, index = stack[-1]
+                children = self.children[key]
+                counter += 1
+                if index < len(children):
+                    stack[-1] = (key, index + 1)
+                    child = self.elements[children[index]]
+                    child['tree_id'] = tree_id
+                    child['lft'] = counter
+                    child['level'] = self.elements[key]['level'] + 1
+                    stack.append((children[index], 0))
+                else:
+                    self.elements[key]['rgt'] = counter
+                    stack.pop()
+
+    def reorder(self):
+        """
+        Set order keys of changed children lists and levels of moved
+        subtrees (closure table mode, nested sets keys are not renumbered).
+        """
+        for key, children in self.children.items():
+            if children == self.original_children.get(key):
+                continue
+            keys = [self.elements[child]['lft'] for child in children]
+            # Kept keys should be ascending order keys of not root elements
+            if None not in keys and all(
+                left < right
+                for left, right in zip([FIRST_ORDER_KEY - 1] + keys, keys)
+            ):
+                continue
+            for number, child in enumerate(children):
+                element = self.elements[child]
+                element['lft'] = renumbered_key(number)
+                if element['rgt'] is None:
+                    element['rgt'] = element['lft'] + 1
+
+        moved = set()
+        for key, element in self.elements.items():
+            if key not in self.original or \
+                    element['parent_id'] != self.original[key]['parent_id']:
+                moved.update(self.subtree(key))
+        for key in moved:
+            # Levels are set from the top moved elements down
+            if self.elements[key]['parent_id'] in moved:
+                continue
+            for child in self.subtree(key):
+                element = self.elements[child]
+                parent = self.elements[element['parent_id']]
+                element['level'] = parent['level'] + 1
+                element['tree_id'] = parent['tree_id']
+
+    def changed(self):
+        """Existing elements with changed columns (after renumbering)."""
+        return [
+            element for key, element in self.elements.items()
+            if key in self.original and element != self.original[key]
+        ]
+
+
+def check_tree(rows, limit=100):
+    """
+    Check nested sets invariants by one pass over rows.
+
+    Checks, that every tree starts from root with left key 1, keys of tree
+    have no gaps and overlaps, every element is enclosed by interval of
+    parent and level of element is equal to depth of enclosing intervals.
+
+    Returns dictionary with count of checked rows, count of problems and
+    list of first problems.
+
+    Required parameters:
+    rows (List) - rows with id, parent_id, tree_id, lft, rgt and level
+    columns, ordered by tree and left key
+
+    Supported parameters:
+    limit (Integer) - maximal length of problems list (100 by default)
+    """
+    report = {'checked': 0, 'problemsCount': 0, 'problems': []}
+
+    def problem(row, kind, expected, value):
+        report['problemsCount'] += 1
+        if len(report['problems']) < limit:
+            report['problems'].append({
+                'id': row['id'], 'problem': kind,
+                'expected': expected, 'value': value
+            })
+
+    def close(row, key):
+        # Right key of closed interval should follow last key of tree
+        if row['rgt'] != key + 1:
+            problem(
+                row, 'gap' if row['rgt'] > key + 1 else 'overlap',
+                key + 1, row['rgt']
+            )
+
+        return max(key, row['rgt'])
+
+    tree_id = None
+    stack = []
+    key = 0
+    base_level = 0
+    for row in rows:
+        report['checked'] += 1
+        if not report['checked'] == 1 and row['tree_id'] == tree_id:
+            # Close intervals ended before element
+            while stack and stack[-1]['rgt'] < row['lft']:
+                key = close(stack.pop(), key)
+        else:
+            while stack:
+                key = close(stack.pop(), key)
+            tree_id = row['tree_id']
+            base_level = row['level']
+            # Parent of root is checked with other elements, keys of tree are
+            # checked from left key of root (reported once)
+            if row['lft'] != 1:
+                problem(row, 'root', 1, row['lft'])
+            key = row['lft'] - 1
+
+        if row['lft'] >= row['rgt']:
+            problem(row, 'bounds', '> %s' % row['lft'], row['rgt'])
+        if row['lft'] != key + 1:
+            problem(
+                row, 'gap' if row['lft'] > key + 1 else 'overlap',
+                key + 1, row['lft']
+            )
+        key = max(key, row['lft'])
+
+        parent = stack[-1] if stack else None
+        if parent is not None and row['rgt'] >= parent['rgt']:
+            problem(row, 'enclosing', '< %s' % parent['rgt'], row['rgt'])
+        if row['parent_id'] != (parent['id'] if parent else None):
+            problem(
+                row, 'parent', parent['id'] if parent else None,
+                row['parent_id']
+            )
+        if row['level'] != base_level + len(stack):
+            problem(row, 'level', base_level + len(stack), row['level'])
+
+        stack.append(row)
+
+    while stack:
+        key = close(stack.pop(), key)
+
+    return report
+
+
+def key_rows():
+    """Rows of nested sets columns ordered by tree and left key."""
+    table = OrganizationalStructure.__table__
+
+    return db.session.execute(
+        select(
+            table.c.id, table.c.parent_id, table.c.tree_id,
+            table.c.lft, table.c.rgt, table.c.level
+        ).order_by(table.c.tree_id, table.c.lft, table.c.id)
+    ).mappings()
+
+
+def rebuild_tree(tree):
+    """
+    Rebuild nested sets keys of tree from parent identifiers and write
+    changed rows to database (without commit).
+
+    Order of children is kept by former left keys. Raises TreeError, if
+    some elements are not reachable from roots (by cycles of parents or
+    missing parents) or roots share tree identifier. Closure table index
+    (if enabled) is filled again. Returns result of tree saving.
+
+    Required parameters:
+    tree (StructureTree) - structure tree in memory
+    """
+    reachable = sum(len(tree.subtree(root)) for root in tree.roots)
+    tree_ids = {tree.elements[root]['tree_id'] for root in tree.roots}
+    if reachable != len(tree.elements) or len(tree_ids) != len(tree.roots):
+        raise TreeError(400, _(
+            "Tree cannot be rebuilt: %(count)s elements are not reachable"
+            " from roots or roots have the same tree identifier",
+            count=len(tree.elements) - reachable
+        ))
+
+    result = save_tree(tree, rebuild=True)
+    if closure_enabled():
+        result['indexed'] = rebuild_closure(tree)
+        result['touched'] += result['indexed']
+
+    return result
+
+
+def synthetic_tree(count, seed=0):
+    """
+    Form random structure tree in memory (for benchmarks).
+
+    Elements have consecutive identifiers from 1 (root), parent of every
+    element is one of previous elements.
+
+    Required parameters:
+    count (Integer) - count of elements
+
+    Supported parameters:
+    seed (Integer) - seed of random generator (0 by default)
+    """
+    generator = random.Random(seed)
+    rows = (
+        {
+            'id': id,
+            'parent_id': generator.randrange(1, id) if id > 1 else None,
+            'tree_id': 1, 'lft': 0, 'rgt': 0, 'level': 1
+        }
+        for id in range(1, count + 1)
+    )
+
+    return StructureTree(rows)
+
+
+def apply_operation(tree, operation):
+    """
+    Check parameters of operation and apply it to tree.
+
+    Required parameters:
+    tree (StructureTree) - structure tree in memory
+    operation (Dictionary) - «operation» name with parameters
+    """
+    if not isinstance(operation, dict) or \
+            operation.get('operation') not in OPERATIONS:
+        raise TreeError(400, _(
+            "Operation should be an object with «operation» key, one of:"
+            " %(operations)s",
+            operations=", ".join(OPERATIONS)
+        ))
+
+    parameters = dict(operation)
+    required, supported = OPERATIONS[parameters.pop('operation')]
+    missing = [name for name in required if name not in parameters]
+    unknown = [
+        name for name in parameters
+        if name not in required and name not in supported
+    ]
+    if missing or unknown:
+        raise TreeError(400, _(
+            "Parameters %(missing)s are missing or parameters %(unknown)s"
+            " are not supported by operation «%(operation)s»",
+            missing=", ".join(missing) or "-",
+            unknown=", ".join(unknown) or "-",
+            operation=operation['operation']
+        ))
+
+    for name, value in parameters.items():
+        if name in BOOLEAN_PARAMETERS and not isinstance(value, bool) or \
+                name in KEY_PARAMETERS and (
+                    isinstance(value, bool) or
+                    not isinstance(value, (int, str))
+                ) or \
+                name == 'type' and (
+                    isinstance(value, bool) or not isinstance(value, int)
+                ):
+            raise TreeError(400, _(
+                "Value «%(value)s» of parameter «%(name)s» has wrong type",
+                value=value,
+                name=name
+            ))
+
+    if 'id' in parameters:
+        getattr(tree, operation['operation'])(
+            parameters.pop('id'), **parameters
+        )
+    else:
+        getattr(tree, operation['operation'])(**parameters)
+
+
+def load_tree(tree_id=None):
+    """
+    Load structure tree (rows are locked until end of transaction).
+
+    Supported parameters:
+    tree_id (Integer) - load only one tree of structure (all by default)
+    """
+    table = OrganizationalStructure.__table__
+    query = select(table)
+    if tree_id is not None:
+        query = query.where(table.c.tree_id == tree_id)
+    rows = db.session.execute(
+        query.order_by(
+            table.c.tree_id, table.c.lft, table.c.id
+        ).with_for_update()
+    ).mappings()
+
+    return StructureTree(rows)
+
+
+def save_tree(tree, rebuild=False):
+    """
+    Renumber tree (or set order keys, if closure table index is enabled)
+    and write changes to database (without commit).
+
+    New elements are inserted (parents before children), changed rows are
+    updated by one statement with many parameters sets, deleted elements are
+    removed with their users assignments (children before parents).
+
+    Returns dictionary of identifiers of created elements by references,
+    counts of inserted, updated, deleted elements, deleted assignments of
+    users, touched rows of closure table index (if enabled) and total count
+    of touched rows.
+
+    Supported parameters:
+    rebuild (Boolean) - renumber nested sets keys in closure table mode too
+    """
+    table = OrganizationalStructure.__table__
+    if rebuild or not closure_enabled():
+        tree.renumber()
+    else:
+        tree.reorder()
+
+    created = {}
+    for ref in sorted(tree.created, key=lambda x: tree.elements[x]['level']):
+        element = dict(tree.elements[ref])
+        del element['id']
+        element['parent_id'] = created.get(
+            element['parent_id'], element['parent_id']
+        )
+        created[ref] = db.session.execute(
+            table.insert().values(**element)
+        ).inserted_primary_key[0]
+
+    changed = tree.changed()
+    if changed:
+        columns = STATE_COLUMNS + KEY_COLUMNS
+        db.session.execute(
+            table.update().where(
+                table.c.id == bindparam('_id')
+            ).values(
+                {column: bindparam('_' + column) for column in columns}
+            ),
+            [
+                dict(
+                    {'_' + column: element[column] for column in columns},
+                    _id=element['id'],
+                    # Parent can be created element
+                    _parent_id=created.get(
+                        element['parent_id'], element['parent_id']
+                    )
+                )
+                for element in changed
+            ]
+        )
+
+    indexed = sync_tree(tree, created) if closure_enabled() else 0
+
+    unassigned = 0
+    if tree.deleted:
+        unassigned = db.session.execute(
+            user_structure.delete().where(
+                user_structure.c.structure_id.in_(tree.deleted)
+            )
+        ).rowcount
+        # Parent key is restricted, so deeper elements are deleted first
+        levels = {}
+        for key in tree.deleted:
+            levels.setdefault(tree.original[key]['level'], []).append(key)
+        for level in sorted(levels, reverse=True):
+            db.session.execute(
+                table.delete().where(table.c.id.in_(levels[level]))
+            )
+
+    return {
+        'created': created,
+        'inserted': len(created),
+        'updated': len(changed),
+        'deleted': len(tree.deleted),
+        'unassigned': unassigned,
+        'indexed': indexed,
+        'touched': len(created) + len(changed) + len(tree.deleted) +
+        unassigned + indexed
+    }
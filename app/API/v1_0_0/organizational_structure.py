@@ -1,16 +1,26 @@
 """Views of API version 1.0.0: Organizational structure."""
 
-from flask import Response, json, request, url_for
+from flask import request, url_for
 from flask_babel import _
 from collections import Counter
 
+import time
+
 from .blueprint import APIv1_0_0
 from app import db
 from app.models import OrganizationalStructure
 from app.schemas import OrganizationalStructureSchema
-from .utils import json_http_response, marshmallow_excluding_converter, \
+from .utils import json_http_response, json_response, \
+    marshmallow_excluding_converter, \
     marshmallow_only_fields_converter, sqlalchemy_filters_converter, \
-    sqlalchemy_orders_converter, pagination_of_list, variable_type_check
+    sqlalchemy_orders_converter, pagination_of_list, variable_type_check, \
+    pagination_cursor_converter, schema_instance, json_encode
+from .structure_tree import rendered_tree, subtree, ancestors, \
+    ancestors_paths, cached_headcount
+from .nested_sets import TreeError, apply_operation, load_tree, save_tree, \
+    check_tree, key_rows, rebuild_tree
+from .closure import closure_enabled, insert_element, move_element
+from .invalidation import publish
 
 
 @APIv1_0_0.route('/organization/structure', methods=['GET'])
@@ -53,44 +63,56 @@ def get_organizational_structure():
         except Exception as error:
             return error.args[0]
 
-        schema = OrganizationalStructureSchema(**dump_params)
+        schema = schema_instance(
+            OrganizationalStructureSchema, **dump_params
+        )
         # ----------------------------------------------------------------------
 
         # If request has filters, then we request individual instances
         # of elements from database without nesting,
         # else drilldown tree with nested elements
         if filters_list:
-            orders_list = sqlalchemy_orders_converter(
-                OrganizationalStructure, orders_list
-            )
+            try:
+                orders_list = sqlalchemy_orders_converter(
+                    OrganizationalStructure, orders_list
+                )
+                cursor = pagination_cursor_converter(
+                    OrganizationalStructure,
+                    orders_list,
+                    request.args.get('cursor')
+                )
+            except Exception as error:
+                return error.args[0]
             elements = OrganizationalStructure.query.filter(
                 *filters_list
-            ).order_by(*orders_list).all()
-            tree = schema.dump(elements)
+            ).order_by(*orders_list)
 
-            # Paginating results of dumping
-            # Probably would best is pagination in sqlalchemy query?
+            # Paginating query and dumping only requested page
             tree = pagination_of_list(
-                tree,
+                elements,
                 url_for(
                     '.get_organizational_structure',
                     _external=True
                 ),
-                query_params=request.args
+                query_params=request.args,
+                schema=schema,
+                cursor=cursor
             )
         else:
-            root_element = OrganizationalStructure.query.get(1)
-            tree = root_element.drilldown_tree(
-                json=True,
-                json_fields=schema.dump
+            # Drilldown tree of root element is rendered once per structure
+            # version and dumping variant
+            variant = (
+                tuple(sorted(dump_params['only']))
+                if 'only' in dump_params else None,
+                tuple(sorted(dump_params.get('exclude', [])))
+            )
+            return json_response(
+                rendered_tree(schema, variant, json_encode),
+                encoded=True
             )
         # ----------------------------------------------------------------------
 
-        response = Response(
-            response=json.dumps(tree),
-            status=200,
-            mimetype='application/json'
-        )
+        response = json_response(tree)
 
     except Exception:
 
@@ -102,12 +124,18 @@ def get_organizational_structure():
 @APIv1_0_0.route('/organization/structure/elements/<int:id>', methods=['GET'])
 # @token_required
 def get_organizational_structure_element(id):
-    """Get organizational structure element."""
+    """Get organizational structure element.
+
+    Supported parameters:
+    drilldown (Boolean) - get element with tree of nested elements
+    depth (Integer) - maximal depth of nested elements in drilldown tree
+    """
     try:
         # Get parameters from request
         exclusions_list = request.args.get('exclude')
         columns_list = request.args.get('columns')
         drilldown = request.args.get('drilldown', False)
+        depth = request.args.get('depth')
         # ----------------------------------------------------------------------
 
         # Forming dumping parameters
@@ -132,7 +160,9 @@ def get_organizational_structure_element(id):
             return error.args[0]
 
         # Make schema with dumping parameters
-        item_schema = OrganizationalStructureSchema(**dump_params)
+        item_schema = schema_instance(
+            OrganizationalStructureSchema, **dump_params
+        )
         # ----------------------------------------------------------------------
 
         # Query item from database, and if is not none make action
@@ -153,19 +183,262 @@ def get_organizational_structure_element(id):
         check = variable_type_check(drilldown, bool)
 
         if check.result and check.value:
-            item_json = item.drilldown_tree(
-                json=True,
-                json_fields=item_schema.dump
+            # Depth of drilldown tree (should be a non-negative number)
+            if depth is not None:
+                depth = variable_type_check(depth, int)
+                if not depth.result or depth.value < 0:
+                    return json_http_response(
+                        status=400,
+                        given_message=_(
+                            "Value «%(value)s» from parameter"
+                            " «&depth=%(value)s» is not non-negative"
+                            " «%(type)s»",
+                            value=depth.value,
+                            type=depth.type
+                        ),
+                        dbg=request.args.get('dbg', False)
+                    )
+                depth = depth.value
+            item_json = subtree(
+                item,
+                item_schema.dump,
+                depth=depth,
+                # Users are dumped with elements and their parents
+                users=not {'users', 'parent'}.isdisjoint(
+                    item_schema.dump_fields
+                )
             )
         else:
             item_json = item_schema.dump(item)
         # ----------------------------------------------------------------------
 
-        response = Response(
-            response=json.dumps(item_json),
-            status=200,
-            mimetype='application/json'
+        response = json_response(item_json)
+
+    except Exception:
+
+        response = json_http_response(dbg=request.args.get('dbg', False))
+
+    return response
+
+
+@APIv1_0_0.route(
+    '/organization/structure/elements/<int:id>/path', methods=['GET']
+)
+# @token_required
+def get_organizational_structure_element_path(id):
+    """Get path (ancestors from root) of organizational structure element."""
+    try:
+        # Get parameters from request
+        exclusions_list = request.args.get('exclude')
+        columns_list = request.args.get('columns')
+        # ----------------------------------------------------------------------
+
+        # Forming dumping parameters
+        dump_params = {'many': True}
+
+        # Check if values of getted parameters exist in database table
+        # and set dump settings
+        try:
+            if exclusions_list:
+                exclusions_list = marshmallow_excluding_converter(
+                    OrganizationalStructure, exclusions_list
+                )
+                if 'id' in exclusions_list:
+                    exclusions_list.remove('id')
+                dump_params['exclude'] = exclusions_list
+            if columns_list:
+                columns_list = marshmallow_only_fields_converter(
+                    OrganizationalStructure, columns_list
+                )
+                dump_params['only'] = ["id"] + columns_list
+        except Exception as error:
+            return error.args[0]
+
+        # Make schema with dumping parameters
+        schema = schema_instance(
+            OrganizationalStructureSchema, **dump_params
+        )
+        # ----------------------------------------------------------------------
+
+        # Query item from database, and if is not none make action
+        item = OrganizationalStructure.query.get(id)
+        if not item:
+
+            return json_http_response(
+                status=404,
+                given_message=_(
+                    "Element with id=%(id)s doesn't exist in database",
+                    id=id
+                ),
+                dbg=request.args.get('dbg', False)
+            )
+
+        # Ancestors are read by one query of nested sets keys
+        path = ancestors(
+            item,
+            # Users are dumped with elements and their parents
+            users=not {'users', 'parent'}.isdisjoint(schema.dump_fields)
+        )
+        # ----------------------------------------------------------------------
+
+        response = json_response(schema.dump(path))
+
+    except Exception:
+
+        response = json_http_response(dbg=request.args.get('dbg', False))
+
+    return response
+
+
+@APIv1_0_0.route('/organization/structure/elements/paths', methods=['GET'])
+# @token_required
+def get_organizational_structure_elements_paths():
+    """Get paths (ancestors from root) of organizational structure elements.
+
+    Required parameters:
+    ids (String) - comma separated identifiers of elements
+
+    Supported parameters:
+    columns (String) - dumped columns of ancestors
+    exclude (String) - excluded columns of ancestors
+    """
+    try:
+        # Get parameters from request
+        ids_list = request.args.get('ids', '')
+        exclusions_list = request.args.get('exclude')
+        columns_list = request.args.get('columns')
+        # ----------------------------------------------------------------------
+
+        # Check identifiers of elements (should be comma separated numbers)
+        ids = []
+        for value in (x.strip() for x in ids_list.split(",") if x.strip()):
+            check = variable_type_check(value, int)
+            if not check.result:
+                return json_http_response(
+                    status=400,
+                    given_message=_(
+                        "Value «%(value)s» from parameter «&ids=%(ids)s»"
+                        " is not type of «%(type)s»",
+                        value=check.value,
+                        ids=ids_list,
+                        type=check.type
+                    ),
+                    dbg=request.args.get('dbg', False)
+                )
+            if check.value not in ids:
+                ids.append(check.value)
+        if not ids:
+            return json_http_response(
+                status=400,
+                given_message=_(
+                    "Identifiers of elements are not sended in parameter"
+                    " «&ids=»"
+                ),
+                dbg=request.args.get('dbg', False)
+            )
+        # ----------------------------------------------------------------------
+
+        # Forming dumping parameters
+        dump_params = {'many': True}
+
+        # Check if values of getted parameters exist in database table
+        # and set dump settings
+        try:
+            if exclusions_list:
+                exclusions_list = marshmallow_excluding_converter(
+                    OrganizationalStructure, exclusions_list
+                )
+                if 'id' in exclusions_list:
+                    exclusions_list.remove('id')
+                dump_params['exclude'] = exclusions_list
+            if columns_list:
+                columns_list = marshmallow_only_fields_converter(
+                    OrganizationalStructure, columns_list
+                )
+                dump_params['only'] = ["id"] + columns_list
+        except Exception as error:
+            return error.args[0]
+
+        # Make schema with dumping parameters
+        schema = schema_instance(
+            OrganizationalStructureSchema, **dump_params
+        )
+        # ----------------------------------------------------------------------
+
+        # Ancestors of all elements are read by one query of nested sets keys
+        paths = ancestors_paths(
+            ids,
+            # Users are dumped with elements and their parents
+            users=not {'users', 'parent'}.isdisjoint(schema.dump_fields)
         )
+        missing = [id for id in ids if id not in paths]
+        if missing:
+
+            return json_http_response(
+                status=404,
+                given_message=_(
+                    "Elements with id=%(ids)s don't exist in database",
+                    ids=", ".join(str(id) for id in missing)
+                ),
+                dbg=request.args.get('dbg', False)
+            )
+
+        paths_json = [
+            {"id": id, "path": schema.dump(paths[id])} for id in ids
+        ]
+        # ----------------------------------------------------------------------
+
+        response = json_response(paths_json)
+
+    except Exception:
+
+        response = json_http_response(dbg=request.args.get('dbg', False))
+
+    return response
+
+
+@APIv1_0_0.route('/organization/structure/headcount', methods=['GET'])
+# @token_required
+def get_organizational_structure_headcount():
+    """Get users counts of organizational structure elements.
+
+    Every element has count of directly assigned users and total count of
+    distinct users of element with all descendants. Counts are cached until
+    change of structure or users assignments.
+
+    Supported parameters:
+    root (Integer) - identifier of element, whose subtree is counted (all
+    elements by default)
+    """
+    try:
+        # Check root element (should be a number and exist in database)
+        root = request.args.get('root')
+        if root is not None:
+            root_id = variable_type_check(root, int)
+            if not root_id.result:
+                return json_http_response(
+                    status=400,
+                    given_message=_(
+                        "Value «%(value)s» from parameter «&root=%(value)s»"
+                        " is not type of «%(type)s»",
+                        value=root_id.value,
+                        type=root_id.type
+                    ),
+                    dbg=request.args.get('dbg', False)
+                )
+            root = OrganizationalStructure.query.get(root_id.value)
+            if not root:
+                return json_http_response(
+                    status=404,
+                    given_message=_(
+                        "Element with id=%(id)s doesn't exist in database",
+                        id=root_id.value
+                    ),
+                    dbg=request.args.get('dbg', False)
+                )
+        # ----------------------------------------------------------------------
+
+        response = json_response(cached_headcount(root))
 
     except Exception:
 
@@ -383,8 +656,7 @@ def post_organizational_structure_element():
                 dbg=request.args.get('dbg', False)
             )
         else:
-            node = OrganizationalStructure(
-                parent_id=parent_id.value,
+            columns = dict(
                 type=element_type.value,
                 name=name,
                 insertable=insertable,
@@ -392,16 +664,29 @@ def post_organizational_structure_element():
                 movable=movable,
                 updatable=updatable,
             )
-            db.session.add(node)
-            db.session.flush()
+            # With closure table index element is inserted without
+            # shifting of nested sets keys
+            if closure_enabled():
+                node = OrganizationalStructure.query.get(
+                    insert_element(parent, **columns)
+                )
+            else:
+                node = OrganizationalStructure(
+                    parent_id=parent_id.value,
+                    **columns
+                )
+                db.session.add(node)
+                db.session.flush()
 
             # Before send response, dump newly added element to json and add
             # his data to response
-            node_schema = OrganizationalStructureSchema(
+            node_schema = schema_instance(
+                OrganizationalStructureSchema,
                 only=["id", "name", "links", "type"]
             )
             node_dump = node_schema.dump(node)
             db.session.commit()
+            publish('structure')
 
             output_json = {
                 "message": _(
@@ -416,11 +701,7 @@ def post_organizational_structure_element():
             }
             # ------------------------------------------------------------------
 
-            response = Response(
-                response=json.dumps(output_json),
-                status=200,
-                mimetype='application/json'
-            )
+            response = json_response(output_json)
 
     except Exception:
 
@@ -439,10 +720,14 @@ def delete_organizational_structure_element(id):
 
     Delete element with recursion function (with all child elements)
     by boolean parameter. If parameter is False or not set, move all
-    child elements to parent of deleting element, before delete element
-    to prevent child deletion. 'Save' cascade deletion (to all users with
-    position from this tree set NULL as 'company_position' foreign key). Checks
-    for deletion element existense and is he the root element.
+    child elements to parent of deleting element (to place of deleting
+    element), to prevent child deletion. Not deletable children are moved to
+    parent in recursive deletion too. Users assignments to deleted elements
+    are removed. Checks for deletion element existense and is he the root
+    element.
+
+    New nested sets keys of elements are computed in memory and changed rows
+    are written in one transaction, count of touched rows is returned.
     """
     try:
 
@@ -452,18 +737,6 @@ def delete_organizational_structure_element(id):
             OrganizationalStructure.id == id
         ).first()
 
-        if not node_to_delete.deletable:
-            return json_http_response(
-                status=403,
-                given_message=_(
-                    "Element «%(name)s» with id=%(id)s is prohibited from"
-                    " deleting",
-                    name=node_to_delete.name,
-                    id=node_to_delete.id
-                ),
-                dbg=request.args.get('dbg', False)
-            )
-
         if node_to_delete is None:
             return json_http_response(
                 status=404,
@@ -474,6 +747,17 @@ def delete_organizational_structure_element(id):
                 ),
                 dbg=request.args.get('dbg', False)
             )
+        elif not node_to_delete.deletable:
+            return json_http_response(
+                status=403,
+                given_message=_(
+                    "Element «%(name)s» with id=%(id)s is prohibited from"
+                    " deleting",
+                    name=node_to_delete.name,
+                    id=node_to_delete.id
+                ),
+                dbg=request.args.get('dbg', False)
+            )
         elif node_to_delete.id == 1 or node_to_delete.left == 1:
             return json_http_response(
                 status=400,
@@ -500,63 +784,234 @@ def delete_organizational_structure_element(id):
                 ),
                 dbg=request.args.get('dbg', False)
             )
-        # If recursive is True, delete element with his child nodes, else move
-        # child nodes to parent of deleted element
-        elif recursive.value:
-            if len(node_to_delete.children):
-                given_message = _(
-                    "Element «%(name)s» successfully deleted from"
-                    " database with all children elements",
-                    name=node_to_delete.name
-                )
-                for child in node_to_delete.children:
-                    if not child.deletable:
-                        child.move_inside(node_to_delete.parent_id)
-                        db.session.commit()
-                        given_message = _(
-                            "Element «%(name)s» successfully deleted from"
-                            " database with all children elements."
-                            " Non deletable childs moved to top level.",
-                            name=node_to_delete.name
-                        )
-            else:
-                given_message = _(
-                    "Element «%(name)s» successfully deleted from"
-                    " database",
-                    name=node_to_delete.name
-                )
-            db.session.delete(node_to_delete)
+        # ----------------------------------------------------------------------
+
+        # Delete element from tree of element in memory, if recursive is True
+        # with his child nodes, else move child nodes to parent of deleted
+        # element
+        name = node_to_delete.name
+        tree = load_tree(node_to_delete.tree_id)
+        has_children = bool(tree.children[id])
+        try:
+            kept = tree.delete(id, recursive=bool(recursive.value))
+        except TreeError as error:
+            db.session.rollback()
+            return json_http_response(
+                status=error.status,
+                given_message=error.message,
+                dbg=request.args.get('dbg', False)
+            )
+
+        if not has_children:
+            given_message = _(
+                "Element «%(name)s» successfully deleted from"
+                " database",
+                name=name
+            )
+        elif not recursive.value:
+            given_message = _(
+                "Element «%(name)s» successfully deleted from"
+                " database. All children elements moved to top level",
+                name=name
+            )
+        elif kept:
+            given_message = _(
+                "Element «%(name)s» successfully deleted from"
+                " database with all children elements."
+                " Non deletable childs moved to top level.",
+                name=name
+            )
         else:
-            if len(node_to_delete.children):
-                # Moving child to parent of root element
-                # to prevent from deletion
-                for child in node_to_delete.children:
-                    child.move_inside(node_to_delete.parent_id)
-                db.session.commit()
-
-                # And then delete root element
-                db.session.delete(node_to_delete)
-                given_message = _(
-                    "Element «%(name)s» successfully deleted from"
-                    " database. All children elements moved to top level",
-                    name=node_to_delete.name
-                )
-            else:
-                db.session.delete(node_to_delete)
-                given_message = _(
-                    "Element «%(name)s» successfully deleted from"
-                    " database",
-                    name=node_to_delete.name
+            given_message = _(
+                "Element «%(name)s» successfully deleted from"
+                " database with all children elements",
+                name=name
+            )
+        # ----------------------------------------------------------------------
+
+        # Write renumbered tree by one transaction
+        result = save_tree(tree)
+        db.session.commit()
+        publish('structure')
+
+        output_json = {
+            "message": given_message,
+            "rowsTouched": result['touched'],
+            "responseType": _("Success"),
+            "status": 200
+        }
+
+        response = json_response(output_json)
+
+    except Exception:
+
+        response = json_http_response(dbg=request.args.get('dbg', False))
+
+    return response
+
+
+@APIv1_0_0.route('/organization/structure/batch', methods=['POST'])
+# @token_required
+def post_organizational_structure_batch():
+    """Apply batch of operations to organizational structure.
+
+    Operations are sended in JSON body as list «operations» of objects with
+    «operation» name and parameters of operation:
+    create - ref, parent (required), name, type, insertable, updatable,
+    movable, deletable
+    move - id (required) and one of parent, before, after
+    rename - id, name (required)
+    delete - id (required), recursive
+    Identifiers of existing elements are numbers, references of elements
+    created in batch are strings (ref parameter of create operation).
+    Operations are checked and applied in order to structure tree in memory,
+    and result is written in one transaction with one renumbering of nested
+    sets keys. If one of operations is failed, nothing is changed.
+    """
+    try:
+        # Get operations from request body
+        body = request.get_json(silent=True)
+        operations = body.get('operations') if isinstance(
+            body, dict
+        ) else None
+        if not isinstance(operations, list) or not operations:
+            return json_http_response(
+                status=400,
+                given_message=_(
+                    "Request body should be JSON object with not empty list"
+                    " of operations «operations»"
+                ),
+                dbg=request.args.get('dbg', False)
+            )
+        # ----------------------------------------------------------------------
+
+        # Check and apply operations to tree in memory
+        tree = load_tree()
+        for number, operation in enumerate(operations, 1):
+            try:
+                apply_operation(tree, operation)
+            except TreeError as error:
+                db.session.rollback()
+                return json_http_response(
+                    status=error.status,
+                    given_message=_(
+                        "Operation №%(number)s is failed: %(message)s",
+                        number=number,
+                        message=error.message
+                    ),
+                    dbg=request.args.get('dbg', False)
                 )
         # ----------------------------------------------------------------------
 
+        # Write renumbered tree by one transaction
+        result = save_tree(tree)
         db.session.commit()
+        publish('structure')
+
+        output_json = {
+            "message": _(
+                "Successfully applied %(count)s operations to organizational"
+                " structure",
+                count=len(operations)
+            ),
+            "created": result['created'],
+            "inserted": result['inserted'],
+            "updated": result['updated'],
+            "deleted": result['deleted'],
+            "rowsTouched": result['touched'],
+            "responseType": _("Success"),
+            "status": 200
+        }
+        # ----------------------------------------------------------------------
+
+        response = json_response(output_json)
+
+    except Exception:
+
+        response = json_http_response(dbg=request.args.get('dbg', False))
+
+    return response
+
+
+@APIv1_0_0.route('/organization/structure/integrity', methods=['GET'])
+# @token_required
+def get_organizational_structure_integrity():
+    """Check nested sets keys of organizational structure.
+
+    If closure table index is enabled, nested sets keys are regenerated on
+    demand (by POST), so problems are expected between rebuildings
+    (closureIndex is true in report).
+
+    Supported parameters:
+    limit (Integer) - maximal count of listed problems (100 by default)
+    """
+    try:
+        # Check limit parameter (should be a positive number)
+        limit = variable_type_check(request.args.get('limit', 100), int)
+        if not limit.result or limit.value <= 0:
+            return json_http_response(
+                status=400,
+                given_message=_(
+                    "Value «%(value)s» from parameter «&limit=%(value)s»"
+                    " is not positive «%(type)s»",
+                    value=limit.value,
+                    type=limit.type
+                ),
+                dbg=request.args.get('dbg', False)
+            )
+        # ----------------------------------------------------------------------
+
+        started = time.perf_counter()
+        report = check_tree(key_rows(), limit=limit.value)
+        report['closureIndex'] = bool(closure_enabled())
+        report['seconds'] = round(time.perf_counter() - started, 6)
+
+        response = json_response(report)
+
+    except Exception:
+
+        response = json_http_response(dbg=request.args.get('dbg', False))
+
+    return response
+
+
+@APIv1_0_0.route('/organization/structure/integrity', methods=['POST'])
+# @token_required
+def post_organizational_structure_integrity():
+    """Rebuild nested sets keys of organizational structure from parents.
+
+    Order of children is kept by former left keys. Changed rows are written
+    in one transaction.
+    """
+    try:
+        started = time.perf_counter()
+        tree = load_tree()
+        try:
+            result = rebuild_tree(tree)
+        except TreeError as error:
+            db.session.rollback()
+            return json_http_response(
+                status=error.status,
+                given_message=error.message,
+                dbg=request.args.get('dbg', False)
+            )
+        db.session.commit()
+        if result['updated']:
+            publish('structure')
+
+        output_json = {
+            "message": _(
+                "Nested sets keys of %(count)s elements are rebuilt",
+                count=len(tree.elements)
+            ),
+            "rowsTouched": result['touched'],
+            "seconds": round(time.perf_counter() - started, 6),
+            "responseType": _("Success"),
+            "status": 200
+        }
+
+        response = json_response(output_json)
 
-        return json_http_response(
-            status=200,
-            given_message=given_message,
-            dbg=request.args.get('dbg', False)
-        )
     except Exception:
 
         response = json_http_response(dbg=request.args.get('dbg', False))
@@ -627,13 +1082,23 @@ def put_organizational_structure_element(id):
             elif move_type == 'inside' and (
                 node_to_update.parent_id != id.value
             ):
-                node_to_update.move_inside(id.value)
+                if closure_enabled():
+                    moved.append(
+                        move_element(node_to_update, target, move_type)
+                    )
+                else:
+                    node_to_update.move_inside(id.value)
             # Else if move type is after or before and parent of target
-            # is insertable, move element
+            # is insertable, move element (with closure table index without
+            # shifting of nested sets keys)
             elif target.parent.insertable:
-                if move_type == 'after':
+                if closure_enabled():
+                    moved.append(
+                        move_element(node_to_update, target, move_type)
+                    )
+                elif move_type == 'after':
                     node_to_update.move_after(id.value)
-                if move_type == 'before':
+                elif move_type == 'before':
                     node_to_update.move_before(id.value)
             else:
                 raise Exception(json_http_response(
@@ -882,7 +1347,9 @@ def put_organizational_structure_element(id):
                 )
             # ------------------------------------------------------------------
         # ----------------------------------------------------------------------
-        # Try move element with inner function
+        # Try move element with inner function (touched rows of moving with
+        # closure table index are collected)
+        moved = []
         try:
             if parent_id:
                 elements_moving(parent_id, 'inside')
@@ -907,11 +1374,13 @@ def put_organizational_structure_element(id):
             return error.args[0]
         # ----------------------------------------------------------------------
 
-        # If session has changes then commit it form output message
-        if db.session.dirty:
+        # If session has changes (or element is moved with closure table
+        # index) then commit it form output message
+        if db.session.dirty or moved:
             db.session.commit()
+            publish('structure')
 
-            node_schema = OrganizationalStructureSchema()
+            node_schema = schema_instance(OrganizationalStructureSchema)
             node_dump = node_schema.dump(node_to_update)
 
             output_json = {
@@ -926,7 +1395,7 @@ def put_organizational_structure_element(id):
         # Else just form output message
         else:
 
-            node_schema = OrganizationalStructureSchema()
+            node_schema = schema_instance(OrganizationalStructureSchema)
             node_dump = node_schema.dump(node_to_update)
 
             output_json = {
@@ -943,11 +1412,7 @@ def put_organizational_structure_element(id):
             }
         # ----------------------------------------------------------------------
 
-        response = Response(
-            response=json.dumps(output_json),
-            status=200,
-            mimetype='application/json'
-        )
+        response = json_response(output_json)
     except Exception:
 
         response = json_http_response(dbg=request.args.get('dbg', False))
@@ -0,0 +1,198 @@
+"""
+Outbox of mails.
+
+Request handlers don't send mails to mail server, they add mails to outbox
+table (in the same transaction with changes of data) and background worker
+(«flask mail worker» command) sends them. Failed sending is retried with
+exponential backoff (MAIL_OUTBOX_BACKOFF seconds after first failure, twice
+longer after every next) up to MAIL_OUTBOX_MAX_ATTEMPTS attempts, then mail
+is marked as failed. So slow or unavailable mail server doesn't delay
+responses of API.
+"""
+
+from flask import current_app as app
+from flask_mail import Message
+from sqlalchemy import func
+
+from app import db
+from app.models import MailOutbox
+from .mail_pool import smtp_pool
+from datetime import datetime, timedelta
+
+import time
+
+# Statuses of mails in outbox
+STATUSES = ('pending', 'sent', 'failed')
+
+
+def enqueue(kind, subject, html, recipients):
+    """
+    Add mails to outbox (without commit), one mail per recipient.
+
+    Returns list of added mails.
+
+    Required parameters:
+    kind (String) - kind of mail (for statistics and debugging)
+    subject (String) - subject of mail
+    html (String) - rendered html of mail
+    recipients (List) - addresses of recipients
+    """
+    now = datetime.now()
+    mails = [
+        MailOutbox(
+            kind=kind,
+            recipient=recipient,
+            subject=subject,
+            html=html,
+            status='pending',
+            attempts=0,
+            next_attempt_at=now,
+            created_at=now
+        )
+        for recipient in recipients
+    ]
+    db.session.add_all(mails)
+
+    return mails
+
+
+def backoff(attempts):
+    """Get delay (in seconds) of next attempt after failed attempts."""
+    return app.config.get('MAIL_OUTBOX_BACKOFF', 60) * 2 ** (attempts - 1)
+
+
+def due_mails(limit):
+    """
+    Get pending mails with come time of attempt (oldest first).
+
+    Rows are locked till commit and rows, locked by other workers, are
+    skipped (so several workers don't send the same mail).
+    """
+    return MailOutbox.query.filter(
+        MailOutbox.status == 'pending',
+        MailOutbox.next_attempt_at <= datetime.now()
+    ).order_by(
+        MailOutbox.next_attempt_at,
+        MailOutbox.id
+    ).limit(limit).with_for_update(skip_locked=True).all()
+
+
+def deliver(limit=None):
+    """
+    Send due mails of outbox through pooled connections and commit results.
+
+    Returns counts of sent, retried (failed and postponed) and failed (after
+    last attempt) mails.
+
+    Supported parameters:
+    limit (Integer) - maximal count of sent mails (MAIL_OUTBOX_BATCH config
+    by default)
+    """
+    mails = due_mails(limit or app.config.get('MAIL_OUTBOX_BATCH', 50))
+    result = {'sent': 0, 'retried': 0, 'failed': 0}
+    if not mails:
+        db.session.commit()
+        return result
+
+    max_attempts = app.config.get('MAIL_OUTBOX_MAX_ATTEMPTS', 8)
+    handled = set()
+
+    def fail(item, error):
+        item.attempts += 1
+        item.last_error = str(error)[:255]
+        if item.attempts >= max_attempts:
+            item.status = 'failed'
+            result['failed'] += 1
+        else:
+            item.next_attempt_at = datetime.now() + timedelta(
+                seconds=backoff(item.attempts)
+            )
+            result['retried'] += 1
+        handled.add(item.id)
+
+    connection = None
+    try:
+        for item in mails:
+            if connection is None:
+                connection = smtp_pool.acquire()
+            message = Message(
+                item.subject,
+                html=item.html,
+                recipients=[item.recipient],
+                sender=app.config['MAIL_DEFAULT_SENDER']
+            )
+            try:
+                connection = smtp_pool.send(connection, message)
+            except Exception as error:
+                fail(item, error)
+                if not smtp_pool.usable(connection):
+                    connection = None
+            else:
+                item.attempts += 1
+                item.status = 'sent'
+                item.sent_at = datetime.now()
+                item.last_error = None
+                result['sent'] += 1
+                handled.add(item.id)
+    except Exception as error:
+        # Connection to mail server failed: all not handled mails of batch
+        # are postponed
+        for item in mails:
+            if item.id not in handled:
+                fail(item, error)
+    if connection is not None:
+        smtp_pool.release(connection)
+    db.session.commit()
+
+    return result
+
+
+def run_worker(interval=None, limit=None, once=False, report=None):
+    """
+    Send mails of outbox in loop (sleeping while outbox has no due mails).
+
+    Returns total counts of sent, retried and failed mails.
+
+    Supported parameters:
+    interval (Float) - pause (in seconds) when there are no due mails
+    (MAIL_OUTBOX_POLL_INTERVAL config by default)
+    limit (Integer) - maximal count of mails in one batch
+    once (Boolean) - send only one batch
+    report (Function) - callback with counts of every not empty batch
+    """
+    if interval is None:
+        interval = app.config.get('MAIL_OUTBOX_POLL_INTERVAL', 5)
+    totals = {'sent': 0, 'retried': 0, 'failed': 0}
+    try:
+        while True:
+            result = deliver(limit)
+            for key, value in result.items():
+                totals[key] += value
+            if any(result.values()) and report:
+                report(result)
+            if once:
+                return totals
+            if not any(result.values()):
+                smtp_pool.prune()
+                time.sleep(interval)
+    finally:
+        smtp_pool.close()
+
+
+def outbox_stats():
+    """Get counts of mails by statuses and age of oldest pending mail."""
+    counts = dict.fromkeys(STATUSES, 0)
+    counts.update(
+        db.session.query(
+            MailOutbox.status,
+            func.count(MailOutbox.id)
+        ).group_by(MailOutbox.status).all()
+    )
+    oldest = db.session.query(
+        func.min(MailOutbox.created_at)
+    ).filter(MailOutbox.status == 'pending').scalar()
+    counts['oldestPendingSeconds'] = round(
+        (datetime.now() - oldest).total_seconds()
+    ) if oldest else None
+
+    return counts
@@ -1,11 +1,9 @@
 """Views of API version 1.0.0: System modules and modules types."""
 
-from flask import request, Response, json, current_app as app, url_for, \
-    render_template
+from flask import request, current_app as app, url_for
 from flask_babel import _
-from flask_mail import Message
 
-from app import db, mail
+from app import db
 from datetime import datetime, timedelta
 from zxcvbn import zxcvbn
 import bcrypt
@@ -13,11 +11,14 @@ import bcrypt
 from .blueprint import APIv1_0_0
 from app.models import Users, Passwords
 from app.schemas import PasswordsSchema
-from .utils import json_http_response, variable_type_check, \
+from .outbox import enqueue
+from .mail_templates import render_mail
+from .utils import json_http_response, json_response, variable_type_check, \
     password_generator, marshmallow_excluding_converter, \
     marshmallow_only_fields_converter, \
     sqlalchemy_filters_converter, sqlalchemy_orders_converter, \
-    pagination_of_list
+    pagination_of_list, pagination_cursor_converter, ndjson_requested, \
+    ndjson_response, schema_instance
 
 
 @APIv1_0_0.route('/passwords/', methods=['GET'])
@@ -53,7 +54,7 @@ def get_passwords():
         except Exception as error:
             return error.args[0]
 
-        schema = PasswordsSchema(**dump_params)
+        schema = schema_instance(PasswordsSchema, **dump_params)
         # ----------------------------------------------------------------------
 
         # Make empty base query and if
@@ -77,27 +78,33 @@ def get_passwords():
             except Exception as error:
                 return error.args[0]
             elements = elements.order_by(*orders_list)
+        # Check cursor of keyset pagination (if requested)
+        try:
+            cursor = pagination_cursor_converter(
+                Passwords, orders_list, request.args.get('cursor')
+            )
+        except Exception as error:
+            return error.args[0]
         # ----------------------------------------------------------------------
 
-        data = schema.dump(elements.all())
+        # Streaming all rows in NDJSON format, if requested
+        if ndjson_requested():
+            return ndjson_response(elements, schema, orders_list, cursor)
 
-        # Paginating results of dumping
-        # Probably would best is pagination in sqlalchemy query?
+        # Paginating query and dumping only requested page
         data = pagination_of_list(
-            data,
+            elements,
             url_for(
                 '.get_passwords',
                 _external=True
             ),
-            query_params=request.args
+            query_params=request.args,
+            schema=schema,
+            cursor=cursor
         )
         # ----------------------------------------------------------------------
 
-        response = Response(
-            response=json.dumps(data),
-            status=200,
-            mimetype='application/json'
-        )
+        response = json_response(data)
     except Exception:
 
         response = json_http_response(dbg=request.args.get('dbg', False))
@@ -136,7 +143,7 @@ def get_passwords_item(id):
         except Exception as error:
             return error.args[0]
 
-        schema = PasswordsSchema(**dump_params)
+        schema = schema_instance(PasswordsSchema, **dump_params)
         # ----------------------------------------------------------------------
 
         # Query item from database, and if is not none dump it
@@ -154,11 +161,7 @@ def get_passwords_item(id):
         data = schema.dump(item)
         # ----------------------------------------------------------------------
 
-        response = Response(
-            response=json.dumps(data),
-            status=200,
-            mimetype='application/json'
-        )
+        response = json_response(data)
 
     except Exception:
 
@@ -343,27 +346,22 @@ def post_passwords_item():
             ),
         )
         db.session.add(add_password)
-        # db.session.commit()
         # ----------------------------------------------------------------------
 
         # Send email if password was changed
-        html = render_template(
+        html = render_mail(
             'change_password.html'
         )
         subject = 'Изменен пароль Вашей учетной записи в ИС'
         ' подразделения ГАСПИ'
 
-        for email in user_obj.emails:
-            message = Message(
-                subject,
-                html=html,
-                recipients=[email.value],
-                sender=app.config['MAIL_DEFAULT_SENDER']
-            )
-            try:
-                mail.send(message)
-            except Exception:
-                pass
+        enqueue(
+            'password_changed',
+            subject,
+            html,
+            [email.value for email in user_obj.emails]
+        )
+        db.session.commit()
         # ----------------------------------------------------------------------
 
         response = json_http_response(
@@ -430,24 +428,18 @@ def put_passwords_item(id):
                             password.blocked = True
                 else:
                     # Send email if password was blocked
-                    html = render_template(
+                    html = render_mail(
                         'block_password.html'
                     )
                     subject = 'Блокировка учетной записи в ИС'
                     ' подразделения ГАСПИ'
                     user = Users.query.get(target.user_id)
-                    for email in user.emails:
-                        message = Message(
-                            subject,
-                            html=html,
-                            recipients=[email.value],
-                            sender=app.config['MAIL_DEFAULT_SENDER']
-                        )
-
-                        try:
-                            mail.send(message)
-                        except Exception:
-                            pass
+                    enqueue(
+                        'password_blocked',
+                        subject,
+                        html,
+                        [email.value for email in user.emails]
+                    )
                 target.blocked = blocked.value
                 db.session.commit()
 
@@ -652,11 +644,7 @@ def get_passwords_autogenerated():
             'responseType': _('Success'),
             'status': 200
         }
-        response = Response(
-            response=json.dumps(data),
-            status=200,
-            mimetype='application/json'
-        )
+        response = json_response(data)
         # ----------------------------------------------------------------------
     except Exception:
 
@@ -1,6 +1,6 @@
 """Views of API version 1.0.0: Routes for tables relations."""
 
-from flask import Response, json, request, url_for
+from flask import request, url_for
 from flask_babel import _
 
 from .blueprint import APIv1_0_0
@@ -12,9 +12,11 @@ from app.schemas import EmailsSchema, PasswordsSchema
 # , OrganizationalStructureSchema, \
 #     ModulesBaseSchema
 
-from .utils import json_http_response, pagination_of_list, \
+from .utils import json_http_response, json_response, pagination_of_list, \
     marshmallow_excluding_converter, marshmallow_only_fields_converter, \
-    sqlalchemy_filters_converter, sqlalchemy_orders_converter
+    sqlalchemy_filters_converter, sqlalchemy_orders_converter, \
+    pagination_cursor_converter, schema_instance
+from .invalidation import publish
 
 
 @APIv1_0_0.route('/modules/<int:mid>/users/<int:uid>', methods=['POST'])
@@ -231,6 +233,8 @@ def post_user_structure_relation(uid, sid):
 
         user.structures.append(structure)
         db.session.commit()
+        # Users of structure elements are dumped in structure tree
+        publish('structure')
 
         response = json_http_response(
             status=200,
@@ -310,6 +314,8 @@ def delete_user_structure_relation(uid, sid):
 
         relation.users.remove(user)
         db.session.commit()
+        # Users of structure elements are dumped in structure tree
+        publish('structure')
 
         response = json_http_response(
             status=200,
@@ -362,7 +368,7 @@ def get_user_emails_relation(uid):
         except Exception as error:
             return error.args[0]
         #
-        schema = EmailsSchema(**dump_params)
+        schema = schema_instance(EmailsSchema, **dump_params)
         # ----------------------------------------------------------------------
 
         user = Users.query.get(uid)
@@ -406,27 +412,30 @@ def get_user_emails_relation(uid):
             except Exception as error:
                 return error.args[0]
             emails = emails.order_by(*orders_list)
+        # Check cursor of keyset pagination (if requested)
+        try:
+            cursor = pagination_cursor_converter(
+                Emails, orders_list, request.args.get('cursor')
+            )
+        except Exception as error:
+            return error.args[0]
         # ----------------------------------------------------------------------
 
-        emails_dump = schema.dump(emails)
-
-        # Paginating results of dumping
-        # Probably would best is pagination in sqlalchemy query?
+        # Paginating query and dumping only requested page
         emails_dump = pagination_of_list(
-            emails_dump,
+            emails,
             url_for(
-                '.get_modules',
+                '.get_user_emails_relation',
+                uid=uid,
                 _external=True
             ),
-            query_params=request.args
+            query_params=request.args,
+            schema=schema,
+            cursor=cursor
         )
         # ----------------------------------------------------------------------
 
-        response = Response(
-            response=json.dumps(emails_dump),
-            status=200,
-            mimetype='application/json'
-        )
+        response = json_response(emails_dump)
 
     except Exception:
 
@@ -468,7 +477,7 @@ def get_user_passwords_relation(uid):
         except Exception as error:
             return error.args[0]
         #
-        schema = PasswordsSchema(**dump_params)
+        schema = schema_instance(PasswordsSchema, **dump_params)
         # ----------------------------------------------------------------------
 
         user = Users.query.get(uid)
@@ -512,27 +521,30 @@ def get_user_passwords_relation(uid):
             except Exception as error:
                 return error.args[0]
             passwords = passwords.order_by(*orders_list)
+        # Check cursor of keyset pagination (if requested)
+        try:
+            cursor = pagination_cursor_converter(
+                Passwords, orders_list, request.args.get('cursor')
+            )
+        except Exception as error:
+            return error.args[0]
         # ----------------------------------------------------------------------
 
-        passwords_dump = schema.dump(passwords)
-
-        # Paginating results of dumping
-        # Probably would best is pagination in sqlalchemy query?
+        # Paginating query and dumping only requested page
         passwords_dump = pagination_of_list(
-            passwords_dump,
+            passwords,
             url_for(
-                '.get_passwords',
+                '.get_user_passwords_relation',
+                uid=uid,
                 _external=True
             ),
-            query_params=request.args
+            query_params=request.args,
+            schema=schema,
+            cursor=cursor
         )
         # ----------------------------------------------------------------------
 
-        response = Response(
-            response=json.dumps(passwords_dump),
-            status=200,
-            mimetype='application/json'
-        )
+        response = json_response(passwords_dump)
 
     except Exception:
 
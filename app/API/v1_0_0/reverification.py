@@ -0,0 +1,118 @@
+"""
+Sweep of emails entering renewal window.
+
+Verified emails with «active_until» in USER_MAIL_RENEW_NOTIFICATION days
+(not already expired) are selected by one range query on index of
+«verify» and «active_until», confirmation mails with tokens (generated in
+bulk) are added to outbox by chunks with commit after every chunk. Emails,
+reminded during the last notification period, are skipped, so sweep may be
+run by cron as often as needed («flask mail reverify» command).
+"""
+
+from flask import current_app as app
+
+from app import db
+from app.models import Emails, MailOutbox
+from .outbox import enqueue
+from .mail_templates import render_mail
+from .utils import generate_confirmation_tokens, display_time
+from datetime import datetime, timedelta
+
+import time
+
+# Kind of renewal reminders in outbox
+RENEWAL_KIND = 'renewal'
+
+
+def due_emails(now, limit=None):
+    """
+    Get identifiers and addresses of verified emails in renewal window.
+
+    Emails are ordered by expiration (the soonest first), already expired
+    emails aren't reminded.
+    """
+    horizon = now + timedelta(
+        days=app.config['USER_MAIL_RENEW_NOTIFICATION']
+    )
+    query = db.session.query(Emails.id, Emails.value).filter(
+        Emails.verify.is_(True),
+        Emails.active_until > now,
+        Emails.active_until <= horizon
+    ).order_by(Emails.active_until)
+    if limit:
+        query = query.limit(limit)
+
+    return query.all()
+
+
+def reminded_recipients(now):
+    """Get recipients of renewal reminders of the last notification period."""
+    since = now - timedelta(days=app.config['USER_MAIL_RENEW_NOTIFICATION'])
+
+    return {
+        recipient for recipient, in db.session.query(
+            MailOutbox.recipient
+        ).filter(
+            MailOutbox.kind == RENEWAL_KIND,
+            MailOutbox.created_at > since
+        )
+    }
+
+
+def sweep(dry_run=False, chunk=None, limit=None):
+    """
+    Add renewal reminders of due emails to outbox.
+
+    Returns statistics of sweep: counts of selected, already reminded and
+    queued emails, count of chunks and throughput.
+
+    Supported parameters:
+    dry_run (Boolean) - only count due emails (without tokens and mails)
+    chunk (Integer) - count of mails committed at once
+    (USER_MAIL_RENEW_CHUNK config by default)
+    limit (Integer) - maximal count of selected emails
+    """
+    started = time.perf_counter()
+    now = datetime.now()
+    chunk = chunk or app.config.get('USER_MAIL_RENEW_CHUNK', 500)
+    expiration = app.config.get('USER_MAIL_RENEW_TOKEN_EXPIRATION', 86400)
+
+    selected = due_emails(now, limit)
+    reminded = reminded_recipients(now)
+    due = [row for row in selected if row.value not in reminded]
+    stats = {
+        'selected': len(selected),
+        'alreadyReminded': len(selected) - len(due),
+        'due': len(due),
+        'queued': 0,
+        'chunks': 0,
+        'dryRun': dry_run
+    }
+
+    if not dry_run:
+        subject = 'Подтверждение адреса электронной почты в ИС' \
+            ' подразделения ГАСПИ'
+        active_time = "".join(display_time(expiration))
+        for start in range(0, len(due), chunk):
+            rows = due[start:start + chunk]
+            tokens = generate_confirmation_tokens(
+                [row.id for row in rows],
+                expiration
+            )
+            for row, token in zip(rows, tokens):
+                html = render_mail(
+                    'confirmation_mail.html',
+                    confirm_url=app.config['CLIENT_LINK'] +
+                    '/email/verify/' + token.decode("utf-8"),
+                    active_time=active_time
+                )
+                enqueue(RENEWAL_KIND, subject, html, [row.value])
+            db.session.commit()
+            stats['queued'] += len(rows)
+            stats['chunks'] += 1
+
+    seconds = time.perf_counter() - started
+    stats['seconds'] = round(seconds, 3)
+    stats['perSecond'] = round(stats['queued'] / seconds) if seconds else 0
+
+    return stats
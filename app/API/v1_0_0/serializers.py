@@ -0,0 +1,204 @@
+"""
+Compiled dumping of schemas.
+
+For hot schemas a specialized row dumping function is generated on first use
+for schema fields selection. The function reads attributes directly and
+formats values without per-field dispatch of marshmallow. Output is the same
+as output of schema dump.
+"""
+
+from marshmallow import fields, missing
+from marshmallow.decorators import PRE_DUMP, POST_DUMP
+from marshmallow_sqlalchemy.fields import Related, RelatedList
+
+from app.fields import TemplatedHyperlinks
+from app.schemas import UsersBaseSchema, EmailsSchema, PasswordsSchema
+from .caches import LRUCache
+
+# Schemas with compiled dumping support
+COMPILED_SCHEMAS = (UsersBaseSchema, EmailsSchema, PasswordsSchema)
+
+# Compiled dumping functions by schema class and dumped fields (with
+# dumped fields of nested schemas)
+compiled_dumpers = LRUCache()
+
+
+def compilable(schema):
+    """Check schema for compiled dumping support (without dump hooks)."""
+    return (
+        type(schema) in COMPILED_SCHEMAS and
+        schema.dict_class is dict and
+        not any(
+            schema._hooks[(tag, many)]
+            for tag in (PRE_DUMP, POST_DUMP) for many in (True, False)
+        )
+    )
+
+
+def compiled_dump(schema, obj):
+    """
+    Dump object (or collection if schema has many flag) by compiled function.
+
+    If schema doesn't support compiled dumping, usual dump is used.
+
+    Required parameters:
+    schema (Schema) - schema instance with dumping parameters
+    obj (Object) - object or collection of objects to dump
+    """
+    if not compilable(schema):
+        return schema.dump(obj)
+
+    dump_row = compiled_dumper(schema)()
+    if schema.many:
+        return [dump_row(row) for row in obj]
+
+    return dump_row(obj)
+
+
+def compiled_dumper(schema):
+    """
+    Get compiled function (from cache or compile) for schema fields selection.
+
+    Returned function must be called in request context and returns function
+    for dumping of one row.
+
+    Required parameters:
+    schema (Schema) - schema instance with dumping parameters
+    """
+    key = dumper_key(schema)
+    prepare = compiled_dumpers.get(key)
+    if prepare is None:
+        prepare = compile_dumper(schema)
+        compiled_dumpers.set(key, prepare)
+
+    return prepare
+
+
+def dumper_key(schema):
+    """
+    Get key of compiled function: schema class with dumped fields, including
+    dumped fields of nested schemas (which are compiled into function).
+    """
+    return (type(schema), tuple(
+        (
+            name,
+            dumper_key(field.schema)
+            if isinstance(field, fields.Nested) else None
+        )
+        for name, field in schema.dump_fields.items()
+    ))
+
+
+def compile_dumper(schema):
+    """
+    Generate dumping function source for schema fields and compile it.
+
+    Required parameters:
+    schema (Schema) - schema instance with dumping parameters
+    """
+    namespace = {'missing': missing, 'get_attribute': schema.get_attribute}
+    prepare_lines = []
+    row_lines = []
+
+    for index, (name, field) in enumerate(schema.dump_fields.items()):
+        key = field.data_key if field.data_key is not None else name
+        attribute = field.attribute or name
+        field_name = f'field_{index}'
+        namespace[field_name] = field
+
+        # Generic serialization of field, if no fast path for it
+        generic = [
+            f"value = {field_name}.serialize("
+            f"{name!r}, obj, accessor=get_attribute)",
+            "if value is not missing:",
+            f"    ret[{key!r}] = value",
+        ]
+
+        # Links are formed from templates, prepared once per request
+        if isinstance(field, TemplatedHyperlinks):
+            row_lines.append(
+                f"ret[{key!r}] = {field_name}._serialize(None, {name!r}, obj)"
+            )
+            continue
+
+        if (
+            '.' in attribute or
+            getattr(field, 'default', missing) is not missing
+        ):
+            row_lines += generic
+            continue
+
+        row_lines += [
+            f"value = getattr(obj, {attribute!r}, missing)",
+            "if value is not missing:",
+        ]
+
+        if type(field) is fields.String:
+            expression = (
+                "value if type(value) is str or value is None"
+                f" else {field_name}._serialize(value, {name!r}, obj)"
+            )
+        elif type(field) is fields.Integer and not field.as_string:
+            expression = (
+                "value if type(value) is int or value is None"
+                " else int(value)"
+            )
+        elif type(field) is fields.Boolean:
+            expression = (
+                "value if type(value) is bool or value is None"
+                f" else {field_name}._serialize(value, {name!r}, obj)"
+            )
+        elif type(field) in (fields.DateTime, fields.Date) and (
+            (field.format or field.DEFAULT_FORMAT) in field.SERIALIZATION_FUNCS
+        ):
+            namespace[f'{field_name}_format'] = field.SERIALIZATION_FUNCS[
+                field.format or field.DEFAULT_FORMAT
+            ]
+            expression = (
+                f"None if value is None else {field_name}_format(value)"
+            )
+        elif (
+            type(field) is RelatedList and
+            type(field.inner) is Related and
+            len(field.inner.related_keys) == 1
+        ):
+            namespace[f'{field_name}_key'] = field.inner.related_keys[0].key
+            expression = (
+                "None if value is None else"
+                f" [getattr(each, {field_name}_key, None) for each in value]"
+            )
+        elif (
+            type(field) is Related and
+            len(field.related_keys) == 1
+        ):
+            namespace[f'{field_name}_key'] = field.related_keys[0].key
+            expression = f"getattr(value, {field_name}_key, None)"
+        elif (
+            isinstance(field, fields.Nested) and
+            not (field.many or field.schema.many) and
+            compilable(field.schema)
+        ):
+            namespace[f'{field_name}_dumper'] = compiled_dumper(field.schema)
+            prepare_lines.append(
+                f"{field_name}_row = {field_name}_dumper()"
+            )
+            expression = f"None if value is None else {field_name}_row(value)"
+        else:
+            row_lines.pop()
+            row_lines.pop()
+            row_lines += generic
+            continue
+
+        row_lines.append(f"    ret[{key!r}] = {expression}")
+
+    source = '\n'.join(
+        ["def prepare():"] +
+        [f"    {line}" for line in prepare_lines] +
+        ["    def dump_row(obj):", "        ret = {}"] +
+        [f"        {line}" for line in row_lines] +
+        ["        return ret", "    return dump_row"]
+    )
+    exec(compile(source, f'<compiled {type(schema).__name__}>', 'exec'),
+         namespace)
+
+    return namespace['prepare']
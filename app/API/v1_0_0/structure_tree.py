@@ -0,0 +1,351 @@
+"""
+Organizational structure tree readers and caches.
+
+Readers of subtrees and ancestors by range queries of nested sets keys (or
+by closure table index, if it is enabled: then elements are nested by
+parents and siblings are ordered by left keys), process local cache of
+rendered JSON of tree per dumping variant and cache of users counts of
+elements. Caches are invalidated by version counter, which is bumped on
+changes of structure (and users assignments), published to invalidation
+bus.
+"""
+
+from threading import Lock
+
+from flask import request
+from sqlalchemy import and_, case, distinct, func, select
+from sqlalchemy.orm import aliased, selectinload
+
+from app import db
+from app.models import OrganizationalStructure, \
+    OrganizationalStructureClosure, user_structure
+from .caches import LRUCache
+from .closure import closure_enabled
+from .invalidation import subscribe
+
+_lock = Lock()
+_version = 0
+
+# Rendered JSON of tree by version and dumping variant
+tree_renders = LRUCache(maxsize=32)
+
+# Users counts of elements by version and root element
+headcounts = LRUCache(maxsize=32)
+
+
+def structure_version():
+    """Current version of organizational structure."""
+    return _version
+
+
+def bump_structure_version():
+    """Invalidate rendered trees and counts after structure change."""
+    global _version
+    with _lock:
+        _version += 1
+        tree_renders.clear()
+        headcounts.clear()
+
+    return _version
+
+
+subscribe('structure', bump_structure_version)
+
+
+def subtree(root, dump, depth=None, users=True):
+    """
+    Form drilldown tree of element in sqlalchemy_mptt JSON format.
+
+    Subtree is read by one range query of nested sets keys of element tree
+    (limited by level, if depth is given) and assembled by one pass with
+    stack of open elements, or by closure table index, if it is enabled,
+    and assembled by parents.
+
+    Required parameters:
+    root (OrganizationalStructure) - root element of drilldown tree
+    dump (Function) - dumping function of element to dictionary
+
+    Supported parameters:
+    depth (Integer) - maximal depth of elements under root (without limit
+    by default)
+    users (Boolean) - load users of elements with tree (True by default)
+    """
+    table = OrganizationalStructure
+    if closure_enabled():
+        closure = OrganizationalStructureClosure
+        query = table.query.join(
+            closure, closure.descendant_id == table.id
+        ).filter(closure.ancestor_id == root.id)
+        if depth is not None:
+            query = query.filter(closure.depth <= depth)
+    else:
+        query = table.query.filter(
+            table.tree_id == root.tree_id,
+            table.left.between(root.left, root.right)
+        )
+        if depth is not None:
+            query = query.filter(table.level <= root.level + depth)
+    if users:
+        query = query.options(selectinload(table.users))
+
+    tree = []
+    if closure_enabled():
+        # Parents precede children in order by depth
+        results = {}
+        for element in query.order_by(closure.depth, table.left, table.id):
+            result = {"id": element.id, "label": element.__repr__()}
+            result.update(dump(element))
+
+            parent = results.get(element.parent_id)
+            if parent is None:
+                tree.append(result)
+            else:
+                parent.setdefault("children", []).append(result)
+            results[element.id] = result
+
+        return tree
+
+    # Open elements with right keys of them
+    stack = []
+    for element in query.order_by(table.left):
+        result = {"id": element.id, "label": element.__repr__()}
+        result.update(dump(element))
+
+        while stack and stack[-1][0] < element.left:
+            stack.pop()
+        if stack:
+            stack[-1][1].setdefault("children", []).append(result)
+        else:
+            tree.append(result)
+        stack.append((element.right, result))
+
+    return tree
+
+
+def ancestors(element, users=True):
+    """
+    Get ancestors of element (path from root) by one nested sets query (or
+    closure table query, if index is enabled).
+
+    Required parameters:
+    element (OrganizationalStructure) - element of structure
+
+    Supported parameters:
+    users (Boolean) - load users of ancestors (True by default)
+    """
+    table = OrganizationalStructure
+    if closure_enabled():
+        closure = OrganizationalStructureClosure
+        query = table.query.join(
+            closure, closure.ancestor_id == table.id
+        ).filter(
+            closure.descendant_id == element.id,
+            closure.depth > 0
+        ).order_by(closure.depth.desc())
+    else:
+        query = table.query.filter(
+            table.tree_id == element.tree_id,
+            table.left < element.left,
+            table.right > element.right
+        ).order_by(table.left)
+    if users:
+        query = query.options(selectinload(table.users))
+
+    return query.all()
+
+
+def ancestors_paths(ids, users=True):
+    """
+    Get ancestors of many elements by one nested sets query (or closure
+    table query, if index is enabled).
+
+    Returns dictionary of ancestors lists (paths from root) by identifiers of
+    existing elements.
+
+    Required parameters:
+    ids (List) - identifiers of elements
+
+    Supported parameters:
+    users (Boolean) - load users of ancestors (True by default)
+    """
+    element = aliased(OrganizationalStructure)
+    ancestor = aliased(OrganizationalStructure)
+    if closure_enabled():
+        closure = OrganizationalStructureClosure
+        query = db.session.query(element.id, ancestor).join(
+            closure, closure.descendant_id == element.id
+        ).outerjoin(
+            ancestor,
+            and_(ancestor.id == closure.ancestor_id, closure.depth > 0)
+        ).order_by(element.id, closure.depth.desc())
+    else:
+        query = db.session.query(element.id, ancestor).outerjoin(
+            ancestor,
+            and_(
+                ancestor.tree_id == element.tree_id,
+                ancestor.left < element.left,
+                ancestor.right > element.right
+            )
+        ).order_by(element.id, ancestor.left)
+    query = query.filter(element.id.in_(ids))
+    if users:
+        query = query.options(selectinload(ancestor.users))
+
+    paths = {}
+    for id, item in query:
+        path = paths.setdefault(id, [])
+        if item is not None:
+            path.append(item)
+
+    return paths
+
+
+def rendered_tree(schema, variant, encode, root_id=1):
+    """
+    Get rendered JSON of drilldown tree from cache (render it, if missed).
+
+    Required parameters:
+    schema (Schema) - schema instance with dumping parameters
+    variant (Tuple) - dumping parameters of schema (part of cache key)
+    encode (Function) - JSON encoding function
+
+    Supported parameters:
+    root_id (Integer) - identifier of root element (1 by default)
+    """
+    version = _version
+    key = (version, request.host_url, root_id, variant)
+    rendered = tree_renders.get(key)
+    if rendered is None:
+        root = OrganizationalStructure.query.get(root_id)
+        if root is None:
+            raise LookupError(root_id)
+        rendered = encode(subtree(
+            root,
+            schema.dump,
+            users=not {'users', 'parent'}.isdisjoint(schema.dump_fields)
+        ))
+        # Structure can be changed while rendering
+        if version == _version:
+            tree_renders.set(key, rendered)
+
+    return rendered
+
+
+def preorder(rows):
+    """
+    Order rows of elements (with id, parent_id, tree_id and lft) by
+    depth-first pass, siblings are ordered by left keys.
+    """
+    ids = {row.id for row in rows}
+    children = {}
+    for row in sorted(rows, key=lambda row: (row.tree_id, row.lft, row.id)):
+        children.setdefault(
+            row.parent_id if row.parent_id in ids else None, []
+        ).append(row)
+
+    ordered = []
+    stack = list(reversed(children.get(None, [])))
+    while stack:
+        row = stack.pop()
+        ordered.append(row)
+        stack.extend(reversed(children.get(row.id, [])))
+
+    return ordered
+
+
+def count_users(root=None):
+    """
+    Count users of elements by one aggregation query.
+
+    Direct count is count of users assigned to element, total count is
+    count of distinct users assigned to element or his descendants (found by
+    nested sets intervals or closure table index, if it is enabled).
+    Returns list of counts ordered by left key (by depth-first pass in
+    closure table mode).
+
+    Supported parameters:
+    root (OrganizationalStructure) - count only subtree of element (all
+    elements by default)
+    """
+    element = OrganizationalStructure.__table__.alias('element')
+    if closure_enabled():
+        closure = OrganizationalStructureClosure.__table__
+        joined = element.outerjoin(
+            closure, closure.c.ancestor_id == element.c.id
+        ).outerjoin(
+            user_structure,
+            user_structure.c.structure_id == closure.c.descendant_id
+        )
+    else:
+        descendant = OrganizationalStructure.__table__.alias('descendant')
+        joined = element.outerjoin(
+            descendant,
+            and_(
+                descendant.c.tree_id == element.c.tree_id,
+                descendant.c.lft.between(element.c.lft, element.c.rgt)
+            )
+        ).outerjoin(
+            user_structure,
+            user_structure.c.structure_id == descendant.c.id
+        )
+
+    columns = (
+        element.c.id, element.c.parent_id, element.c.level, element.c.name,
+        element.c.tree_id, element.c.lft
+    )
+    query = select(
+        *columns,
+        func.count(distinct(case(
+            (user_structure.c.structure_id == element.c.id,
+             user_structure.c.user_id)
+        ))).label('direct'),
+        func.count(distinct(user_structure.c.user_id)).label('total')
+    ).select_from(joined).group_by(*columns).order_by(
+        element.c.tree_id, element.c.lft
+    )
+    if root is not None and closure_enabled():
+        query = query.where(element.c.id.in_(
+            select(closure.c.descendant_id).where(
+                closure.c.ancestor_id == root.id
+            )
+        ))
+    elif root is not None:
+        query = query.where(
+            element.c.tree_id == root.tree_id,
+            element.c.lft.between(root.left, root.right)
+        )
+    rows = db.session.execute(query).fetchall()
+    if closure_enabled():
+        rows = preorder(rows)
+
+    return [
+        {
+            "id": row.id,
+            "parent_id": row.parent_id,
+            "level": row.level,
+            "name": row.name,
+            "directUsers": row.direct,
+            "totalUsers": row.total
+        }
+        for row in rows
+    ]
+
+
+def cached_headcount(root=None):
+    """
+    Get users counts of elements from cache (count them, if missed).
+
+    Supported parameters:
+    root (OrganizationalStructure) - count only subtree of element (all
+    elements by default)
+    """
+    version = _version
+    key = (version, root.id if root is not None else None)
+    counts = headcounts.get(key)
+    if counts is None:
+        counts = count_users(root)
+        # Structure can be changed while counting
+        if version == _version:
+            headcounts.set(key, counts)
+
+    return counts
@@ -1,13 +1,16 @@
 """Views of API version 1.0.0: Users."""
 
-from flask import Response, json, request, url_for
+from flask import request, url_for
 
 from app.API.v1_0_0.blueprint import APIv1_0_0
 from app.models import Users
 from app.schemas import UsersBaseSchema
-from .utils import json_http_response, sqlalchemy_filters_converter,\
+from .utils import json_http_response, json_response, \
+    sqlalchemy_filters_converter,\
     sqlalchemy_orders_converter, pagination_of_list,\
-    marshmallow_excluding_converter, marshmallow_only_fields_converter
+    marshmallow_excluding_converter, marshmallow_only_fields_converter, \
+    pagination_cursor_converter, ndjson_requested, ndjson_response, \
+    schema_instance, relationship_loaders
 
 # List of routes:
 # * GET ALL users
@@ -47,6 +50,11 @@ def get_users():
                 Users,
                 orders_list
             )
+            cursor = pagination_cursor_converter(
+                Users,
+                orders_list,
+                request.args.get('cursor')
+            )
             if exclusions_list:
                 exclusions_list = marshmallow_excluding_converter(
                     Users, exclusions_list
@@ -64,32 +72,35 @@ def get_users():
         except Exception as error:
             return error.args[0]
 
-        # Querying database with filters and ordering lists
-        users = Users.query.filter(*filters_list).order_by(*orders_list).all()
-        # And dumping it to json by schema
-        users_schema = UsersBaseSchema(
+        # Dumping schema with requested fields
+        users_schema = schema_instance(
+            UsersBaseSchema,
             many=True,
             **dump_params
         )
+        # Querying database with filters and ordering lists (with loading
+        # of dumped relationships only)
+        users = Users.query.options(
+            *relationship_loaders(Users, users_schema)
+        ).filter(*filters_list).order_by(*orders_list)
 
-        users_json = users_schema.dump(users)
+        # Streaming all rows in NDJSON format, if requested
+        if ndjson_requested():
+            return ndjson_response(users, users_schema, orders_list, cursor)
 
-        # Paginating results of dumping
-        # Probably would best is pagination in sqlalchemy query?
+        # Paginating query and dumping only requested page
         paginated_data = pagination_of_list(
-            users_json,
+            users,
             url_for(
                 '.get_users',
                 _external=True
             ),
-            query_params=request.args
+            query_params=request.args,
+            schema=users_schema,
+            cursor=cursor
         )
 
-        response = Response(
-            response=json.dumps(paginated_data),
-            status=200,
-            mimetype='application/json'
-        )
+        response = json_response(paginated_data)
 
         return response
 
@@ -133,19 +144,17 @@ def get_user(id):
         except Exception as error:
             return error.args[0]
 
-        # Querying database for entity by id
-        user = Users.query.get(id)
-        # And dumping it to json by schema
-        # (with the addition of excluded and only fields)
-        user_schema = UsersBaseSchema(**dump_params)
+        # Dumping schema (with the addition of excluded and only fields)
+        user_schema = schema_instance(UsersBaseSchema, **dump_params)
+        # Querying database for entity by id (with loading of dumped
+        # relationships only)
+        user = Users.query.options(
+            *relationship_loaders(Users, user_schema)
+        ).get(id)
 
         user_json = user_schema.dump(user)
 
-        response = Response(
-            response=json.dumps(user_json),
-            status=200,
-            mimetype='application/json'
-        )
+        response = json_response(user_json)
 
         return response
 
@@ -1,19 +1,38 @@
 """Additional utilities, used without route."""
 
 from random import SystemRandom
-from flask import Response, json, request, current_app as app
+from flask import Response, json, request, current_app as app, \
+    stream_with_context
 from flask_babel import _, ngettext
 from itsdangerous import TimedJSONWebSignatureSerializer
 from distutils.util import strtobool
 from urllib.parse import urljoin
+from sqlalchemy import and_, or_, false, text
 from sqlalchemy.inspection import inspect
+from sqlalchemy.orm import selectinload
+from sqlalchemy.sql import operators
+from marshmallow import fields
 from collections import namedtuple
+from datetime import date, datetime
 # from functools import wraps
 
+from app import db
+from app.fields import TemplatedHyperlinks
+from .caches import LRUCache, TTLCache
+from .serializers import compiled_dump
+from .invalidation import subscribe
+
+import base64
 import math
 import traceback
 import sys
 
+# Optional accelerated JSON encoder (see JSON_ENCODER_BACKEND config)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 def display_time(seconds, granularity=2):
     """Time convert to other units."""
@@ -72,15 +91,18 @@ def display_time(seconds, granularity=2):
 
 def generate_confirmation_token(value, expiration=3600):
     """Email confirmation token generation."""
+    return generate_confirmation_tokens([value], expiration)[0]
+
+
+def generate_confirmation_tokens(values, expiration=3600):
+    """Email confirmation tokens generation by one serializer."""
     serializer = TimedJSONWebSignatureSerializer(
         app.config['EMAIL_SECRET_KEY'],
         expires_in=expiration
     )
+    salt = app.config['EMAIL_VERIFICATION_SALT']
 
-    return serializer.dumps(
-        value,
-        salt=app.config['EMAIL_VERIFICATION_SALT']
-    )
+    return [serializer.dumps(value, salt=salt) for value in values]
 
 
 def confirm_email_token(token):
@@ -229,43 +251,166 @@ def json_http_response(dbg=False, given_message=None, status=500):
                 "incorrect type of parameter 'dbg' (should be boolean)"
             )
 
+    return json_response(info, status=status)
+
+
+def json_encode(data):
+    """
+    Encode data to JSON (bytes) by encoder backend from config.
+
+    Backend is set by JSON_ENCODER_BACKEND: «stdlib» (Flask encoder, by
+    default) or «orjson» (if installed). Values unsupported by orjson (dates
+    in HTTP format and other) are converted by Flask encoder, and on orjson
+    error data is encoded by Flask encoder.
+
+    Required parameters:
+    data - data to encode
+    """
+    if orjson is not None and \
+            app.config.get('JSON_ENCODER_BACKEND', 'stdlib') == 'orjson':
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if app.config.get('JSON_SORT_KEYS', True):
+            option |= orjson.OPT_SORT_KEYS
+        try:
+            return orjson.dumps(
+                data, default=app.json_encoder().default, option=option
+            )
+        except orjson.JSONEncodeError:
+            pass
+
+    return json.dumps(data).encode('utf-8')
+
+
+def json_response(data, status=200, mimetype='application/json',
+                  encoded=False):
+    """
+    JSON response generation.
+
+    Required parameters:
+    data - data to send in response
+
+    Supported parameters:
+    status (Integer) - response status (200 by default)
+    mimetype (String) - response mimetype («application/json» by default)
+    encoded (Boolean) - data is already encoded JSON (False by default)
+    """
     return Response(
-        response=json.dumps(info),
+        response=data if encoded else json_encode(data),
         status=status,
-        mimetype='application/json'
+        mimetype=mimetype
     )
 
 
+# Per model index of valid dotted attribute paths (mapper graph never changes
+# at runtime, so index is built once on blueprint registration)
+attribute_paths_index = {}
+attribute_paths_depth = 3
+
+
+def model_attribute_paths(model, depth=None):
+    """
+    Get set of all dotted attribute paths of model.
+
+    Paths are formed from mapped attributes of model and attributes of related
+    models (by relationship name and, for compatibility, by table name of
+    related model) up to depth of nesting.
+
+    Required parameters:
+    model (Model) - Model for which paths formed
+
+    Supported parameters:
+    depth (Integer) - maximum count of path parts (index depth by default)
+    """
+    depth = attribute_paths_depth if depth is None else depth
+    paths = set()
+    if depth < 1:
+        return paths
+
+    mapper = inspect(model)
+    paths.update(
+        key for key in mapper.all_orm_descriptors.keys()
+        if key != '__mapper__'
+    )
+    for relationship in mapper.relationships:
+        related = relationship.mapper.class_
+        prefixes = {relationship.key, related.__tablename__}
+        for path in model_attribute_paths(related, depth - 1):
+            paths.update(f"{prefix}.{path}" for prefix in prefixes)
+
+    return paths
+
+
+def build_attribute_paths_index(depth=3):
+    """
+    Build index of dotted attribute paths for all mapped models.
+
+    Supported parameters:
+    depth (Integer) - maximum count of path parts (3 by default)
+    """
+    global attribute_paths_depth
+    attribute_paths_depth = depth
+
+    index = {}
+    for mapper in db.Model.registry.mappers:
+        index[mapper.class_] = frozenset(
+            model_attribute_paths(mapper.class_, depth)
+        )
+    attribute_paths_index.clear()
+    attribute_paths_index.update(index)
+
+    return attribute_paths_index
+
+
 def class_attribute_existence(exclude_model, exclude_fields):
     """Deep check for the existence of a class attribute."""
-    exclude_fields = [
+    paths = attribute_paths_index.get(exclude_model)
+    if paths is None:
+        paths = frozenset(model_attribute_paths(exclude_model))
+        attribute_paths_index[exclude_model] = paths
+
+    exclude_fields = '.'.join(
         x.strip() for x in
         exclude_fields.split(".")
-    ]
-    if len(exclude_fields) == 1:
-        if hasattr(exclude_model, exclude_fields[0]):
-            return True
-        else:
-            return False
-    else:
-        for item in exclude_fields:
-            i = inspect(exclude_model).relationships
-            referred_classes = [r.mapper.class_ for r in i]
-            for cls in referred_classes:
-                if cls.__tablename__ and cls.__tablename__ == item:
-                    return class_attribute_existence(
-                        cls, '.'.join(exclude_fields[1:])
-                    )
-                elif cls.__tablename__ != item and len(exclude_fields) > 1:
-                    continue
-                elif not hasattr(
-                    exclude_model,
-                    item
-                ) and len(exclude_fields) == 1:
-                    return False
-                else:
-                    return True
-    return False
+    )
+
+    return exclude_fields in paths
+
+
+FilterTerm = namedtuple(
+    typename="FilterTerm",
+    field_names=["column", "method", "value"]
+)
+
+OrderTerm = namedtuple(
+    typename="OrderTerm",
+    field_names=["column", "method"]
+)
+
+# Compiled plans of filters, orderings, columns and exclusions parameters
+# (maximum size is set from SPEC_CACHE_SIZE config on blueprint registration)
+spec_plans = LRUCache()
+
+
+def compiled_spec(kind, model, parameters, compiler):
+    """
+    Get compiled plan of request parameter string from cache.
+
+    If plan is not cached, compile it and put in cache. Compiler errors (raised
+    exceptions with response) are not cached.
+
+    Required parameters:
+    kind (String) - kind of parameter (part of cache key)
+    model (Model) - Model for which parameter compiled
+    parameters (String) - parameter string obtained from the request
+    compiler (Function) - compiler of parameter string to plan (tuple)
+    """
+    key = (kind, model, parameters)
+    plan = spec_plans.get(key)
+    if plan is None:
+        plan = compiler(model, parameters)
+        spec_plans.set(key, plan)
+
+    return plan
 
 
 # This function does not currently implement the
@@ -278,6 +423,24 @@ def sqlalchemy_filters_converter(model, filter_parameters=[]):
     model (Model) - Model for which translate filters
     filter_parameters (List) - List of filters obtained from the request
     """
+    if not filter_parameters:
+        return []
+
+    plan = compiled_spec(
+        'filters', model, filter_parameters, sqlalchemy_filters_compiler
+    )
+
+    return [term.method(term.value) for term in plan]
+
+
+def sqlalchemy_filters_compiler(model, filter_parameters):
+    """
+    Filter compiler to plan of columns, operators and values.
+
+    Supported parameters:
+    model (Model) - Model for which translate filters
+    filter_parameters (String) - Filters string obtained from the request
+    """
     dict_filtros_op = {
         '==': 'eq',
         '!=': 'ne',
@@ -357,8 +520,8 @@ def sqlalchemy_filters_converter(model, filter_parameters=[]):
             # If operator is 'in', then parse value string to get values
             if dict_filtros_op[op] == 'in':
                 try:
-                    value = [x.strip() for x in value.split(",")]
-                    filters_list.append(column.in_(value))
+                    value = tuple(x.strip() for x in value.split(","))
+                    filters_list.append(FilterTerm(column, column.in_, value))
                 except Exception:
                     raise Exception(json_http_response(
                         status=400,
@@ -380,7 +543,9 @@ def sqlalchemy_filters_converter(model, filter_parameters=[]):
                     if dict_filtros_op[op] == 'like':
                         value = f"%{value}%"
                     # problem with backref relationship
-                    filters_list.append(getattr(column, attr)(value))
+                    filters_list.append(
+                        FilterTerm(column, getattr(column, attr), value)
+                    )
                 except Exception:
                     raise Exception(json_http_response(
                         status=400,
@@ -390,7 +555,7 @@ def sqlalchemy_filters_converter(model, filter_parameters=[]):
                         ),
                         dbg=request.args.get('dbg', False)
                     ))
-    return filters_list
+    return tuple(filters_list)
 
 
 def sqlalchemy_orders_converter(model, order_parameters=[]):
@@ -401,6 +566,24 @@ def sqlalchemy_orders_converter(model, order_parameters=[]):
     model (Model) - Model for which translate filters
     order_parameters (List) - List of orderings obtained from the request
     """
+    if not order_parameters:
+        return []
+
+    plan = compiled_spec(
+        'orders', model, order_parameters, sqlalchemy_orders_compiler
+    )
+
+    return [term.method() for term in plan]
+
+
+def sqlalchemy_orders_compiler(model, order_parameters):
+    """
+    Order by compiler to plan of columns and directions.
+
+    Supported parameters:
+    model (Model) - Model for which translate filters
+    order_parameters (String) - Orderings string obtained from the request
+    """
     orders_list = []
     if order_parameters:
         try:
@@ -465,7 +648,7 @@ def sqlalchemy_orders_converter(model, order_parameters=[]):
                     lambda e: hasattr(column, e % direction),
                     ['%s', '%s_', '__%s__']
                 ))[0] % direction
-                orders_list.append(getattr(column, attr)())
+                orders_list.append(OrderTerm(column, getattr(column, attr)))
             except Exception:
                 raise Exception(json_http_response(
                     status=400,
@@ -477,7 +660,7 @@ def sqlalchemy_orders_converter(model, order_parameters=[]):
                     dbg=request.args.get('dbg', False)
                 ))
 
-    return orders_list
+    return tuple(orders_list)
 
 
 def marshmallow_only_fields_converter(model, only_fields_parameters=[]):
@@ -488,6 +671,22 @@ def marshmallow_only_fields_converter(model, only_fields_parameters=[]):
     model (Model) - Model for which translate filters
     only_fields_parameters (List) - List of params obtained from the request
     """
+    plan = compiled_spec(
+        'columns', model, only_fields_parameters,
+        marshmallow_only_fields_compiler
+    )
+
+    return list(plan)
+
+
+def marshmallow_only_fields_compiler(model, only_fields_parameters):
+    """
+    Only fields compiler to plan of checked field names.
+
+    Supported parameters:
+    model (Model) - Model for which translate filters
+    only_fields_parameters (String) - Columns string obtained from the request
+    """
     try:
         only_fields_parameters = [
             x.strip() for x in
@@ -518,14 +717,7 @@ def marshmallow_only_fields_converter(model, only_fields_parameters=[]):
                 dbg=request.args.get('dbg', False)
             ))
 
-    # Remove fields not present in the model from the list
-    only_fields_parameters[:] = [
-        x for x in only_fields_parameters if class_attribute_existence(
-            model, x
-        )
-    ]
-
-    return only_fields_parameters
+    return tuple(only_fields_parameters)
 
 
 def marshmallow_excluding_converter(model, exclusions_parameters=[]):
@@ -537,6 +729,23 @@ def marshmallow_excluding_converter(model, exclusions_parameters=[]):
     columns (String) - List of columns to order by (None by default)
     exclusions_parameters (List) - List of exclusions obtained from the request
     """
+    plan = compiled_spec(
+        'exclude', model, exclusions_parameters,
+        marshmallow_excluding_compiler
+    )
+
+    return list(plan)
+
+
+def marshmallow_excluding_compiler(model, exclusions_parameters):
+    """
+    Exclusion list compiler to plan of checked field names.
+
+    Supported parameters:
+    model (Model) - Model for which translate filters
+    exclusions_parameters (String) - Exclusions string obtained from the
+    request
+    """
     try:
         exclusions_parameters = [
             x.strip() for x in
@@ -567,23 +776,351 @@ def marshmallow_excluding_converter(model, exclusions_parameters=[]):
                 dbg=request.args.get('dbg', False)
             ))
 
-    # Remove fields not present in the model from the list
-    exclusions_parameters[:] = [
-        x for x in exclusions_parameters if class_attribute_existence(model, x)
-    ]
+    return tuple(exclusions_parameters)
+
 
-    return exclusions_parameters
+# Schema instances by dumping parameters (maximum size is set from
+# SCHEMA_CACHE_SIZE config on blueprint registration)
+schema_variants = LRUCache()
 
 
-def pagination_of_list(query_result, url, query_params):
+def schema_instance(schema_class, many=False, only=None, exclude=None):
+    """
+    Get cached schema instance with dumping parameters.
+
+    Instances are bound once (with nested schemas) and are used only for
+    dumping, so they can be shared between requests.
+
+    Required parameters:
+    schema_class (Schema) - class of marshmallow schema
+
+    Supported parameters:
+    many (Boolean) - serialize collection of objects (False by default)
+    only (List) - fields to dump (None by default)
+    exclude (List) - fields to skip in dump (None by default)
+    """
+    only = frozenset(only) if only is not None else None
+    exclude = frozenset(exclude) if exclude else frozenset()
+
+    key = (schema_class, bool(many), only, exclude)
+    schema = schema_variants.get(key)
+    if schema is None:
+        schema = schema_class(
+            many=bool(many),
+            only=tuple(sorted(only)) if only is not None else None,
+            exclude=tuple(sorted(exclude))
+        )
+        # Resolve nested schemas at once, not in first dump
+        for field in schema.fields.values():
+            getattr(field, 'schema', None)
+        schema_variants.set(key, schema)
+
+    return schema
+
+
+def relationship_loaders(model, schema, parent=None):
+    """
+    Get loader options of model relationships, dumped by schema.
+
+    Dumped relationships (except dynamic) are loaded by one «SELECT ... IN»
+    query per relationship for all objects of query, relationships not
+    dumped by schema are not loaded. Relationships of nested schemas are
+    loaded the same way (chained to loader of parent relationship).
+
+    Required parameters:
+    model (Model) - database model of query
+    schema (Schema) - schema instance with dumping parameters
+
+    Supported parameters:
+    parent (Load) - loader option of relationship with nested schema
+    """
+    loaders = []
+    for relationship in inspect(model).relationships:
+        field = schema.dump_fields.get(relationship.key)
+        if field is None or relationship.lazy == 'dynamic':
+            continue
+        attribute = getattr(model, relationship.key)
+        loader = parent.selectinload(attribute) if parent else \
+            selectinload(attribute)
+        loaders.append(loader)
+        if isinstance(field, fields.Nested):
+            loaders.extend(relationship_loaders(
+                relationship.mapper.class_, field.schema, loader
+            ))
+
+    return loaders
+
+
+def schema_dump(schema, obj):
+    """
+    Dump object (or collection) by schema.
+
+    If COMPILED_DUMP is enabled in config, compiled dumping function is used
+    for supported schemas.
+
+    Required parameters:
+    schema (Schema) - schema instance with dumping parameters
+    obj (Object) - object or collection of objects to dump
+    """
+    if app.config.get('COMPILED_DUMP', False):
+        return compiled_dump(schema, obj)
+
+    return schema.dump(obj)
+
+
+def query_model(query):
+    """Get model class of the primary entity of query."""
+    return query.column_descriptions[0]['entity']
+
+
+Cursor = namedtuple(
+    typename="Cursor",
+    field_names=["keys", "values"]
+)
+
+
+def cursor_encode(values):
+    """Encode ordering key values of the last row to opaque cursor token."""
+    def typed(value):
+        if isinstance(value, datetime):
+            return {'dt': value.isoformat()}
+        if isinstance(value, date):
+            return {'d': value.isoformat()}
+        return value
+
+    return base64.urlsafe_b64encode(
+        json.dumps([typed(x) for x in values]).encode('utf-8')
+    ).decode('ascii').rstrip('=')
+
+
+def cursor_decode(token):
+    """Decode cursor token to list of ordering key values."""
+    def typed(value):
+        if isinstance(value, dict) and 'dt' in value:
+            return datetime.fromisoformat(value['dt'])
+        if isinstance(value, dict) and 'd' in value:
+            return date.fromisoformat(value['d'])
+        return value
+
+    token = token.strip()
+    values = json.loads(base64.urlsafe_b64decode(
+        token + '=' * (-len(token) % 4)
+    ).decode('utf-8'))
+    if not isinstance(values, list):
+        raise ValueError(token)
+
+    return [typed(x) for x in values]
+
+
+def pagination_cursor_converter(model, order_parameters=[], cursor=None):
+    """
+    Cursor converter for keyset pagination.
+
+    Returns None, if cursor is not requested, else Cursor with ordering keys
+    (column, attribute name, descending flag) and decoded values of the last
+    seen row (None for first page). Primary key is always the last key.
+
+    Supported parameters:
+    model (Model) - Model for which translate cursor
+    order_parameters (List) - List of orderings, converted by
+    sqlalchemy_orders_converter
+    cursor (String) - Cursor token obtained from the request
+    """
+    if cursor is None:
+        return None
+
+    mapper = inspect(model)
+    keys = []
+    for order in (order_parameters or []):
+        column = order.element
+        keys.append((
+            column,
+            mapper.get_property_by_column(column).key,
+            order.modifier is operators.desc_op
+        ))
+    keys.append((model.id, 'id', False))
+
+    if not cursor.strip():
+        return Cursor(keys, None)
+
+    try:
+        values = cursor_decode(cursor)
+    except Exception:
+        values = None
+    if values is None or len(values) != len(keys):
+        raise Exception(json_http_response(
+            status=400,
+            given_message=_(
+                "Invalid cursor «%(cursor)s» from parameter «&cursor=» (cursor"
+                " is damaged or was issued for another ordering)",
+                cursor=cursor
+            ),
+            dbg=request.args.get('dbg', False)
+        ))
+
+    return Cursor(keys, values)
+
+
+def cursor_seek_predicate(cursor):
+    """
+    Seek predicate for rows following the cursor.
+
+    For keys (k1, k2, ..., id) forms condition «k1 after v1 OR (k1 = v1 AND
+    k2 after v2) OR ...», where «after» respects direction of ordering and
+    MySQL NULL ordering (NULLs first in ascending order).
+    """
+    def equal(column, value):
+        return column.is_(None) if value is None else column == value
+
+    def after(column, descending, value):
+        if not descending:
+            return column.isnot(None) if value is None else column > value
+        if value is None:
+            return false()
+        return or_(column < value, column.is_(None))
+
+    conditions = []
+    for i, (column, key, descending) in enumerate(cursor.keys):
+        value = cursor.values[i]
+        conditions.append(and_(
+            *[
+                equal(c, v) for (c, k, d), v in
+                zip(cursor.keys[:i], cursor.values[:i])
+            ],
+            after(column, descending, value)
+        ))
+
+    return or_(*conditions)
+
+
+RecordsCount = namedtuple(
+    typename="RecordsCount",
+    field_names=["value", "mode"]
+)
+
+COUNT_MODES = ('exact', 'cached', 'estimate', 'none')
+
+counts_cache = TTLCache(maxsize=1024)
+subscribe('structure', counts_cache.clear)
+subscribe('modules', counts_cache.clear)
+
+
+def records_count(query, url, query_params):
+    """
+    Count of query records by strategy from «&count=» parameter.
+
+    Strategies:
+    exact - COUNT(*) query
+    cached - COUNT(*) query result, cached for COUNT_CACHE_TTL seconds by URL
+    and normalized filters string
+    estimate - rows count from InnoDB table statistics (just for queries
+    without conditions, else falls back to «cached»)
+    none - do not count records
+
+    Unknown strategy is replaced by COUNT_MODE from config. Returns
+    RecordsCount with value and strategy, which really produced it.
+
+    Required parameters:
+    query - filtered query (not executed)
+    url - URL API for cache key
+    query_params - parameters, sended with query
+    """
+    mode = query_params.get('count', app.config.get('COUNT_MODE', 'exact'))
+    if mode not in COUNT_MODES:
+        mode = app.config.get('COUNT_MODE', 'exact')
+
+    if mode == 'none':
+        return RecordsCount(None, mode)
+
+    if mode == 'estimate':
+        if query.whereclause is None:
+            try:
+                estimate = db.session.execute(
+                    text(
+                        "SELECT TABLE_ROWS FROM information_schema.TABLES"
+                        " WHERE TABLE_SCHEMA = DATABASE()"
+                        " AND TABLE_NAME = :table"
+                    ),
+                    {'table': query_model(query).__tablename__}
+                ).scalar()
+            except Exception:
+                db.session.rollback()
+                estimate = None
+            if estimate is not None:
+                return RecordsCount(int(estimate), mode)
+            mode = 'exact'
+        else:
+            mode = 'cached'
+
+    if mode == 'cached':
+        filters = query_params.get('filters') or ''
+        key = (url, ','.join(sorted(
+            x.strip() for x in filters.split(",") if x.strip()
+        )))
+        value = counts_cache.get(key)
+        if value is None:
+            value = query.order_by(None).count()
+            counts_cache.set(
+                key, value, ttl=app.config.get('COUNT_CACHE_TTL', 60)
+            )
+        return RecordsCount(value, mode)
+
+    return RecordsCount(query.order_by(None).count(), 'exact')
+
+
+def envelope_links(schema):
+    """
+    Links moved from rows of page to paginated response envelope.
+
+    If «&envelope_links=true» is passed, links which are the same for all
+    rows (collection) are not dumped in every row and returned for envelope.
+    Returns None if parameter is not passed.
+
+    Required parameters:
+    schema - schema (with many=True) for dumping of page rows
+    """
+    try:
+        requested = strtobool(request.args.get('envelope_links', 'false'))
+    except ValueError:
+        requested = False
+    if not requested:
+        return None
+
+    request.environ['app.envelope_links'] = True
+
+    links = {}
+    for field in schema.dump_fields.values():
+        if isinstance(field, TemplatedHyperlinks):
+            links.update(field.envelope_links())
+
+    return links
+
+
+def pagination_of_list(query, url, query_params, schema, cursor=None):
     """
     Pagination of query results.
 
+    Only one page of rows is fetched from database (with LIMIT/OFFSET) and
+    dumped by schema, records count is taken by separate query with strategy
+    from «&count=» parameter (see records_count).
+    If cursor is passed, keyset pagination is used instead of offset: page
+    starts right after the row, encoded in cursor, so fetch time does not
+    depend on page depth.
+
     Required parameters:
-    query_result - result of query in json dictionary
+    query - filtered and ordered query (not executed)
     url - URL API for links generation
     query_params - parameters, sended with query
+    schema - schema (with many=True) for dumping of page rows
+
+    Supported parameters:
+    cursor (Cursor) - result of pagination_cursor_converter (None by default)
     """
+    if cursor is not None:
+        return cursor_pagination_of_list(
+            query, url, query_params, schema, cursor
+        )
+
     start = query_params.get('start', 1)
     limit = query_params.get('limit', app.config['LIMIT'])
 
@@ -595,14 +1132,15 @@ def pagination_of_list(query_result, url, query_params):
                 i, query_params.get(i).replace(' ', '+')
             )
 
-    records_count = len(query_result)
+    count = records_count(query, url, query_params)
+    records_count_value = count.value
 
     if not isinstance(start, int):
         try:
             start = int(start)
         except ValueError:
             start = 1
-    elif start < 1:
+    if start < 1:
         start = 1
 
     if not isinstance(limit, int):
@@ -610,22 +1148,34 @@ def pagination_of_list(query_result, url, query_params):
             limit = int(limit)
         except ValueError:
             limit = app.config['LIMIT']
-    elif limit < 1:
+    if limit < 1:
         limit = app.config['LIMIT']
 
-    if records_count < start and records_count != 0:
-        start = records_count
-    elif records_count < start and records_count <= 0:
-        start = 1
+    # Exact count allows to move start to the last record
+    if count.mode == 'exact':
+        if records_count_value < start and records_count_value != 0:
+            start = records_count_value
+        elif records_count_value < start and records_count_value <= 0:
+            start = 1
+
+    # Query only page rows (primary key added to ordering for stable pages)
+    # and one row more than limit to know if there is a next page
+    page = query.order_by(query_model(query).id).offset(
+        start - 1
+    ).limit(limit + 1).all()
 
     response_obj = {}
     response_obj['start'] = start
     response_obj['limit'] = limit
-    response_obj['itemsCount'] = records_count
+    response_obj['itemsCount'] = records_count_value
+    response_obj['itemsCountMode'] = count.mode
     response_obj['currentPage'] = math.floor((start - 1) / limit) + 1
 
-    pages_count = math.ceil(records_count / limit)
-    response_obj['pages'] = pages_count if pages_count > 0 else 1
+    if records_count_value is None:
+        response_obj['pages'] = None
+    else:
+        pages_count = math.ceil(records_count_value / limit)
+        response_obj['pages'] = pages_count if pages_count > 0 else 1
 
     # Creating URL to previous page
     if start == 1:
@@ -643,7 +1193,7 @@ def pagination_of_list(query_result, url, query_params):
         response_obj['previousPage'] = new_url
 
     # Creating URL to next page
-    if start + limit > records_count:
+    if len(page) <= limit:
         response_obj['nextPage'] = ''
     else:
         start_copy = start + limit
@@ -656,12 +1206,141 @@ def pagination_of_list(query_result, url, query_params):
                           params)
         response_obj['nextPage'] = new_url
 
-    # Query results cutting to limit
-    response_obj['pageData'] = query_result[(start - 1):(start - 1 + limit)]
+    links = envelope_links(schema)
+    if links is not None:
+        response_obj['links'] = links
+    response_obj['pageData'] = schema_dump(schema, page[:limit])
+
+    return response_obj
+
+
+def cursor_pagination_of_list(query, url, query_params, schema, cursor):
+    """
+    Keyset pagination of query results.
+
+    Required parameters:
+    query - filtered and ordered query (not executed)
+    url - URL API for links generation
+    query_params - parameters, sended with query
+    schema - schema (with many=True) for dumping of page rows
+    cursor (Cursor) - result of pagination_cursor_converter
+    """
+    limit = query_params.get('limit', app.config['LIMIT'])
+
+    query_params_string = ''
+
+    for i in query_params:
+        if i not in ('start', 'limit', 'cursor'):
+            query_params_string += '&%s=%s' % (
+                i, query_params.get(i).replace(' ', '+')
+            )
+
+    if not isinstance(limit, int):
+        try:
+            limit = int(limit)
+        except ValueError:
+            limit = app.config['LIMIT']
+    if limit < 1:
+        limit = app.config['LIMIT']
+
+    count = records_count(query, url, query_params)
+
+    # Query one row more than limit to know if there is a next page
+    page_query = query.order_by(query_model(query).id)
+    if cursor.values is not None:
+        page_query = page_query.filter(cursor_seek_predicate(cursor))
+    page = page_query.limit(limit + 1).all()
+
+    response_obj = {}
+    response_obj['limit'] = limit
+    response_obj['itemsCount'] = count.value
+    response_obj['itemsCountMode'] = count.mode
+    response_obj['cursor'] = query_params.get('cursor', '')
+    response_obj['previousPage'] = ''
+
+    # Creating URL to next page with cursor of the last row on page
+    if len(page) > limit:
+        page = page[:limit]
+        next_cursor = cursor_encode(
+            [getattr(page[-1], key) for column, key, d in cursor.keys]
+        )
+        params = '?cursor=%s&limit=%d%s' % (
+            next_cursor,
+            limit,
+            query_params_string
+        )
+        response_obj['nextCursor'] = next_cursor
+        response_obj['nextPage'] = urljoin(url, params)
+    else:
+        response_obj['nextCursor'] = ''
+        response_obj['nextPage'] = ''
+
+    links = envelope_links(schema)
+    if links is not None:
+        response_obj['links'] = links
+    response_obj['pageData'] = schema_dump(schema, page)
 
     return response_obj
 
 
+def ndjson_requested():
+    """Check if rows stream in NDJSON format is requested."""
+    if request.args.get('format') == 'ndjson':
+        return True
+    return request.accept_mimetypes.best_match(
+        ['application/json', 'application/x-ndjson']
+    ) == 'application/x-ndjson'
+
+
+def ndjson_response(query, schema, order_by=None, cursor=None):
+    """
+    Streaming of all query rows in NDJSON format (one json object per line).
+
+    Rows are fetched by chunks of NDJSON_CHUNK_SIZE rows with keyset seek
+    predicate (like cursor pagination), each chunk is dumped by schema and
+    sent to client, so memory usage does not depend on table size.
+
+    Required parameters:
+    query - filtered and ordered query (not executed)
+    schema - schema (with many=True) for dumping of rows
+
+    Supported parameters:
+    order_by (List) - List of orderings, converted by
+    sqlalchemy_orders_converter (None by default)
+    cursor (Cursor) - result of pagination_cursor_converter, to continue
+    stream after row (None by default)
+    """
+    model = query_model(query)
+    chunk_size = app.config.get('NDJSON_CHUNK_SIZE', 500)
+    if cursor is None:
+        cursor = pagination_cursor_converter(model, order_by, '')
+
+    def generate(cursor):
+        while True:
+            chunk_query = query.order_by(model.id)
+            if cursor.values is not None:
+                chunk_query = chunk_query.filter(
+                    cursor_seek_predicate(cursor)
+                )
+            rows = chunk_query.limit(chunk_size).all()
+
+            for row in schema_dump(schema, rows):
+                yield json_encode(row) + b'\n'
+
+            if len(rows) < chunk_size:
+                break
+            cursor = Cursor(
+                cursor.keys,
+                [getattr(rows[-1], key) for column, key, d in cursor.keys]
+            )
+
+    return Response(
+        stream_with_context(generate(cursor)),
+        status=200,
+        mimetype='application/x-ndjson'
+    )
+
+
 def variable_type_check(value, type):
     """Variable type check and convert."""
     TypeCheck = namedtuple(
@@ -6,7 +6,7 @@ libraries instances creation.
 """
 
 import os
-from flask import Flask, request
+from flask import Flask, request, has_request_context
 from flask_bcrypt import Bcrypt
 from flask_babel import Babel
 from flask_cors import CORS
@@ -33,6 +33,8 @@ from .API.v1_0_0.blueprint import APIv1_0_0  # noqa: E402
 
 app.register_blueprint(APIv1_0_0, url_prefix='/API/v1.0.0')
 
+from . import commands  # noqa: F401, E402
+
 
 @babel.localeselector
 def get_locale():
@@ -40,6 +42,10 @@ def get_locale():
     language = None
     languages = app.config['LANGUAGES']
 
+    # 6. Default language outside of requests (CLI commands)
+    if not has_request_context():
+        return language
+
     # 5. Take language from AcceptLanguages Header or request
     language = request.accept_languages.best_match(languages)
 
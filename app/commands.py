@@ -0,0 +1,325 @@
+"""
+Command line interface.
+
+Flask CLI commands of application (run as «flask <group> <command>»).
+"""
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import select
+
+from app import app, db
+from app.models import OrganizationalStructure
+from app.API.v1_0_0.nested_sets import TreeError, check_tree, key_rows, \
+    load_tree, rebuild_tree, synthetic_tree
+from app.API.v1_0_0.closure import closure_enabled, rebuild_closure, \
+    insert_element, move_element
+from app.API.v1_0_0.structure_tree import subtree, ancestors
+from app.API.v1_0_0.invalidation import publish
+from app.API.v1_0_0.outbox import run_worker, outbox_stats
+from app.API.v1_0_0.mail_pool import smtp_pool
+from app.API.v1_0_0.reverification import sweep
+
+import random
+import time
+
+structure_cli = AppGroup(
+    'structure', help='Organizational structure maintenance.'
+)
+mail_cli = AppGroup('mail', help='Outbox of mails.')
+
+
+@structure_cli.command('check')
+@click.option(
+    '--limit', default=20, show_default=True,
+    help='Maximal count of listed problems.'
+)
+def structure_check(limit):
+    """Check nested sets keys of organizational structure."""
+    started = time.perf_counter()
+    report = check_tree(key_rows(), limit=limit)
+    elapsed = time.perf_counter() - started
+
+    for problem in report['problems']:
+        click.echo(
+            'Element %(id)s: %(problem)s (expected %(expected)s,'
+            ' found %(value)s)' % problem
+        )
+    click.echo('Checked %s elements in %.3f s, problems: %s' % (
+        report['checked'], elapsed, report['problemsCount']
+    ))
+    if report['problemsCount'] and closure_enabled():
+        click.echo(
+            'Closure table index is enabled: nested sets keys are rebuilt'
+            ' on demand by «flask structure rebuild»'
+        )
+    if report['problemsCount']:
+        raise SystemExit(1)
+
+
+@structure_cli.command('rebuild')
+@click.option(
+    '--dry-run', is_flag=True,
+    help='Roll back changes and only report them.'
+)
+def structure_rebuild(dry_run):
+    """Rebuild nested sets keys of organizational structure from parents."""
+    started = time.perf_counter()
+    tree = load_tree()
+    loaded = time.perf_counter()
+    try:
+        result = rebuild_tree(tree)
+    except TreeError as error:
+        db.session.rollback()
+        raise click.ClickException(error.message)
+    written = time.perf_counter()
+
+    if dry_run:
+        db.session.rollback()
+    else:
+        db.session.commit()
+        publish('structure')
+    finished = time.perf_counter()
+
+    click.echo(
+        '%s elements, %s rows %s; load %.3f s, rebuild and write %.3f s,'
+        ' %s %.3f s' % (
+            len(tree.elements), result['updated'],
+            'to update' if dry_run else 'updated',
+            loaded - started, written - loaded,
+            'rollback' if dry_run else 'commit', finished - written
+        )
+    )
+
+
+@structure_cli.command('benchmark')
+@click.option(
+    '--count', default=100000, show_default=True,
+    help='Count of elements of synthetic tree.'
+)
+def structure_benchmark(count):
+    """Time check and rebuild of synthetic tree in memory."""
+    started = time.perf_counter()
+    tree = synthetic_tree(count)
+    built = time.perf_counter()
+    tree.renumber()
+    renumbered = time.perf_counter()
+    rows = sorted(tree.elements.values(), key=lambda row: row['lft'])
+    ordered = time.perf_counter()
+    report = check_tree(rows)
+    checked = time.perf_counter()
+
+    click.echo(
+        '%s elements: build %.3f s, rebuild %.3f s, order %.3f s,'
+        ' check %.3f s, problems: %s' % (
+            count, built - started, renumbered - built, ordered - renumbered,
+            checked - ordered, report['problemsCount']
+        )
+    )
+
+
+@structure_cli.command('closure')
+def structure_closure():
+    """Fill closure table index of organizational structure."""
+    started = time.perf_counter()
+    count = rebuild_closure(load_tree())
+    db.session.commit()
+    publish('structure')
+
+    click.echo('%s rows of closure table are inserted in %.3f s' % (
+        count, time.perf_counter() - started
+    ))
+
+
+def structure_mix(operations, reads, seed):
+    """
+    Run random mix of writes and reads of structure (without commit).
+
+    Nested sets keys are rebuilt (and closure table index is filled, if it
+    is enabled) before the mix. Writes are inserts and moves in equal parts,
+    every write is followed by reads of subtrees and paths to root in equal
+    parts. Returns durations (in seconds) by kinds of operations.
+    """
+    rebuild_tree(load_tree())
+    table = OrganizationalStructure.__table__
+    parents = dict(db.session.execute(
+        select(table.c.id, table.c.parent_id).order_by(table.c.id)
+    ).fetchall())
+    keys = list(parents)
+    generator = random.Random(seed)
+    durations = {'insert': [], 'move': [], 'subtree': [], 'path': []}
+
+    def inside(key, ancestor_key):
+        while key is not None:
+            if key == ancestor_key:
+                return True
+            key = parents[key]
+
+        return False
+
+    for number in range(operations):
+        if number % 2 == 0:
+            kind = 'insert'
+            parent = OrganizationalStructure.query.get(generator.choice(keys))
+            started = time.perf_counter()
+            if closure_enabled():
+                key = insert_element(parent, name='Benchmark', type=1)
+            else:
+                element = OrganizationalStructure(
+                    parent_id=parent.id, name='Benchmark', type=1
+                )
+                db.session.add(element)
+                db.session.flush()
+                key = element.id
+            keys.append(key)
+        else:
+            kind = 'move'
+            key = generator.choice(keys)
+            while parents[key] is None:
+                key = generator.choice(keys)
+            target_key = generator.choice(keys)
+            while inside(target_key, key) or target_key == parents[key]:
+                target_key = generator.choice(keys)
+            element = OrganizationalStructure.query.get(key)
+            target = OrganizationalStructure.query.get(target_key)
+            started = time.perf_counter()
+            if closure_enabled():
+                move_element(element, target, 'inside')
+            else:
+                element.move_inside(target.id)
+                db.session.flush()
+            parent = target
+        durations[kind].append(time.perf_counter() - started)
+        parents[key] = parent.id
+
+        for sample in range(reads):
+            element = OrganizationalStructure.query.get(
+                generator.choice(keys)
+            )
+            started = time.perf_counter()
+            if sample % 2 == 0:
+                subtree(element, lambda element: {}, users=False)
+                kind = 'subtree'
+            else:
+                ancestors(element, users=False)
+                kind = 'path'
+            durations[kind].append(time.perf_counter() - started)
+
+    return durations
+
+
+@structure_cli.command('compare')
+@click.option(
+    '--operations', default=100, show_default=True,
+    help='Count of writes (inserts and moves in equal parts).'
+)
+@click.option(
+    '--reads', default=10, show_default=True,
+    help='Count of reads (subtrees and paths in equal parts) per write.'
+)
+@click.option(
+    '--seed', default=0, show_default=True,
+    help='Seed of random generator.'
+)
+def structure_compare(operations, reads, seed):
+    """Time writes and reads of nested sets and closure table."""
+    # The same mix is run for both representations on database of
+    # application, changes are rolled back
+    enabled = app.config.get('STRUCTURE_CLOSURE_INDEX', False)
+    try:
+        for representation in ('nestedSets', 'closure'):
+            app.config['STRUCTURE_CLOSURE_INDEX'] = \
+                representation == 'closure'
+            try:
+                durations = structure_mix(operations, reads, seed)
+            except TreeError as error:
+                raise click.ClickException(error.message)
+            finally:
+                db.session.rollback()
+
+            click.echo('%s: %s; total %.3f s' % (
+                representation,
+                ', '.join(
+                    '%s %.3f ms' % (
+                        kind, sum(values) / len(values) * 1000
+                    )
+                    for kind, values in durations.items() if values
+                ),
+                sum(sum(values) for values in durations.values())
+            ))
+    finally:
+        app.config['STRUCTURE_CLOSURE_INDEX'] = enabled
+
+
+@mail_cli.command('worker')
+@click.option(
+    '--once', is_flag=True,
+    help='Send one batch of due mails and exit.'
+)
+@click.option(
+    '--batch', default=None, type=int,
+    help='Maximal count of mails in batch (MAIL_OUTBOX_BATCH by default).'
+)
+@click.option(
+    '--interval', default=None, type=float,
+    help='Pause in seconds without due mails'
+    ' (MAIL_OUTBOX_POLL_INTERVAL by default).'
+)
+def mail_worker(once, batch, interval):
+    """Send mails of outbox with retries."""
+    def report(result):
+        pool = smtp_pool.stats()
+        click.echo(
+            '%s: sent %s, retried %s, failed %s; connections opened %s,'
+            ' handshakes saved %s' % (
+                time.strftime('%Y-%m-%d %H:%M:%S'), result['sent'],
+                result['retried'], result['failed'], pool['opened'],
+                pool['handshakesSaved']
+            )
+        )
+
+    totals = run_worker(
+        interval=interval, limit=batch, once=once, report=report
+    )
+    if once and not any(totals.values()):
+        click.echo('No due mails in outbox')
+
+
+@mail_cli.command('stats')
+def mail_stats():
+    """Show counts of mails in outbox by statuses."""
+    stats = outbox_stats()
+    click.echo('pending %(pending)s, sent %(sent)s, failed %(failed)s' % stats)
+    if stats['oldestPendingSeconds'] is not None:
+        click.echo(
+            'oldest pending mail: %s s' % stats['oldestPendingSeconds']
+        )
+
+
+@mail_cli.command('reverify')
+@click.option(
+    '--dry-run', is_flag=True,
+    help='Only count emails in renewal window.'
+)
+@click.option(
+    '--chunk', default=None, type=int,
+    help='Count of mails committed at once'
+    ' (USER_MAIL_RENEW_CHUNK by default).'
+)
+@click.option(
+    '--limit', default=None, type=int,
+    help='Maximal count of selected emails.'
+)
+def mail_reverify(dry_run, chunk, limit):
+    """Queue renewal reminders of emails in renewal window."""
+    stats = sweep(dry_run=dry_run, chunk=chunk, limit=limit)
+
+    click.echo(
+        'selected %(selected)s, already reminded %(alreadyReminded)s,'
+        ' due %(due)s, queued %(queued)s in %(chunks)s chunks;'
+        ' %(seconds).3f s, %(perSecond)s mails/s' % stats
+    )
+
+
+app.cli.add_command(structure_cli)
+app.cli.add_command(mail_cli)
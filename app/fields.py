@@ -0,0 +1,149 @@
+"""
+Serialization fields.
+
+Custom fields of marshmallow schemas.
+"""
+
+from flask import request, url_for
+from flask_marshmallow.fields import Hyperlinks, URLFor
+from marshmallow import missing
+from marshmallow.utils import get_value
+
+import re
+
+# Integer substituted instead of attribute value in links templates
+LINK_SENTINEL = 7310597315059
+
+# Attribute placeholder in values of links («<id>»)
+ATTRIBUTE_PATTERN = re.compile(r'\s*<\s*(\S*)\s*>\s*')
+
+
+def template_attribute(value):
+    """Get attribute name of link value placeholder (None for constant)."""
+    match = ATTRIBUTE_PATTERN.match(str(value))
+
+    return match.group(1) if match else None
+
+
+def link_value(link, attr, obj):
+    """
+    Serialize link (or dictionary or list of links) without template.
+
+    Required parameters:
+    link (Object) - URLFor field, constant value or collection of them
+    attr (String) - name of links field
+    obj (Object) - serialized object
+    """
+    if isinstance(link, (tuple, list)):
+        return [link_value(item, attr, obj) for item in link]
+    if isinstance(link, dict):
+        return {
+            name: link_value(item, attr, obj) for name, item in link.items()
+        }
+    if isinstance(link, URLFor):
+        return link.serialize(attr, obj)
+
+    return link
+
+
+def link_template(urlfor):
+    """
+    Get URL template of link (must be formed in request context).
+
+    Returns tuple of attribute name (None for link without attributes),
+    URL prefix and suffix. Returns None if link can't be formed from template
+    (attribute is not single or URL has not single substitution place).
+    """
+    attributes = [
+        (name, template_attribute(value))
+        for name, value in urlfor.values.items()
+        if template_attribute(value)
+    ]
+    if not attributes:
+        return None, url_for(urlfor.endpoint, **urlfor.values), ''
+    if len(attributes) != 1 or '.' in attributes[0][1]:
+        return None
+
+    name, attribute = attributes[0]
+    values = dict(urlfor.values)
+    values[name] = LINK_SENTINEL
+    url = url_for(urlfor.endpoint, **values)
+    if url.count(str(LINK_SENTINEL)) != 1:
+        return None
+
+    prefix, suffix = url.split(str(LINK_SENTINEL))
+
+    return attribute, prefix, suffix
+
+
+class TemplatedHyperlinks(Hyperlinks):
+    """
+    Hyperlinks field with links formed from URL templates.
+
+    URL templates are built once per request and attribute value is
+    substituted in template for every object. Links without attributes
+    (listed in envelope parameter) are not dumped, if envelope links flag is
+    set for request, and can be added once to paginated response.
+
+    Supported parameters:
+    schema (Dictionary) - links by names, as in Hyperlinks field
+    envelope (Tuple) - names of links, which can be moved to envelope
+    """
+
+    def __init__(self, schema, envelope=(), **kwargs):
+        """Class constructor."""
+        super().__init__(schema, **kwargs)
+        self.envelope = tuple(envelope)
+
+    def templates(self):
+        """List of links names, links and templates for current request."""
+        # Templates are kept in environment of request (not in application
+        # context globals, which can outlive request)
+        enveloped = request.environ.get('app.envelope_links', False)
+        cache = request.environ.setdefault('app.link_templates', {})
+        key = (id(self), enveloped)
+        if key not in cache:
+            cache[key] = [
+                (
+                    name,
+                    link,
+                    link_template(link) if isinstance(link, URLFor) else None
+                )
+                for name, link in self.schema.items()
+                if not (enveloped and name in self.envelope)
+            ]
+
+        return cache[key]
+
+    def envelope_links(self):
+        """Get dictionary of links, which can be moved to envelope."""
+        links = {}
+        for name in self.envelope:
+            link = self.schema.get(name)
+            template = (
+                link_template(link) if isinstance(link, URLFor) else None
+            )
+            if template is not None and template[0] is None:
+                links[name] = template[1]
+
+        return links
+
+    def _serialize(self, value, attr, obj):
+        ret = {}
+        for name, link, template in self.templates():
+            if template is None:
+                ret[name] = link_value(link, attr, obj)
+                continue
+            attribute, prefix, suffix = template
+            if attribute is None:
+                ret[name] = prefix
+                continue
+            attribute_value = get_value(obj, attribute, default=missing)
+            if attribute_value is None:
+                ret[name] = None
+            elif type(attribute_value) is int:
+                ret[name] = prefix + str(attribute_value) + suffix
+            else:
+                ret[name] = link.serialize(attr, obj)
+
+        return ret
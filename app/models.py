@@ -70,6 +70,46 @@ class OrganizationalStructure(db.Model, BaseNestedSets):
         return 'Structure element «%r» of type «%r»' % (self.name, self.type)
 
 
+class OrganizationalStructureClosure(db.Model):
+    """
+    Organizational structure closure table model.
+
+    Optional hierarchy index: pairs of every element with all his ancestors
+    (and with itself) with distance between them.
+    """
+
+    __tablename__ = 'organizational_structure_closure'
+    # __table_args__ = {'schema': 'innerInformationSystem_System'}
+    ancestor_id = db.Column(
+        db.Integer,
+        db.ForeignKey(
+            'organizational_structure.id',
+            ondelete='CASCADE'
+        ),
+        primary_key=True,
+        comment="Предок"
+    )
+    descendant_id = db.Column(
+        db.Integer,
+        db.ForeignKey(
+            'organizational_structure.id',
+            ondelete='CASCADE'
+        ),
+        primary_key=True,
+        index=True,
+        comment="Потомок"
+    )
+    depth = db.Column(db.Integer, nullable=False, comment="Расстояние")
+
+    def __repr__(self):
+        """Class representation string."""
+        return 'Structure element %i is ancestor of %i at depth %i' % (
+            self.ancestor_id,
+            self.descendant_id,
+            self.depth
+        )
+
+
 class Users(db.Model):
     """System user model."""
 
@@ -101,14 +141,14 @@ class Users(db.Model):
     modules = db.relationship(
         'Modules',
         secondary=user_module,
-        lazy='subquery',
+        lazy='select',
         backref=db.backref('users', lazy=True)
     )
 
     structures = db.relationship(
         'OrganizationalStructure',
         secondary=user_structure,
-        lazy='subquery',
+        lazy='select',
         backref=db.backref('users', lazy=True)
     )
 
@@ -216,6 +256,13 @@ class Emails(db.Model):
 
     __tablename__ = 'emails'
     # __table_args__ = {'schema': 'innerInformationSystem_System'}
+    __table_args__ = (
+        db.Index(
+            'emails_verify_active_until_idx',
+            'verify',
+            'active_until'
+        ),
+    )
     id = db.Column(
         db.Integer,
         primary_key=True,
@@ -305,3 +352,146 @@ class Passwords(db.Model):
             self.value,
             self.user_id
         )
+
+
+class CacheGenerations(db.Model):
+    """
+    Generations of cached data model.
+
+    Generation of channel is incremented on every change of data, cached by
+    application processes (for caches invalidation in all processes).
+    """
+
+    __tablename__ = 'cache_generations'
+    # __table_args__ = {'schema': 'innerInformationSystem_System'}
+    channel = db.Column(
+        db.String(50),
+        primary_key=True,
+        comment="Канал кэшируемых данных"
+    )
+    generation = db.Column(
+        db.BigInteger,
+        default=0,
+        nullable=False,
+        comment="Поколение данных"
+    )
+
+    def __repr__(self):
+        """Class representation string."""
+        return 'Cache generation %i of channel «%r»' % (
+            self.generation,
+            self.channel
+        )
+
+
+class MailOutbox(db.Model):
+    """
+    Outbox of mails model.
+
+    Mails are added by request handlers and sent by background worker
+    («flask mail worker» command) with retries.
+    """
+
+    __tablename__ = 'mail_outbox'
+    # __table_args__ = {'schema': 'innerInformationSystem_System'}
+    __table_args__ = (
+        db.Index(
+            'mail_outbox_status_next_attempt_idx',
+            'status',
+            'next_attempt_at'
+        ),
+        db.Index(
+            'mail_outbox_kind_created_at_idx',
+            'kind',
+            'created_at'
+        ),
+    )
+    id = db.Column(
+        db.Integer,
+        primary_key=True,
+        comment="Уникальный идентификатор"
+    )
+    kind = db.Column(db.String(50), nullable=False, comment="Вид письма")
+    recipient = db.Column(
+        db.String(100),
+        nullable=False,
+        comment="Адрес получателя"
+    )
+    subject = db.Column(db.String(255), nullable=False, comment="Тема")
+    html = db.Column(db.Text, nullable=False, comment="Содержимое")
+    status = db.Column(
+        db.String(10),
+        default='pending',
+        nullable=False,
+        comment="Статус отправки"
+    )
+    attempts = db.Column(
+        db.Integer,
+        default=0,
+        nullable=False,
+        comment="Количество попыток отправки"
+    )
+    next_attempt_at = db.Column(
+        db.DateTime,
+        default=datetime.now,
+        nullable=False,
+        comment="Время следующей попытки"
+    )
+    created_at = db.Column(
+        db.DateTime,
+        default=datetime.now,
+        nullable=False,
+        comment="Создано"
+    )
+    sent_at = db.Column(
+        db.DateTime,
+        default=None,
+        nullable=True,
+        comment="Отправлено"
+    )
+    last_error = db.Column(
+        db.String(255),
+        default=None,
+        nullable=True,
+        comment="Последняя ошибка отправки"
+    )
+
+    def __repr__(self):
+        """Class representation string."""
+        return 'Mail %i «%r» to «%r»' % (
+            self.id,
+            self.kind,
+            self.recipient
+        )
+
+
+class EmailDomains(db.Model):
+    """
+    Cached MX records of email domains model.
+
+    Results of DNS lookups by validation of emails, shared by all
+    application processes.
+    """
+
+    __tablename__ = 'email_domains'
+    # __table_args__ = {'schema': 'innerInformationSystem_System'}
+    domain = db.Column(
+        db.String(255),
+        primary_key=True,
+        comment="Домен почты"
+    )
+    mx_records = db.Column(
+        db.String(1024),
+        default='',
+        nullable=False,
+        comment="Почтовые серверы домена (пусто, если не найдены)"
+    )
+    expires_at = db.Column(
+        db.DateTime,
+        nullable=False,
+        comment="Срок хранения результата"
+    )
+
+    def __repr__(self):
+        """Class representation string."""
+        return 'MX records of domain «%r»' % (self.domain)
@@ -10,6 +10,8 @@ from app.models import OrganizationalStructure, Users, ModulesTypes, \
 
 from marshmallow_sqlalchemy import ModelSchema
 
+from app.fields import TemplatedHyperlinks
+
 
 class UsersBaseSchema(ModelSchema):
     """System user serialization schema."""
@@ -19,7 +21,7 @@ class UsersBaseSchema(ModelSchema):
 
         model = Users
 
-    links = ma.Hyperlinks(
+    links = TemplatedHyperlinks(
         {
             "self": ma.URLFor("APIv1_0_0.get_user", values=dict(
                 id="<id>", _external=True
@@ -27,7 +29,8 @@ class UsersBaseSchema(ModelSchema):
             "collection": ma.URLFor("APIv1_0_0.get_users", values=dict(
                 _external=True
             )),
-        }
+        },
+        envelope=("collection",)
     )
 
 
@@ -48,7 +51,7 @@ class OrganizationalStructureSchema(ModelSchema):
         many=True
     )
 
-    links = ma.Hyperlinks(
+    links = TemplatedHyperlinks(
         {
             "self": ma.URLFor(
                 "APIv1_0_0.get_organizational_structure_element",
@@ -62,7 +65,8 @@ class OrganizationalStructureSchema(ModelSchema):
                     _external=True
                 )
             ),
-        }
+        },
+        envelope=("collection",)
     )
 
 
@@ -85,7 +89,7 @@ class ModulesTypesSchema(ModelSchema):
 
     modules = ma.Nested(ModulesBaseSchema, many=True)
 
-    links = ma.Hyperlinks(
+    links = TemplatedHyperlinks(
         {
             "self": ma.URLFor(
                 "APIv1_0_0.get_modules_types_item",
@@ -99,7 +103,8 @@ class ModulesTypesSchema(ModelSchema):
                     _external=True
                 )
             ),
-        }
+        },
+        envelope=("collection",)
     )
 
 
@@ -111,7 +116,7 @@ class ModulesSchema(ModulesBaseSchema):
 
         model = Modules
 
-    links = ma.Hyperlinks(
+    links = TemplatedHyperlinks(
         {
             "self": ma.URLFor(
                 "APIv1_0_0.get_modules_item",
@@ -125,7 +130,8 @@ class ModulesSchema(ModulesBaseSchema):
                     _external=True
                 )
             ),
-        }
+        },
+        envelope=("collection",)
     )
     type = ma.Nested(ModulesTypesSchema(exclude=("modules",)))
     users = ma.Nested(UsersBaseSchema(exclude=("modules",), many=True))
@@ -139,7 +145,7 @@ class EmailsSchema(ModelSchema):
 
         model = Emails
 
-    links = ma.Hyperlinks(
+    links = TemplatedHyperlinks(
         {
             "self": ma.URLFor(
                 "APIv1_0_0.get_emails_item",
@@ -153,7 +159,8 @@ class EmailsSchema(ModelSchema):
                     _external=True
                 )
             ),
-        }
+        },
+        envelope=("collection",)
     )
     users = ma.Nested(UsersBaseSchema(exclude=("emails",)))
 
@@ -166,7 +173,7 @@ class PasswordsSchema(ModelSchema):
 
         model = Passwords
 
-    links = ma.Hyperlinks(
+    links = TemplatedHyperlinks(
         {
             "self": ma.URLFor(
                 "APIv1_0_0.get_passwords_item",
@@ -180,6 +187,7 @@ class PasswordsSchema(ModelSchema):
                     _external=True
                 )
             ),
-        }
+        },
+        envelope=("collection",)
     )
     users = ma.Nested(UsersBaseSchema(exclude=("passwords",)))
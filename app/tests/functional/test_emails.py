@@ -0,0 +1,90 @@
+"""Test emails validation."""
+
+from validate_email.exceptions import DomainNotFoundError, DNSTimeoutError
+from app import app, db
+from app.models import EmailDomains
+from app.API.v1_0_0.email_validation import validate_address, \
+    domain_records
+
+DOMAINS = ('corp.example', 'missing.example', 'slow.example')
+
+
+class FakeResolver:
+    """Local resolver of MX hosts, counting lookups."""
+
+    def __init__(self):
+        self.lookups = []
+
+    def __call__(self, domain, timeout):
+        self.lookups.append(domain)
+        if domain == 'missing.example':
+            raise DomainNotFoundError
+        if domain == 'slow.example':
+            raise DNSTimeoutError
+        return ['mx1.%s' % domain, 'mx2.%s' % domain]
+
+
+def test_validation_levels():
+    """Test MX records are cached in process and shared table."""
+    resolver = FakeResolver()
+    with app.app_context():
+        domain_records.clear()
+        syntax = [
+            validate_address(address, 'syntax', resolver)
+            for address in ('user@corp.example', 'user.corp.example')
+        ]
+        assert resolver.lookups == []
+
+        found = [
+            validate_address('user%s@corp.example' % number, 'mx', resolver)
+            for number in range(3)
+        ]
+        domain_records.clear()
+        shared = validate_address('other@CORP.example', 'mx', resolver)
+        missing = [
+            validate_address('user@missing.example', 'mx', resolver)
+            for number in range(2)
+        ]
+        slow = [
+            validate_address('user@slow.example', 'mx', resolver)
+            for number in range(2)
+        ]
+        stored = {
+            row.domain: row.mx_records
+            for row in EmailDomains.query.filter(
+                EmailDomains.domain.in_(DOMAINS)
+            )
+        }
+
+        EmailDomains.query.filter(EmailDomains.domain.in_(DOMAINS)).delete(
+            synchronize_session=False
+        )
+        db.session.commit()
+        domain_records.clear()
+
+    assert syntax == [True, False]
+    assert found == [True] * 3 and shared is True
+    assert missing == [False] * 2
+    assert slow == [None] * 2
+    assert resolver.lookups == [
+        'corp.example', 'missing.example', 'slow.example', 'slow.example'
+    ]
+    assert stored == {
+        'corp.example': 'mx1.corp.example,mx2.corp.example',
+        'missing.example': ''
+    }
+
+
+def test_unknown_validation_level():
+    """Test unknown level of checks is not treated as mx."""
+    resolver = FakeResolver()
+    with app.app_context():
+        try:
+            validate_address('user@corp.example', 'prob', resolver)
+        except ValueError:
+            rejected = True
+        else:
+            rejected = False
+
+    assert rejected
+    assert resolver.lookups == []
@@ -0,0 +1,217 @@
+"""Test outbox of mails."""
+
+from contextlib import contextmanager
+from aiosmtpd.controller import Controller
+from flask import render_template
+from app import app, db
+from app.models import Users, Emails, MailOutbox
+from app.API.v1_0_0.outbox import enqueue, deliver
+from app.API.v1_0_0.mail_pool import smtp_pool
+from app.API.v1_0_0.mail_templates import render_mail, mail_templates
+from app.API.v1_0_0.reverification import sweep, RENEWAL_KIND
+from datetime import datetime, timedelta
+
+import socket
+
+
+class RecordingHandler:
+    """SMTP handler, recording received envelopes."""
+
+    def __init__(self):
+        self.envelopes = []
+        self.sessions = set()
+
+    async def handle_DATA(self, server, session, envelope):
+        self.envelopes.append(envelope)
+        self.sessions.add(id(session))
+        return '250 OK'
+
+
+def free_port():
+    """Get free local TCP port."""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def local_mail_server(port):
+    """Point mail extension of application to local plain SMTP server."""
+    state = app.extensions['mail']
+    saved = {
+        key: getattr(state, key)
+        for key in ('server', 'port', 'use_ssl', 'use_tls', 'username',
+                    'password', 'suppress')
+    }
+    sender = app.config.get('MAIL_DEFAULT_SENDER')
+    app.config['MAIL_DEFAULT_SENDER'] = 'api@example.com'
+    state.server = '127.0.0.1'
+    state.port = port
+    state.use_ssl = state.use_tls = state.suppress = False
+    state.username = state.password = None
+    try:
+        yield state
+    finally:
+        for key, value in saved.items():
+            setattr(state, key, value)
+        app.config['MAIL_DEFAULT_SENDER'] = sender
+
+
+def test_outbox_delivery():
+    """Test mails are sent by worker and failed sending is postponed."""
+    handler = RecordingHandler()
+    port = free_port()
+    controller = Controller(handler, hostname='127.0.0.1', port=port)
+    controller.start()
+    try:
+        with app.app_context(), local_mail_server(port):
+            mails = enqueue(
+                'test', 'Outbox', '<p>Outbox</p>',
+                ['first@example.com', 'second@example.com']
+            )
+            db.session.commit()
+            ids = [item.id for item in mails]
+            sent = deliver()
+    finally:
+        controller.stop()
+
+    with app.app_context(), local_mail_server(free_port()):
+        mails = enqueue('test', 'Outbox', '<p>Outbox</p>', ['a@example.com'])
+        db.session.commit()
+        ids.append(mails[0].id)
+        failed = deliver()
+        repeated = deliver()
+        postponed = MailOutbox.query.get(mails[0].id)
+        attempts = postponed.attempts
+        status = postponed.status
+        MailOutbox.query.filter(MailOutbox.id.in_(ids)).delete(
+            synchronize_session=False
+        )
+        db.session.commit()
+
+    assert sent == {'sent': 2, 'retried': 0, 'failed': 0}
+    assert sorted(
+        recipient for envelope in handler.envelopes
+        for recipient in envelope.rcpt_tos
+    ) == ['first@example.com', 'second@example.com']
+    assert failed == {'sent': 0, 'retried': 1, 'failed': 0}
+    assert repeated == {'sent': 0, 'retried': 0, 'failed': 0}
+    assert (attempts, status) == (1, 'pending')
+
+
+def test_pooled_connections():
+    """Test batches reuse connections up to limit of mails per connection."""
+    handler = RecordingHandler()
+    port = free_port()
+    controller = Controller(handler, hostname='127.0.0.1', port=port)
+    controller.start()
+    config = {
+        key: app.config.get(key)
+        for key in ('MAIL_POOL_MAX_MESSAGES', 'MAIL_POOL_IDLE_TIMEOUT')
+    }
+    app.config['MAIL_POOL_MAX_MESSAGES'] = 3
+    app.config['MAIL_POOL_IDLE_TIMEOUT'] = 60
+    try:
+        with app.app_context(), local_mail_server(port):
+            before = smtp_pool.stats()
+            ids = []
+            for count in (7, 2):
+                mails = enqueue(
+                    'test', 'Pool', '<p>Pool</p>',
+                    ['pool%s@example.com' % number for number in range(count)]
+                )
+                db.session.commit()
+                ids += [item.id for item in mails]
+                assert deliver()['sent'] == count
+            after = smtp_pool.stats()
+            app.config['MAIL_POOL_IDLE_TIMEOUT'] = 0
+            enqueue('test', 'Pool', '<p>Pool</p>', ['idle@example.com'])
+            db.session.commit()
+            deliver()
+            smtp_pool.prune()
+            pruned = smtp_pool.stats()
+            MailOutbox.query.filter(MailOutbox.kind == 'test').delete(
+                synchronize_session=False
+            )
+            db.session.commit()
+    finally:
+        controller.stop()
+        app.config.update(config)
+
+    assert len(handler.sessions) == 4
+    assert after['opened'] - before['opened'] == 3
+    assert after['sent'] - before['sent'] == 9
+    assert after['closedByLimit'] - before['closedByLimit'] == 3
+    assert after['handshakesSaved'] - before['handshakesSaved'] == 6
+    assert pruned['idle'] == 0
+    assert pruned['closedIdle'] > after['closedIdle']
+
+
+def test_cached_mail_templates():
+    """Test cached rendering of templates is equal to rendering by Jinja."""
+    context = {
+        'confirm_url': 'http://client/email/verify/a?b=1&c=<"2">',
+        'active_time': '1 час'
+    }
+    with app.test_request_context():
+        expected = render_template('confirmation_mail.html', **context)
+        static = render_template('change_password.html')
+        hits = mail_templates.hits
+        rendered = [
+            render_mail('confirmation_mail.html', **context)
+            for number in range(3)
+        ]
+        cached_static = render_mail('change_password.html')
+        assert mail_templates.hits - hits >= 2
+    assert rendered == [expected] * 3
+    assert '&amp;c=&lt;&#34;2&#34;&gt;' in rendered[0]
+    assert cached_static == static
+
+
+def test_reverification_sweep():
+    """Test sweep queues one reminder per email in renewal window."""
+    with app.app_context():
+        user = Users.query.order_by(Users.id).first()
+        # Own emails with the earliest expiration are selected first, already
+        # expired email is skipped
+        now = datetime.now()
+        emails = [
+            Emails(
+                user_id=user.id,
+                value='sweep%s@example.com' % number,
+                type='test',
+                main=False,
+                verify=True,
+                active_until=now + timedelta(minutes=2 * number - 1)
+            )
+            for number in range(4)
+        ]
+        db.session.add_all(emails)
+        db.session.commit()
+        expired = emails[0].value
+        values = [email.value for email in emails]
+
+        counted = sweep(dry_run=True, limit=3)
+        queued = sweep(chunk=2, limit=3)
+        repeated = sweep(limit=3)
+        recipients = sorted(
+            item.recipient for item in MailOutbox.query.filter(
+                MailOutbox.kind == RENEWAL_KIND,
+                MailOutbox.recipient.in_(values)
+            )
+        )
+
+        MailOutbox.query.filter(
+            MailOutbox.kind == RENEWAL_KIND,
+            MailOutbox.recipient.in_(values)
+        ).delete(synchronize_session=False)
+        Emails.query.filter(Emails.value.in_(values)).delete(
+            synchronize_session=False
+        )
+        db.session.commit()
+
+    assert (counted['due'], counted['queued']) == (3, 0)
+    assert (queued['queued'], queued['chunks']) == (3, 2)
+    assert (repeated['queued'], repeated['alreadyReminded']) == (0, 3)
+    assert recipients == values[1:]
+    assert expired not in recipients
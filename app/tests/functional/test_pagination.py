@@ -0,0 +1,110 @@
+"""Test pagination of API collection routes."""
+
+import requests
+
+from flask import url_for
+from app import app
+from app.API.v1_0_0.caches import TTLCache
+
+
+def test_offset_pagination():
+    """Test offset pagination response shape."""
+    args = {}
+    args['start'] = 1
+    args['limit'] = 2
+
+    with app.test_request_context():
+        response = requests.get(
+            url_for(
+                'APIv1_0_0.get_users',
+                **args,
+                _external=True
+            ),
+            verify=False
+        )
+    assert response.status_code == 200
+    data = response.json()
+    for key in ('start', 'limit', 'itemsCount', 'currentPage', 'pages',
+                'previousPage', 'nextPage', 'pageData'):
+        assert key in data
+    assert len(data['pageData']) <= 2
+
+
+def test_cursor_pagination():
+    """Test keyset pagination walks the same rows as offset pagination."""
+    args = {}
+    args['order_by'] = 'login:desc'
+    args['columns'] = 'login'
+
+    with app.test_request_context():
+        expected = requests.get(
+            url_for(
+                'APIv1_0_0.get_users',
+                limit=1000,
+                **args,
+                _external=True
+            ),
+            verify=False
+        ).json()['pageData']
+
+        ids = []
+        url = url_for(
+            'APIv1_0_0.get_users',
+            cursor='',
+            limit=2,
+            **args,
+            _external=True
+        )
+        while url:
+            response = requests.get(url, verify=False)
+            assert response.status_code == 200
+            ids += [x['id'] for x in response.json()['pageData']]
+            url = response.json()['nextPage']
+    assert ids == [x['id'] for x in expected]
+
+
+def test_cursor_damaged():
+    """Test damaged cursor is rejected."""
+    with app.test_request_context():
+        response = requests.get(
+            url_for(
+                'APIv1_0_0.get_users',
+                cursor='damaged',
+                _external=True
+            ),
+            verify=False
+        )
+    assert response.status_code == 400
+
+
+def test_envelope_links():
+    """Test collection link is moved from rows to envelope."""
+    with app.test_request_context():
+        response = requests.get(
+            url_for(
+                'APIv1_0_0.get_users',
+                envelope_links='true',
+                limit=2,
+                _external=True
+            ),
+            verify=False
+        )
+        collection = url_for('APIv1_0_0.get_users', _external=True)
+    assert response.status_code == 200
+    data = response.json()
+    assert data['links'] == {'collection': collection}
+    for row in data['pageData']:
+        assert 'collection' not in row['links']
+        assert row['links']['self'].endswith('/users/%d' % row['id'])
+
+
+def test_counts_cache_bounded():
+    """Test cache of counts evicts least recently used filters."""
+    cache = TTLCache(ttl=60, maxsize=3)
+    for number in range(5):
+        cache.set(('url', 'id:>:%s' % number), number)
+        cache.get(('url', 'id:>:0'))
+    assert len(cache) == 3
+    assert cache.get(('url', 'id:>:0')) == 0
+    assert cache.get(('url', 'id:>:1')) is None
+    assert cache.get(('url', 'id:>:4')) == 4
@@ -0,0 +1,58 @@
+"""Test parity of compiled dumping with schemas dumping."""
+
+from datetime import date, datetime
+
+from flask import json
+from app import app
+from app.models import Users, Emails, Passwords, Modules, \
+    OrganizationalStructure
+from app.schemas import UsersBaseSchema, EmailsSchema, PasswordsSchema
+from app.API.v1_0_0.serializers import compiled_dump
+
+
+def transient_objects():
+    """Form not persisted objects with relations."""
+    user = Users(
+        id=7, login='parity', name='Name', surname='Surname',
+        patronymic=None, birth_date=date(1990, 1, 2), status=True
+    )
+    user.modules.append(Modules(id=3, name='Module'))
+    user.structures.append(OrganizationalStructure(id=5, name='Position'))
+    email = Emails(
+        id=11, value='parity@example.org', main=True, verify=False,
+        active_until=datetime(2030, 1, 2, 3, 4, 5), users=user
+    )
+    password = Passwords(
+        id=13, salt='salt', value='value', blocked=None, number_of_uses=2,
+        created_at=datetime(2020, 5, 6, 7, 8, 9), users=user
+    )
+    orphan = Emails(id=17, value='orphan@example.org', users=None)
+
+    return user, email, password, orphan
+
+
+def assert_parity(schema, obj):
+    """Compare JSON of compiled and usual dump."""
+    assert json.dumps(compiled_dump(schema, obj)) == json.dumps(
+        schema.dump(obj)
+    )
+
+
+def test_compiled_dump_parity():
+    """Test compiled dump output is identical to schema dump output."""
+    with app.test_request_context():
+        user, email, password, orphan = transient_objects()
+
+        for params in ({}, {'only': ('id', 'login', 'links')},
+                       {'exclude': ('emails', 'passwords')}):
+            assert_parity(UsersBaseSchema(**params), user)
+            assert_parity(UsersBaseSchema(many=True, **params), [user])
+
+        # Variants with the same top level fields and other nested fields
+        for params in ({}, {'only': ('id', 'value', 'users.login')},
+                       {'only': ('id', 'value', 'users')}):
+            assert_parity(EmailsSchema(**params), email)
+            assert_parity(EmailsSchema(many=True, **params), [email, orphan])
+
+        assert_parity(PasswordsSchema(), password)
+        assert_parity(PasswordsSchema(many=True), [password])
@@ -0,0 +1,338 @@
+"""Test organizational structure routes."""
+
+import requests
+
+from flask import url_for
+from app import app, db
+from app.models import OrganizationalStructure, \
+    OrganizationalStructureClosure
+from app.API.v1_0_0.nested_sets import check_tree, key_rows, load_tree, \
+    synthetic_tree
+from app.API.v1_0_0.closure import rebuild_closure
+
+
+def tree_depth(tree):
+    """Get depth of drilldown tree."""
+    return 1 + max(
+        [tree_depth(child) for child in tree.get('children', [])] or [0]
+    )
+
+
+def test_drilldown_depth():
+    """Test drilldown tree of element is limited by depth parameter."""
+    with app.test_request_context():
+        full = requests.get(
+            url_for(
+                'APIv1_0_0.get_organizational_structure_element',
+                id=1,
+                drilldown='true',
+                _external=True
+            ),
+            verify=False
+        )
+        limited = requests.get(
+            url_for(
+                'APIv1_0_0.get_organizational_structure_element',
+                id=1,
+                drilldown='true',
+                depth=1,
+                _external=True
+            ),
+            verify=False
+        )
+        damaged = requests.get(
+            url_for(
+                'APIv1_0_0.get_organizational_structure_element',
+                id=1,
+                drilldown='true',
+                depth=-1,
+                _external=True
+            ),
+            verify=False
+        )
+    assert full.status_code == 200
+    assert limited.status_code == 200
+    assert damaged.status_code == 400
+    assert full.json()[0]['id'] == 1
+    assert tree_depth(limited.json()[0]) == min(2, tree_depth(full.json()[0]))
+
+
+def test_elements_paths():
+    """Test batch paths are equal to paths of single elements."""
+    with app.test_request_context():
+        elements = requests.get(
+            url_for(
+                'APIv1_0_0.get_organizational_structure',
+                filters='id:>:0',
+                limit=5,
+                _external=True
+            ),
+            verify=False
+        ).json()['pageData']
+        ids = [element['id'] for element in elements]
+        paths = requests.get(
+            url_for(
+                'APIv1_0_0.get_organizational_structure_elements_paths',
+                ids=','.join(str(id) for id in ids),
+                _external=True
+            ),
+            verify=False
+        )
+        singles = [
+            requests.get(
+                url_for(
+                    'APIv1_0_0.get_organizational_structure_element_path',
+                    id=id,
+                    _external=True
+                ),
+                verify=False
+            ).json()
+            for id in ids
+        ]
+    assert paths.status_code == 200
+    assert [item['id'] for item in paths.json()] == ids
+    for item, single in zip(paths.json(), singles):
+        assert item['path'] == single
+        if item['path']:
+            assert item['path'][0]['id'] == 1
+
+
+def test_structure_batch():
+    """Test batch operations are applied to structure in one request."""
+    with app.test_request_context():
+        created = requests.post(
+            url_for('APIv1_0_0.post_organizational_structure_batch',
+                    _external=True),
+            json={'operations': [
+                {'operation': 'create', 'ref': 'dep', 'parent': 1},
+                {'operation': 'create', 'ref': 'sub', 'parent': 'dep'},
+                {'operation': 'create', 'ref': 'pos', 'parent': 'sub',
+                 'type': 2},
+                {'operation': 'move', 'id': 'pos', 'parent': 'dep'},
+                {'operation': 'rename', 'id': 'sub', 'name': 'Batch'},
+                {'operation': 'delete', 'id': 'sub'}
+            ]},
+            verify=False
+        )
+        assert created.status_code == 200
+        ids = created.json()['created']
+        assert set(ids) == {'dep', 'pos'}
+        path = requests.get(
+            url_for(
+                'APIv1_0_0.get_organizational_structure_element_path',
+                id=ids['pos'],
+                columns='name',
+                _external=True
+            ),
+            verify=False
+        ).json()
+        failed = requests.post(
+            url_for('APIv1_0_0.post_organizational_structure_batch',
+                    _external=True),
+            json={'operations': [
+                {'operation': 'delete', 'id': ids['dep'], 'recursive': True},
+                {'operation': 'move', 'id': ids['pos'], 'parent': 1}
+            ]},
+            verify=False
+        )
+        deleted = requests.post(
+            url_for('APIv1_0_0.post_organizational_structure_batch',
+                    _external=True),
+            json={'operations': [
+                {'operation': 'delete', 'id': ids['dep'], 'recursive': True}
+            ]},
+            verify=False
+        )
+    assert [element['id'] for element in path] == [1, ids['dep']]
+    assert failed.status_code == 404
+    assert deleted.status_code == 200
+    assert deleted.json()['deleted'] == 2
+
+
+def test_delete_keeps_children():
+    """Test not recursive deletion moves children to parent of element."""
+    with app.test_request_context():
+        ids = requests.post(
+            url_for('APIv1_0_0.post_organizational_structure_batch',
+                    _external=True),
+            json={'operations': [
+                {'operation': 'create', 'ref': 'dep', 'parent': 1},
+                {'operation': 'create', 'ref': 'sub', 'parent': 'dep'},
+                {'operation': 'create', 'ref': 'pos', 'parent': 'sub',
+                 'type': 2}
+            ]},
+            verify=False
+        ).json()['created']
+        deleted = requests.delete(
+            url_for(
+                'APIv1_0_0.delete_organizational_structure_element',
+                id=ids['sub'],
+                _external=True
+            ),
+            verify=False
+        )
+        path = requests.get(
+            url_for(
+                'APIv1_0_0.get_organizational_structure_element_path',
+                id=ids['pos'],
+                columns='name',
+                _external=True
+            ),
+            verify=False
+        ).json()
+        requests.delete(
+            url_for(
+                'APIv1_0_0.delete_organizational_structure_element',
+                id=ids['dep'],
+                recursive='true',
+                _external=True
+            ),
+            verify=False
+        )
+    assert deleted.status_code == 200
+    assert deleted.json()['rowsTouched'] > 0
+    assert [element['id'] for element in path] == [1, ids['dep']]
+
+
+def test_structure_integrity():
+    """Test nested sets keys of structure are consistent."""
+    with app.test_request_context():
+        response = requests.get(
+            url_for(
+                'APIv1_0_0.get_organizational_structure_integrity',
+                _external=True
+            ),
+            verify=False
+        )
+    assert response.status_code == 200
+    assert response.json()['problemsCount'] == 0
+
+
+def test_check_tree_damages():
+    """Test checker finds damaged keys and renumbering fixes them."""
+    with app.test_request_context():
+        tree = synthetic_tree(1000)
+        tree.renumber()
+        rows = sorted(tree.elements.values(), key=lambda row: row['lft'])
+        assert check_tree(rows)['problemsCount'] == 0
+
+        rows[10]['level'] += 1
+        rows[20]['lft'] += 1
+        problems = {
+            (problem['id'], problem['problem'])
+            for problem in check_tree(rows)['problems']
+        }
+        assert (rows[10]['id'], 'level') in problems
+        assert (rows[20]['id'], 'gap') in problems
+
+        tree.renumber()
+        assert check_tree(rows)['problemsCount'] == 0
+
+
+def test_check_tree_roots():
+    """Test checker reports damaged root once."""
+    columns = ('id', 'parent_id', 'tree_id', 'lft', 'rgt', 'level')
+    rows = [dict(zip(columns, values)) for values in (
+        (1, None, 1, 2, 7, 1),
+        (2, 1, 1, 3, 4, 2),
+        (3, 1, 1, 5, 6, 2),
+        (4, 1, 2, 1, 2, 1),
+    )]
+
+    assert check_tree(rows)['problems'] == [
+        {'id': 1, 'problem': 'root', 'expected': 1, 'value': 2},
+        {'id': 4, 'problem': 'parent', 'expected': None, 'value': 1}
+    ]
+
+
+def test_closure_writes():
+    """Test closure table mode writes don't shift nested sets keys."""
+    client = app.test_client()
+    url = '/API/v1.0.0/organization/structure/elements/'
+    app.config['STRUCTURE_CLOSURE_INDEX'] = True
+    try:
+        with app.app_context():
+            rebuild_closure(load_tree())
+            db.session.commit()
+            keys = {row['id']: row for row in map(dict, key_rows())}
+
+        first = client.post(url, query_string={'name': 'First'}).json
+        second = client.post(url, query_string={'name': 'Second'}).json
+        first_id = first['node']['id']
+        second_id = second['node']['id']
+        moved = client.put(
+            url + str(second_id), query_string={'parent': first_id}
+        )
+        tree = client.get(
+            url + str(first_id), query_string={'drilldown': 'true'}
+        ).json
+        path = client.get(url + str(second_id) + '/path').json
+        client.put(url + str(first_id), query_string={'parent': second_id})
+        looped = client.get(url + str(first_id) + '/path').json
+        with app.app_context():
+            changed = [
+                row['id'] for row in map(dict, key_rows())
+                if row['id'] in keys and row != keys[row['id']]
+            ]
+
+        deleted = client.delete(url + str(first_id))
+        orphan = client.get(url + str(second_id) + '/path').json
+        rebuilt = client.post('/API/v1.0.0/organization/structure/integrity')
+        checked = client.get(
+            '/API/v1.0.0/organization/structure/integrity'
+        ).json
+        client.delete(url + str(second_id))
+        client.post('/API/v1.0.0/organization/structure/integrity')
+    finally:
+        app.config['STRUCTURE_CLOSURE_INDEX'] = False
+        with app.app_context():
+            OrganizationalStructureClosure.query.delete()
+            db.session.commit()
+
+    assert moved.status_code == 200
+    assert [child['id'] for child in tree[0]['children']] == [second_id]
+    assert [element['id'] for element in path] == [1, first_id]
+    assert [element['id'] for element in looped] == [1]
+    assert changed == []
+    assert deleted.status_code == 200
+    assert [element['id'] for element in orphan] == [1]
+    assert rebuilt.status_code == 200
+    assert checked['problemsCount'] == 0
+    with app.app_context():
+        assert OrganizationalStructure.query.get(second_id) is None
+
+
+def test_structure_compare():
+    """Test benchmark of representations rolls back its writes."""
+    with app.app_context():
+        before = [dict(row) for row in key_rows()]
+    result = app.test_cli_runner().invoke(
+        args=['structure', 'compare', '--operations', '6', '--reads', '2']
+    )
+    with app.app_context():
+        after = [dict(row) for row in key_rows()]
+    assert result.exit_code == 0, result.output
+    assert [line.split(':')[0] for line in result.output.splitlines()] == [
+        'nestedSets', 'closure'
+    ]
+    assert after == before
+    assert not app.config.get('STRUCTURE_CLOSURE_INDEX', False)
+
+
+def test_structure_headcount():
+    """Test total users counts are rolled up from children."""
+    with app.test_request_context():
+        response = requests.get(
+            url_for(
+                'APIv1_0_0.get_organizational_structure_headcount',
+                _external=True
+            ),
+            verify=False
+        )
+    assert response.status_code == 200
+    counts = {element['id']: element for element in response.json()}
+    for element in counts.values():
+        assert element['totalUsers'] >= element['directUsers']
+        if element['parent_id'] in counts:
+            parent = counts[element['parent_id']]
+            assert parent['totalUsers'] >= element['totalUsers']
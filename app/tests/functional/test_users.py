@@ -0,0 +1,58 @@
+"""Test users routes."""
+
+from contextlib import contextmanager
+from flask import url_for
+from sqlalchemy import event
+from app import app, db
+
+
+@contextmanager
+def statements_counter():
+    """Collect statements executed by database engine."""
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', count)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', count)
+
+
+def test_relationships_loading():
+    """Test only dumped relationships of users are loaded."""
+    client = app.test_client()
+    counts = {}
+    for columns in ('login', 'login,modules,structures'):
+        with app.test_request_context():
+            url = url_for('APIv1_0_0.get_users', columns=columns, limit=10)
+        with statements_counter() as statements:
+            response = client.get(url)
+        assert response.status_code == 200
+        counts[columns] = statements
+
+    assert not [
+        statement for statement in counts['login']
+        if 'users_modules' in statement or 'users_structures' in statement
+    ]
+    assert len(counts['login,modules,structures']) == \
+        len(counts['login']) + 2
+
+
+def test_nested_relationships_loading():
+    """Test relationships of users in modules list are loaded in bulk."""
+    client = app.test_client()
+    counts = {}
+    for columns in ('name', 'users.login', 'users.login,users.structures'):
+        with app.test_request_context():
+            url = url_for('APIv1_0_0.get_modules', columns=columns)
+        with statements_counter() as statements:
+            response = client.get(url)
+        assert response.status_code == 200
+        counts[columns] = len(statements)
+
+    # One query for users of all modules and one for their structures
+    assert counts['users.login'] == counts['name'] + 1
+    assert counts['users.login,users.structures'] == counts['name'] + 2
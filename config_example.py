@@ -35,12 +35,49 @@ class Config(object):
     # Default settings
     LANGUAGES = ['en', 'ru']  # i18n languages supported
     LIMIT = 20  # Number of records in paginated json
+    COUNT_MODE = 'exact'  # Default records count strategy in paginated json:
+    # exact, cached, estimate or none
+    COUNT_CACHE_TTL = 60  # Time (in seconds) of cached records count validity
+    NDJSON_CHUNK_SIZE = 500  # Number of records fetched at once for NDJSON
+    # stream (format=ndjson)
+    SPEC_CACHE_SIZE = 256  # Number of cached compiled request parameters:
+    # filters, orderings, columns and exclusions
+    SCHEMA_CACHE_SIZE = 128  # Number of cached schema instances
+    COMPILED_DUMP = False  # Dump users, emails and passwords lists by
+    # generated functions instead of generic schema dump
+    JSON_ENCODER_BACKEND = 'stdlib'  # JSON encoder of responses (stdlib or
+    # orjson, if installed)
+    CACHE_BUS_BACKEND = 'db'  # Invalidation of caches of all workers (db,
+    # mmap or local for one process)
+    CACHE_BUS_POLL_INTERVAL = 0  # Minimal interval (in seconds) of polling
+    # generations of cached data (before every request by default), caches
+    # of other workers may stay stale up to this interval after changes
+    CACHE_BUS_FILE = '/dev/shm/api_cache_generations'  # Shared memory file
+    # of mmap backend
+    STRUCTURE_CLOSURE_INDEX = False  # Use closure table as authoritative
+    # hierarchy of organizational structure, fill it by «flask structure
+    # closure» first; nested sets keys are then regenerated on demand by
+    # «flask structure rebuild» (run it before disabling)
+    ATTRIBUTE_PATHS_DEPTH = 3  # Maximum nesting of dotted attribute paths
+    # allowed in columns and exclude parameters
     EMAIL_SECRET_KEY = '...'
     EMAIL_VERIFICATION_SALT = '...'
 
     USER_MAIL_RENEW = 90  # Time (in days) after which need to confirm mail
     USER_MAIL_RENEW_NOTIFICATION = round(USER_MAIL_RENEW * 0.1)  # Time (in
     # days) after which need to confirm mail
+    EMAIL_VALIDATION_LEVEL = 'mx'  # Checks of added emails (syntax, mx or
+    # probe by SMTP dialog with mail server)
+    EMAIL_VALIDATION_DNS_TIMEOUT = 5  # Timeout (in seconds) of MX lookup
+    EMAIL_VALIDATION_SMTP_TIMEOUT = 10  # Timeout (in seconds) of SMTP probe
+    EMAIL_VALIDATION_MX_TTL = 86400  # Time (in seconds) of caching of found
+    # MX records of domain, shared by workers through database
+    EMAIL_VALIDATION_MX_NEGATIVE_TTL = 600  # Time (in seconds) of caching
+    # of missing domains and MX records
+    USER_MAIL_RENEW_TOKEN_EXPIRATION = 86400  # Time (in seconds) of
+    # validity of tokens in renewal reminders
+    USER_MAIL_RENEW_CHUNK = 500  # Count of renewal reminders committed at
+    # once by «flask mail reverify» command
     USER_PASSWORD_RENEW = 45  # Time (in days) after which need to renew
     # password
     # JSON_AS_ASCII = False  # Turn off encoding json as ASCII default
@@ -59,6 +96,22 @@ class Config(object):
     MAIL_USERNAME = '...'
     MAIL_PASSWORD = '...'
     MAIL_DEFAULT_SENDER = "..."
+    MAIL_OUTBOX_BATCH = 50  # Maximal count of mails sent by worker of outbox
+    # through one connection to mail server
+    MAIL_OUTBOX_POLL_INTERVAL = 5  # Pause (in seconds) of outbox worker
+    # when there are no due mails
+    MAIL_OUTBOX_BACKOFF = 60  # Delay (in seconds) of retry after first
+    # failed attempt, doubled after every next failure
+    MAIL_OUTBOX_MAX_ATTEMPTS = 8  # Count of attempts to send mail before it
+    # is marked as failed
+    MAIL_POOL_SIZE = 2  # Maximal count of idle connections to mail server
+    # kept open by outbox worker between batches
+    MAIL_POOL_MAX_MESSAGES = 100  # Count of mails sent through one
+    # connection before it is reopened
+    MAIL_POOL_IDLE_TIMEOUT = 30  # Time (in seconds) after which idle
+    # connection to mail server is closed
+    MAIL_TEMPLATE_CACHE = True  # Render mail templates once per locale and
+    # substitute only variables, turn off for editing of templates
 
 
 class ProductionConfig(Config):
@@ -127,6 +127,35 @@ CREATE TABLE `assignment_users_structures` (
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='Связь пользователей и структуры организации';
 /*!40101 SET character_set_client = @saved_cs_client */;
 
+--
+-- Table structure for table `cache_generations`
+--
+
+DROP TABLE IF EXISTS `cache_generations`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!50503 SET character_set_client = utf8mb4 */;
+CREATE TABLE `cache_generations` (
+  `channel` varchar(50) CHARACTER SET utf8mb4 COLLATE utf8mb4_0900_ai_ci NOT NULL COMMENT 'Канал кэшируемых данных',
+  `generation` bigint NOT NULL DEFAULT '0' COMMENT 'Поколение данных',
+  PRIMARY KEY (`channel`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='Поколения кэшируемых данных (для инвалидации кэшей процессов)';
+/*!40101 SET character_set_client = @saved_cs_client */;
+
+--
+-- Table structure for table `email_domains`
+--
+
+DROP TABLE IF EXISTS `email_domains`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!50503 SET character_set_client = utf8mb4 */;
+CREATE TABLE `email_domains` (
+  `domain` varchar(255) NOT NULL COMMENT 'Домен почты',
+  `mx_records` varchar(1024) NOT NULL DEFAULT '' COMMENT 'Почтовые серверы домена (пусто, если не найдены)',
+  `expires_at` datetime NOT NULL COMMENT 'Срок хранения результата',
+  PRIMARY KEY (`domain`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='Кэш MX записей доменов почты (для проверки адресов)';
+/*!40101 SET character_set_client = @saved_cs_client */;
+
 --
 -- Table structure for table `emails`
 --
@@ -144,6 +173,7 @@ CREATE TABLE `emails` (
   PRIMARY KEY (`id`),
   UNIQUE KEY `value` (`value`),
   KEY `emails_ibfk_1` (`user_id`),
+  KEY `emails_verify_active_until_idx` (`verify`,`active_until`),
   CONSTRAINT `emails_ibfk_1` FOREIGN KEY (`user_id`) REFERENCES `users` (`id`) ON DELETE RESTRICT ON UPDATE RESTRICT
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='Электронные почты';
 /*!40101 SET character_set_client = @saved_cs_client */;
@@ -175,6 +205,31 @@ CREATE TABLE `history` (
 ) ENGINE=InnoDB AUTO_INCREMENT=3 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='История (логи) действий пользователей в системе';
 /*!40101 SET character_set_client = @saved_cs_client */;
 
+--
+-- Table structure for table `mail_outbox`
+--
+
+DROP TABLE IF EXISTS `mail_outbox`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!50503 SET character_set_client = utf8mb4 */;
+CREATE TABLE `mail_outbox` (
+  `id` int NOT NULL AUTO_INCREMENT COMMENT 'Уникальный идентификатор',
+  `kind` varchar(50) NOT NULL COMMENT 'Вид письма',
+  `recipient` varchar(100) NOT NULL COMMENT 'Адрес получателя',
+  `subject` varchar(255) NOT NULL COMMENT 'Тема',
+  `html` text NOT NULL COMMENT 'Содержимое',
+  `status` varchar(10) NOT NULL DEFAULT 'pending' COMMENT 'Статус отправки',
+  `attempts` int NOT NULL DEFAULT '0' COMMENT 'Количество попыток отправки',
+  `next_attempt_at` datetime NOT NULL COMMENT 'Время следующей попытки',
+  `created_at` datetime NOT NULL COMMENT 'Создано',
+  `sent_at` datetime DEFAULT NULL COMMENT 'Отправлено',
+  `last_error` varchar(255) DEFAULT NULL COMMENT 'Последняя ошибка отправки',
+  PRIMARY KEY (`id`),
+  KEY `mail_outbox_status_next_attempt_idx` (`status`,`next_attempt_at`),
+  KEY `mail_outbox_kind_created_at_idx` (`kind`,`created_at`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='Исходящие письма (отправляются фоновым обработчиком)';
+/*!40101 SET character_set_client = @saved_cs_client */;
+
 --
 -- Table structure for table `modules`
 --
@@ -253,6 +308,24 @@ CREATE TABLE `organizational_structure` (
 ) ENGINE=InnoDB AUTO_INCREMENT=63 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='Организационная структура организации';
 /*!40101 SET character_set_client = @saved_cs_client */;
 
+--
+-- Table structure for table `organizational_structure_closure`
+--
+
+DROP TABLE IF EXISTS `organizational_structure_closure`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!50503 SET character_set_client = utf8mb4 */;
+CREATE TABLE `organizational_structure_closure` (
+  `ancestor_id` int NOT NULL COMMENT 'Предок',
+  `descendant_id` int NOT NULL COMMENT 'Потомок',
+  `depth` int NOT NULL COMMENT 'Расстояние',
+  PRIMARY KEY (`ancestor_id`,`descendant_id`),
+  KEY `ix_organizational_structure_closure_descendant_id` (`descendant_id`),
+  CONSTRAINT `organizational_structure_closure_ibfk_1` FOREIGN KEY (`ancestor_id`) REFERENCES `organizational_structure` (`id`) ON DELETE CASCADE ON UPDATE RESTRICT,
+  CONSTRAINT `organizational_structure_closure_ibfk_2` FOREIGN KEY (`descendant_id`) REFERENCES `organizational_structure` (`id`) ON DELETE CASCADE ON UPDATE RESTRICT
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='Замыкание иерархии организационной структуры (необязательный индекс)';
+/*!40101 SET character_set_client = @saved_cs_client */;
+
 --
 -- Table structure for table `passwords`
 --